@@ -0,0 +1,150 @@
+"""
+Fixed vs adaptive Ollama concurrency against a fake Ollama that saturates.
+
+Many client threads (standing in for concurrent jobs) call
+`LeverAgent.generate_job_info` until the call budget is spent, once per
+mode. The fixed modes pin the limiter (OLLAMA_CONCURRENCY_MIN = MAX) and
+the adaptive one lets it move between 1 and --max-concurrency. The fake
+Ollama serves --parallel requests at once, slows down with --contention-ms
+per request served, answers 503 past --max-queue waiting and can drop
+connections during --outage windows, so each mode's throughput, latency,
+failures and time paused behind the circuit breaker can be compared.
+
+    python -m benchmarks.bench_concurrency --calls 300 --clients 16 --latency-ms 200 --parallel 4 --contention-ms 40 --max-queue 6
+    python -m benchmarks.bench_concurrency --calls 300 --outage 3-6 --timeout-s 2
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import latency_summary, prepare_environment, save_results
+from benchmarks.fake_ollama import STATS, add_arguments, config_from_args, start_fake_ollama
+from benchmarks.stub_server import render_fixture
+
+
+def run_mode(name: str, limits: tuple, ollama_url: str, page_text: str, args) -> dict:
+    from src.agents import lever as agent_module
+    from src.agents import router
+    from src.agents.concurrency import AIMDLimiter
+    from src.agents.lever import LeverAgent
+    from src.telemetry.metrics import REGISTRY
+
+    initial, minimum, maximum = limits
+    router.CIRCUIT_RESET_S = args.circuit_reset_s
+    router.LLM_LIMITER = AIMDLimiter(
+        "llm",
+        initial=initial,
+        minimum=minimum,
+        maximum=maximum,
+        tolerance=router.LLM_LATENCY_TOLERANCE,
+        is_overload=router.is_overload,
+    )
+    agent_module.OLLAMA_TIMEOUT_S = args.timeout_s
+    agent = LeverAgent(router.ModelRouter(router.EndpointPool([ollama_url])))
+
+    REGISTRY.reset()
+    for key in STATS:
+        STATS[key] = 0
+    remaining = [args.calls]
+    latencies, failures = [], []
+    limits_seen = []
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                agent.generate_job_info(page_text)
+                ok = True
+            except Exception as e:
+                ok = False
+                error = type(e).__name__
+            with lock:
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    failures.append(error)
+                limits_seen.append(router.LLM_LIMITER.limit)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    summary = REGISTRY.summary()
+    paused = summary.get("hermes_llm_paused_seconds", [{}])[0]
+    errors = {}
+    for error in failures:
+        errors[error] = errors.get(error, 0) + 1
+    return {
+        "mode": name,
+        "limits": {"initial": initial, "min": minimum, "max": maximum},
+        "elapsed_s": round(elapsed, 2),
+        "calls_per_s": round(len(latencies) / elapsed, 2),
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "errors": errors,
+        "latency": latency_summary(latencies),
+        "final_limit": router.LLM_LIMITER.limit,
+        "mean_limit": round(sum(limits_seen) / len(limits_seen), 2) if limits_seen else None,
+        "limit_decreases": summary.get("hermes_concurrency_decreases_total", []),
+        "paused_requests": paused.get("count", 0),
+        "server": dict(STATS),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=300, help="generate_job_info calls per mode")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent callers")
+    parser.add_argument(
+        "--fixed",
+        default="1,16",
+        help="Comma separated fixed concurrency limits to compare with the adaptive one",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--timeout-s", type=float, default=5.0, help="OLLAMA_TIMEOUT_S")
+    parser.add_argument("--circuit-reset-s", type=float, default=1.0)
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    add_arguments(parser)
+    parser.set_defaults(latency_ms=200.0, parallel=4, contention_ms=40.0, max_queue=6)
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    _, ollama_url = start_fake_ollama(config)
+    workdir = prepare_environment(ollama_url)
+
+    from bs4 import BeautifulSoup
+
+    page_text = BeautifulSoup(
+        render_fixture("lever_posting.html", "acme", "bench"), "html.parser"
+    ).get_text(" ", strip=True)
+
+    modes = [(f"fixed-{n}", (n, n, n)) for n in map(int, args.fixed.split(",")) if n]
+    modes.append(("adaptive", (2, 1, args.max_concurrency)))
+    results = {"benchmark": "concurrency", "config": vars(args), "workdir": workdir, "modes": []}
+    for name, limits in modes:
+        # A fresh server per mode, so outage windows start with the mode.
+        _, ollama_url = start_fake_ollama(config)
+        result = run_mode(name, limits, ollama_url, page_text, args)
+        results["modes"].append(result)
+        print(
+            f"{name:>10}: {result['calls_per_s']:>6} calls/s, "
+            f"p95 {result['latency']['p95_ms']} ms, failed {result['failed']}, "
+            f"mean limit {result['mean_limit']}, paused {result['paused_requests']}"
+        )
+
+    path = save_results("concurrency", results, args.output)
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
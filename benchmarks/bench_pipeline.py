@@ -0,0 +1,184 @@
+"""
+End-to-end throughput benchmark against recorded fixtures and a fake Ollama.
+
+Drives the API endpoints (install, listings, status, urls, filler,
+job-processed), `LeverProcessor.process` and `LeverAgent` without network
+access, Chrome or a real model, and reports jobs/minute, p50/p95 latency per
+stage and per endpoint, and peak RSS. Results are saved as JSON so runs can
+be compared with `python -m benchmarks.compare`.
+
+    python -m benchmarks.bench_pipeline --jobs 50 --installations 2 --latency-ms 200
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future
+
+from benchmarks.common import (
+    latency_summary,
+    peak_rss_mb,
+    prepare_environment,
+    route_lever_to,
+    save_results,
+)
+from benchmarks.fake_ollama import add_arguments, config_from_args, start_fake_ollama
+from benchmarks.stub_server import start_stub_server
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 415 555 0100 | linkedin.com/in/janedoe | github.com/janedoe
+Senior Software Engineer with 8 years of experience building Python backend services.
+Skills: Python, Django, FastAPI, PostgreSQL, Redis, Kafka, AWS, Docker, Kubernetes.
+"""
+PREFERENCES = "Senior or staff backend roles, remote in the US, Python stack, no internships."
+
+
+class _RecordingExecutor:
+    """Stands in for the API's process pool; processing is driven explicitly."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(args)
+        return Future()
+
+    def shutdown(self, *args, **kwargs):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=20, help="Postings per installation")
+    parser.add_argument("--installations", type=int, default=1)
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="All installations submit the same postings",
+    )
+    parser.add_argument("--agent-calls", type=int, default=20)
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    _, ollama_url = start_fake_ollama(config_from_args(args))
+    _, stub_url = start_stub_server()
+    workdir = prepare_environment(ollama_url)
+
+    from src.agents.lever import LeverAgent
+    from src.processors.lever import LeverProcessor
+    from src.telemetry.metrics import REGISTRY
+    from src.web import api
+
+    route_lever_to(stub_url)
+    api.SCHEDULER.executor = _RecordingExecutor()
+    client = api.app.test_client()
+    endpoint_latencies = defaultdict(list)
+
+    def call(method: str, path: str, body: dict):
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        endpoint_latencies[path].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} -> {response.status_code}")
+        return response
+
+    shared_links = [
+        f"https://jobs.lever.co/company-{i % 7}/{uuid.uuid4()}" for i in range(args.jobs)
+    ]
+    installations = [f"bench-{uuid.uuid4()}" for _ in range(args.installations)]
+    for installation_id in installations:
+        call(
+            "POST",
+            "/api/install",
+            {
+                "installation_id": installation_id,
+                "resume": RESUME,
+                "preferences": PREFERENCES,
+            },
+        )
+        links = shared_links if args.shared else [
+            f"https://jobs.lever.co/company-{i % 7}/{uuid.uuid4()}"
+            for i in range(args.jobs)
+        ]
+        call(
+            "POST",
+            "/api/listings",
+            {"installation_id": installation_id, "links": links},
+        )
+
+    REGISTRY.reset()
+    start = time.perf_counter()
+    for installation_id in installations:
+        asyncio.run(LeverProcessor(installation_id).process())
+    processing_s = time.perf_counter() - start
+    stages = REGISTRY.summary().get("hermes_stage_duration_seconds", [])
+
+    for installation_id in installations:
+        call("POST", "/api/status", {"installation_id": installation_id})
+        urls = call("POST", "/api/urls", {"installation_id": installation_id}).json["urls"]
+        for url in urls:
+            call(
+                "POST",
+                "/api/filler",
+                {
+                    "url": url,
+                    "html": "",
+                    "timestamp": "0",
+                    "installation_id": installation_id,
+                },
+            )
+            call(
+                "PUT",
+                "/api/job-processed",
+                {"url": url, "timestamp": "0", "installation_id": installation_id},
+            )
+
+    agent = LeverAgent()
+    agent_latencies = defaultdict(list)
+    page_text = "Senior Backend Engineer. Build Python services. " * 40
+    question = '<li class="application-question"><input type="text" name="name"></li>'
+    for _ in range(args.agent_calls):
+        start = time.perf_counter()
+        agent.generate_job_info(page_text)
+        agent_latencies["generate_job_info"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        agent.generate_action(question, page_text, RESUME, PREFERENCES)
+        agent_latencies["generate_action"].append(time.perf_counter() - start)
+
+    total_jobs = args.jobs * args.installations
+    results = {
+        "benchmark": "pipeline",
+        "config": vars(args),
+        "workdir": workdir,
+        "jobs": total_jobs,
+        "processing_s": round(processing_s, 3),
+        "jobs_per_minute": round(total_jobs / processing_s * 60, 1),
+        "stages": {
+            entry["labels"]["stage"]: {
+                "count": entry["count"],
+                "p50_ms": round(entry["p50_s"] * 1000, 2),
+                "p95_ms": round(entry["p95_s"] * 1000, 2),
+                "total_s": entry["total_s"],
+            }
+            for entry in stages
+        },
+        "endpoints": {
+            path: latency_summary(values) for path, values in endpoint_latencies.items()
+        },
+        "agent": {name: latency_summary(values) for name, values in agent_latencies.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    path = save_results("pipeline", results, args.output)
+
+    print(f"{total_jobs} jobs in {processing_s:.2f}s ({results['jobs_per_minute']} jobs/min)")
+    print(f"{'stage':<24} {'count':>6} {'p50_ms':>9} {'p95_ms':>9}")
+    for stage, data in sorted(results["stages"].items()):
+        print(f"{stage:<24} {data['count']:>6} {data['p50_ms']:>9} {data['p95_ms']:>9}")
+    print(f"peak RSS {results['peak_rss_mb']} MB; results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Time-to-first-token of form answers with the question-first and prefix-first
+prompt layouts.
+
+Answers every question of the recorded apply form one call at a time, first
+with the old layout (question HTML before the job description) and then with
+the agent's layout (resume, preferences and job description first, question
+last). With a stable prefix, Ollama reuses the evaluated prefix from its KV
+cache, so the time to the first streamed chunk drops. Runs against the fake
+Ollama by default, or a real one with --ollama-url.
+
+    python -m benchmarks.bench_prompt_cache --rounds 3 --prompt-token-ms 0.5
+    python -m benchmarks.bench_prompt_cache --ollama-url http://localhost:11434 --model qwen3:4b
+"""
+
+import argparse
+import json
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_pipeline import PREFERENCES, RESUME
+from benchmarks.common import latency_summary, save_results
+from benchmarks.fake_ollama import add_arguments, config_from_args, start_fake_ollama
+from benchmarks.stub_server import render_fixture
+
+
+def first_token_seconds(url: str, payload: dict) -> float:
+    start = time.perf_counter()
+    with requests.post(
+        f"{url}/api/generate", data=json.dumps(payload), stream=True, timeout=300
+    ) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if line:
+                return time.perf_counter() - start
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ollama-url", help="Use this Ollama instead of the fake one")
+    parser.add_argument("--model", default="qwen3:4b")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the form")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    url = args.ollama_url
+    if not url:
+        _, url = start_fake_ollama(config_from_args(args))
+
+    from src.agents.lever import OLLAMA_KEEP_ALIVE, LeverAgent
+    from src.config.prompts import FILLER_AGENT_SYSTEM_PROMPT
+    from src.models.agents import AgentAction
+    from src.web.lever import LeverBrowser
+
+    page_text = BeautifulSoup(
+        render_fixture("lever_posting.html", "acme", "bench"), "html.parser"
+    ).get_text(" ", strip=True)
+    form_html = BeautifulSoup(
+        render_fixture("lever_apply.html", "acme", "bench"), "html.parser"
+    ).select_one("#application-form").decode_contents()
+    questions = LeverBrowser("https://jobs.lever.co/acme/bench/apply").get_questions_html(
+        form_html
+    )
+
+    def question_first(question_html: str):
+        system = FILLER_AGENT_SYSTEM_PROMPT.format(resume=RESUME, preferences=PREFERENCES)
+        prompt = (
+            "Question HTML:\n\n"
+            f"{question_html}\n\n"
+            "Job Description:\n\n"
+            f"{page_text}\n\n"
+        )
+        return system, prompt
+
+    def prefix_first(question_html: str):
+        system, prompt, _, _ = LeverAgent._filler_prompt(
+            "field_answer",
+            "Question HTML:\n\n" f"{question_html}\n\n",
+            page_text,
+            RESUME,
+            PREFERENCES,
+        )
+        return system, prompt
+
+    layouts = {}
+    for name, build in (("question_first", question_first), ("prefix_first", prefix_first)):
+        samples = []
+        for _ in range(args.rounds):
+            for question_html in questions:
+                system, prompt = build(question_html)
+                samples.append(
+                    first_token_seconds(
+                        url,
+                        {
+                            "model": args.model,
+                            "system": system,
+                            "prompt": prompt,
+                            "format": AgentAction.model_json_schema(),
+                            "stream": True,
+                            "keep_alive": OLLAMA_KEEP_ALIVE,
+                            "options": {"temperature": 0.0, "num_predict": 1},
+                        },
+                    )
+                )
+        layouts[name] = latency_summary(samples)
+        layouts[name]["mean_ms"] = round(sum(samples) / len(samples) * 1000, 2)
+
+    before, after = layouts["question_first"]["mean_ms"], layouts["prefix_first"]["mean_ms"]
+    results = {
+        "benchmark": "prompt_cache",
+        "config": vars(args),
+        "questions": len(questions),
+        "layouts": layouts,
+        "ttft_reduction": round(1 - after / before, 3) if before else None,
+    }
+    path = save_results("prompt_cache", results, args.output)
+    for name, data in layouts.items():
+        print(
+            f"{name:<16} TTFT mean {data['mean_ms']:>9} ms  "
+            f"p50 {data['p50_ms']:>9} ms  p95 {data['p95_ms']:>9} ms"
+        )
+    print(f"TTFT reduction {results['ttft_reduction']:.1%}; results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
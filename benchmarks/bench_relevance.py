@@ -0,0 +1,104 @@
+"""
+Throughput and parking rate of the resume-to-posting relevance prefilter.
+
+Scores a synthetic batch of postings against the benchmark resume. Half are
+variants of the recorded Lever posting and the fixture postings, and half
+are off-topic postings (nursing, sales, hospitality). Reports postings
+scored per second, the score distribution per group and how many postings
+RELEVANCE_THRESHOLD would park.
+
+    python -m benchmarks.bench_relevance --postings 5000 --threshold 0.05
+"""
+
+import argparse
+import json
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.bench_pipeline import PREFERENCES, RESUME
+from benchmarks.common import save_results
+from benchmarks.stub_server import render_fixture
+
+OFF_TOPIC = [
+    "Registered Nurse, ICU night shift. Provide patient care, administer medication, "
+    "BLS and ACLS certification required. Hospital experience preferred.",
+    "Sales Development Representative. Prospect new accounts by cold calling and email, "
+    "qualify leads, hit monthly quota, keep the CRM up to date. Commission plan.",
+    "Sous Chef for our downtown restaurant. Run the line, manage kitchen staff, "
+    "order inventory and keep food safety standards. Weekend availability.",
+    "Warehouse Associate. Pick, pack and ship orders, operate forklifts, "
+    "maintain inventory accuracy. Must lift 50 lbs. Day and night shifts.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--postings", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    args = parser.parse_args()
+
+    from src.processors import relevance
+    from src.processors.lever_postings import parse_posting
+
+    threshold = relevance.RELEVANCE_THRESHOLD if args.threshold is None else args.threshold
+    rng = random.Random(args.seed)
+    relevant = [
+        BeautifulSoup(
+            render_fixture("lever_posting.html", "acme", "bench"), "html.parser"
+        ).get_text(" ", strip=True)
+    ] + [
+        parse_posting(raw, "acme")["page_text"]
+        for raw in json.loads(render_fixture("lever_postings.json", "acme", ""))[:2]
+    ]
+
+    def variant(text: str) -> str:
+        words = text.split()
+        start = rng.randrange(0, max(1, len(words) // 4))
+        return " ".join(words[start : start + max(20, int(len(words) * rng.uniform(0.5, 1.0)))])
+
+    texts, groups = [], []
+    for i in range(args.postings):
+        on_topic = i % 2 == 0
+        texts.append(variant(rng.choice(relevant if on_topic else OFF_TOPIC)))
+        groups.append("relevant" if on_topic else "off_topic")
+
+    scorer = relevance.RelevanceScorer(RESUME, PREFERENCES)
+    start = time.perf_counter()
+    scores = scorer.score(texts)
+    elapsed = time.perf_counter() - start
+
+    results = {
+        "benchmark": "relevance",
+        "config": {**vars(args), "threshold": threshold},
+        "postings": len(texts),
+        "postings_per_s": round(len(texts) / elapsed, 1),
+        "groups": {},
+    }
+    for group in ("relevant", "off_topic"):
+        values = sorted(float(s) for s, g in zip(scores, groups) if g == group)
+        parked = sum(1 for value in values if threshold > 0 and value < threshold)
+        results["groups"][group] = {
+            "count": len(values),
+            "min": round(values[0], 4),
+            "median": round(values[len(values) // 2], 4),
+            "max": round(values[-1], 4),
+            "parked": parked,
+        }
+    path = save_results("relevance", results, args.output)
+
+    print(f"{len(texts)} postings scored in {elapsed:.3f}s ({results['postings_per_s']}/s)")
+    for group, data in results["groups"].items():
+        print(
+            f"{group:<10} score min {data['min']:.4f} median {data['median']:.4f} "
+            f"max {data['max']:.4f}  parked {data['parked']}/{data['count']} "
+            f"at threshold {threshold}"
+        )
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Per-task startup overhead of cold and warm processing workers.
+
+Runs the same small installations through a plain process pool calling
+`src.jobs.lever.execute` (a new event loop, agent and browser per task) and
+through `create_worker_pool()` calling `run_task` (state preloaded once per
+worker). Reports the wall time per task and the time from task entry until
+the processor is ready (hermes_task_startup_seconds). The fixture browser
+stands in for Chrome; launching it costs --browser-launch-ms, paid per
+posting by cold workers and once per process by the warm pool.
+
+    python -m benchmarks.bench_worker_startup --tasks 20 --workers 2 --browser-launch-ms 800
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_pipeline import PREFERENCES, RESUME, _RecordingExecutor
+from benchmarks.common import (
+    latency_summary,
+    prepare_environment,
+    route_lever_to,
+    save_results,
+)
+from benchmarks.fake_ollama import add_arguments, config_from_args, start_fake_ollama
+from benchmarks.stub_server import start_stub_server
+
+
+class _FakeChrome:
+    # No Chrome process, and it never disconnects.
+    process = None
+
+    def on(self, event, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+def _route_with_launch_cost(stub_url: str, launch_ms: float):
+    """Like `route_lever_to`, but getting a browser takes `launch_ms`."""
+    import src.web.lever
+    from src.processors.lever import LeverProcessor
+
+    async def launch(**kwargs):
+        await asyncio.sleep(launch_ms / 1000)
+        return _FakeChrome()
+
+    route_lever_to(stub_url)
+    fixture_browser = LeverProcessor.browser_class
+
+    class LaunchingFixtureBrowser(fixture_browser):
+        async def open_and_get_form_html(self) -> str:
+            created = False
+            if self._browser_pool is not None:
+                self._browser = await self._browser_pool.get()
+            else:
+                await self.create_browser()
+                created = True
+            try:
+                return await super().open_and_get_form_html()
+            finally:
+                if created:
+                    await self.close_browser()
+
+    src.web.lever.launch = launch
+    LeverProcessor.browser_class = LaunchingFixtureBrowser
+
+
+def _cold_initializer(stub_url: str, launch_ms: float):
+    _route_with_launch_cost(stub_url, launch_ms)
+
+
+def _warm_initializer(stub_url: str, launch_ms: float):
+    from src.jobs.worker import initialize_worker
+
+    _route_with_launch_cost(stub_url, launch_ms)
+    initialize_worker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=20, help="Tasks per mode")
+    parser.add_argument("--jobs", type=int, default=1, help="Postings per task")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--browser-launch-ms", type=float, default=800)
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    _, ollama_url = start_fake_ollama(config_from_args(args))
+    _, stub_url = start_stub_server()
+    workdir = prepare_environment(ollama_url)
+
+    from src.jobs.lever import execute
+    from src.jobs.worker import run_task
+    from src.telemetry.metrics import REGISTRY
+    from src.web import api
+
+    api.SCHEDULER.executor = _RecordingExecutor()
+    client = api.app.test_client()
+
+    def new_installation() -> str:
+        installation_id = f"bench-{uuid.uuid4()}"
+        client.post(
+            "/api/install",
+            json={
+                "installation_id": installation_id,
+                "resume": RESUME,
+                "preferences": PREFERENCES,
+            },
+        )
+        client.post(
+            "/api/listings",
+            json={
+                "installation_id": installation_id,
+                "links": [
+                    f"https://jobs.lever.co/company-{i % 7}/{uuid.uuid4()}"
+                    for i in range(args.jobs)
+                ],
+            },
+        )
+        return installation_id
+
+    spawn = multiprocessing.get_context("spawn")
+    modes = {
+        "cold": (execute, _cold_initializer),
+        "warm": (run_task, _warm_initializer),
+    }
+    results = {"benchmark": "worker_startup", "config": vars(args), "workdir": workdir}
+    for mode, (task, initializer) in modes.items():
+        installations = [new_installation() for _ in range(args.tasks)]
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=spawn,
+            initializer=initializer,
+            initargs=(stub_url, args.browser_launch_ms),
+        )
+        # Start the workers before timing tasks, as a long-running API would.
+        for future in [pool.submit(time.sleep, 0) for _ in range(args.workers)]:
+            future.result()
+        REGISTRY.reset()
+        wall = []
+        for installation_id in installations:
+            start = time.perf_counter()
+            REGISTRY.merge(pool.submit(task, installation_id).result())
+            wall.append(time.perf_counter() - start)
+        pool.shutdown()
+        startup = [
+            entry
+            for entry in REGISTRY.summary().get("hermes_task_startup_seconds", [])
+            if entry["labels"].get("mode") == mode
+        ]
+        results[mode] = {
+            "task": latency_summary(wall),
+            "task_mean_ms": round(sum(wall) / len(wall) * 1000, 2),
+            "startup_mean_ms": round(startup[0]["mean_s"] * 1000, 2) if startup else None,
+        }
+
+    cold, warm = results["cold"]["task_mean_ms"], results["warm"]["task_mean_ms"]
+    results["task_time_reduction"] = round(1 - warm / cold, 3) if cold else None
+    path = save_results("worker_startup", results, args.output)
+    for mode in modes:
+        data = results[mode]
+        print(
+            f"{mode:<5} task mean {data['task_mean_ms']:>9} ms  "
+            f"p95 {data['task']['p95_ms']:>9} ms  startup mean {data['startup_mean_ms']} ms"
+        )
+    print(f"Task time reduction {results['task_time_reduction']:.1%}; results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Call `prepare_environment()` before importing anything from `src`, because
+the database URL and Ollama URL are read at import time.
+"""
+
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def prepare_environment(ollama_url: str, workdir: Optional[str] = None) -> str:
+    """Point the app at a throwaway database and the given Ollama URL, and create its schema."""
+    workdir = workdir or tempfile.mkdtemp(prefix="hermes-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'bench.db'}"
+    os.environ["OLLAMA_URL"] = ollama_url
+    os.environ["METRICS_DIR"] = str(Path(workdir) / "metrics")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("TRACE_EXPORTER", "none")
+
+    from src.db.model import init_db
+
+    init_db()
+    return workdir
+
+
+def route_lever_to(stub_url: str):
+    """
+    Send https://jobs.lever.co traffic to the local stub server, and replay
+    the recorded apply page instead of launching Chrome.
+    """
+    from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
+
+    from src.processors.lever import LeverProcessor
+    from src.processors.utils import get_http_session
+    from src.telemetry.metrics import timed
+    from src.web.lever import LeverBrowser
+
+    class StubAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            parts = urlsplit(request.url)
+            request.url = f"{stub_url}{parts.path}" + (
+                f"?{parts.query}" if parts.query else ""
+            )
+            return super().send(request, **kwargs)
+
+    class FixtureBrowser(LeverBrowser):
+        async def open_and_get_form_html(self) -> str:
+            with timed("browser_navigation"):
+                response = get_http_session().get(self._link, timeout=30)
+                response.raise_for_status()
+            form = BeautifulSoup(response.text, "html.parser").select_one(
+                "#application-form"
+            )
+            return form.decode_contents()
+
+    get_http_session().mount("https://jobs.lever.co/", StubAdapter())
+    LeverProcessor.browser_class = FixtureBrowser
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
+
+
+def latency_summary(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.5) * 1000, 2) if values else None,
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2) if values else None,
+        "max_ms": round(max(values) * 1000, 2) if values else None,
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def save_results(name: str, results: dict, output: Optional[str] = None) -> Path:
+    """Write results to `output` or benchmarks/results/<name>-<timestamp>.json."""
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = RESULTS_DIR / f"{name}-{timestamp}.json"
+    path.write_text(json.dumps(results, indent=2))
+    return path
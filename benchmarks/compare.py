@@ -0,0 +1,43 @@
+"""
+Compare two saved benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/pipeline-A.json benchmarks/results/pipeline-B.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+
+def _flatten(data, prefix=""):
+    """Flatten nested result dicts into {"stages.generate_action.p50_ms": 12.3}."""
+    values = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in ("config", "workdir"):
+                continue
+            values.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        values[prefix.rstrip(".")] = data
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline = _flatten(json.loads(Path(args.baseline).read_text()))
+    candidate = _flatten(json.loads(Path(args.candidate).read_text()))
+    print(f"{'metric':<48} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(set(baseline) | set(candidate)):
+        old, new = baseline.get(key), candidate.get(key)
+        change = ""
+        if old and new is not None:
+            change = f"{(new - old) / old:+.1%}"
+        print(f"{key:<48} {str(old):>12} {str(new):>12} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Concurrent writer benchmark for the database engine configuration.
+
+Several processes (standing in for Flask threads and pool workers) each run
+the write pattern of `LeverProcessor.process_job` against the same database:
+insert a job row, update it with job details, insert its actions, clear
+`is_processing`. Runs once with a plain `create_engine` and once with
+`create_db_engine`, and reports throughput, commit latency and lock errors.
+
+    python -m benchmarks.db_concurrent_writes --processes 8 --jobs 200
+"""
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+
+def _writer(mode: str, url: str, jobs: int, results):
+    from src.db.engine import create_db_engine
+    from src.db.model import ApplicationActions, JobAnalysis
+
+    if mode == "tuned":
+        engine = create_db_engine(url)
+    else:
+        engine = create_engine(url, future=True)
+    Session = sessionmaker(bind=engine, future=True)
+
+    latencies, errors = [], 0
+    for i in range(jobs):
+        start = time.perf_counter()
+        try:
+            with Session() as session:
+                job = JobAnalysis(
+                    link=f"https://jobs.lever.co/bench/{i}",
+                    title="processing...",
+                    installation_id="bench",
+                    is_processing=True,
+                )
+                session.add(job)
+                session.commit()
+                session.query(JobAnalysis).filter(JobAnalysis.id == job.id).update(
+                    {"title": "Engineer", "description": "x" * 2000}
+                )
+                session.commit()
+                session.add_all(
+                    [
+                        ApplicationActions(
+                            job_analysis_id=job.id,
+                            question_html="<li>q</li>",
+                            question_text="q",
+                            answer_text="a",
+                            action="type",
+                            query_selector="input",
+                        )
+                        for _ in range(10)
+                    ]
+                )
+                session.commit()
+                session.query(JobAnalysis).filter(JobAnalysis.id == job.id).update(
+                    {"is_processing": False}
+                )
+                session.commit()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    results.put({"latencies": latencies, "errors": errors})
+
+
+def run(mode: str, processes: int, jobs: int, base_dir: str = None) -> dict:
+    from src.db.model import Base
+
+    directory = tempfile.mkdtemp(prefix="hermes-db-bench-", dir=base_dir)
+    url = f"sqlite:///{Path(directory) / 'bench.db'}"
+    Base.metadata.create_all(create_engine(url))
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_writer, args=(mode, url, jobs, results))
+        for _ in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for r in collected for l in r["latencies"])
+    errors = sum(r["errors"] for r in collected)
+    total = processes * jobs
+    return {
+        "mode": mode,
+        "processes": processes,
+        "jobs": total,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round((total - errors) / elapsed, 1),
+        "lock_errors": errors,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=200, help="Jobs per process")
+    parser.add_argument(
+        "--dir", help="Where to create the database (use a real disk, not tmpfs)"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [run(mode, args.processes, args.jobs, args.dir) for mode in ("default", "tuned")]
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
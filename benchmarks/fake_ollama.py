@@ -0,0 +1,362 @@
+"""
+Fake Ollama `/api/generate` endpoint with configurable latency.
+
+It answers with canned, schema-valid JSON chosen from the request's `format`
+schema (JobDetails, AgentAction and batched IndexedAgentAction arrays,
+JobGoogleSearchQuery arrays), so the agents
+and processors run unchanged against it. Requests with `"stream": true` (or
+no `stream` field, as in Ollama) get NDJSON chunks of about one token each.
+Prompt evaluation is only charged for the part of the prompt after the
+prefix shared with the model's previous request, like Ollama's KV cache.
+
+Latency curves under load: `parallel` requests are served at once and the
+rest queue (OLLAMA_NUM_PARALLEL), each request being served slows down by
+`contention_ms` per other one, requests beyond `max_queue` waiting get 503
+(OLLAMA_MAX_QUEUE), and during `outages` (seconds since start) connections
+are dropped without a response, as when Ollama is down.
+
+    python -m benchmarks.fake_ollama --port 11435 --latency-ms 800 --per-token-ms 5
+    python -m benchmarks.fake_ollama --latency-ms 300 --parallel 4 --contention-ms 50 --max-queue 8 --outage 30-45
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler
+from typing import Optional, Tuple
+from urllib.parse import quote_plus
+
+from benchmarks.stub_server import start_stub_server
+
+
+@dataclass
+class FakeOllamaConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Simulated prompt evaluation and generation cost, per token.
+    prompt_token_ms: float = 0.0
+    per_token_ms: float = 0.0
+    # Models answered with Ollama's 404 "model not found", to exercise escalation.
+    missing_models: Tuple[str, ...] = ()
+    # Streaming only: chance that a response starts with an unknown property,
+    # and whitespace tokens emitted after the closing brace before done.
+    off_schema_rate: float = 0.0
+    trailing_tokens: int = 0
+    # Load: concurrent requests served (0 = unlimited), slowdown per other
+    # request served, queued requests before 503 (0 = unlimited), and
+    # (start, end) windows in seconds since start when the server is down.
+    parallel: int = 0
+    contention_ms: float = 0.0
+    max_queue: int = 0
+    outages: Tuple[Tuple[float, float], ...] = ()
+
+
+CONFIG = FakeOllamaConfig()
+STATS = {"requests": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0}
+_stats_lock = threading.Lock()
+_load = {"queued": 0, "serving": 0, "started": time.monotonic()}
+_slots: Optional[threading.Semaphore] = None
+# Last prompt evaluated per model, standing in for Ollama's KV cache: only
+# the part after the longest common prefix costs prompt evaluation time.
+_last_prompt = {}
+
+
+def _cached_tokens(payload: dict, full_prompt: str) -> int:
+    if str(payload.get("keep_alive", "5m")) in ("0", "0s", "0m"):
+        _last_prompt.pop(payload.get("model"), None)
+        return 0
+    previous = _last_prompt.get(payload.get("model"), "")
+    _last_prompt[payload.get("model")] = full_prompt
+    common = 0
+    for a, b in zip(previous, full_prompt):
+        if a != b:
+            break
+        common += 1
+    return common // 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _schema_title(schema) -> Optional[str]:
+    if not isinstance(schema, dict):
+        return None
+    if schema.get("type") == "array":
+        return f"array:{_schema_title(schema.get('items'))}"
+    return schema.get("title")
+
+
+def _answer_question(question_html: str) -> dict:
+    name = re.search(r'name="([^"]+)"', question_html)
+    label = re.search(r'class="(?:application-label[^"]*|text)">([^<]+)<', question_html)
+    selector = f'[name="{name.group(1)}"]' if name else "textarea"
+    if "<select" in question_html:
+        return {
+            "action": "select",
+            "question_text": label.group(1) if label else "Select",
+            "query_selector": selector,
+            "value": "No",
+        }
+    if 'type="radio"' in question_html:
+        return {
+            "action": "click",
+            "question_text": label.group(1) if label else "Choose",
+            "query_selector": f'{selector}[value="Yes"]',
+            "value": None,
+        }
+    return {
+        "action": "type",
+        "question_text": label.group(1) if label else "Question",
+        "query_selector": selector,
+        "value": "Jane Doe",
+    }
+
+
+def canned_response(payload: dict):
+    title = _schema_title(payload.get("format"))
+    prompt = payload.get("prompt", "")
+    if title == "JobDetails":
+        return {
+            "title": "Senior Backend Engineer",
+            "location": "Remote - United States",
+            "company": "Acme",
+            "salary": "$160,000 - $195,000 USD",
+            "description": "Design and operate the Python services behind routing and pricing APIs.",
+        }
+    if title == "AgentAction":
+        return _answer_question(prompt)
+    if title == "array:IndexedAgentAction":
+        questions = re.findall(r"^\[(\d+)\]\n(.*?)(?=^\[\d+\]\n|\Z)", prompt, re.M | re.S)
+        return [
+            {**_answer_question(question), "index": int(index)}
+            for index, question in questions
+        ]
+    if title == "array:JobGoogleSearchQuery":
+        queries = [
+            'site:lever.co ("Senior Backend Engineer") (python OR django)',
+            'site:lever.co ("Platform Engineer") (kubernetes OR aws) remote',
+            'site:lever.co ("Staff Software Engineer") (python OR go)',
+        ]
+        return [
+            {
+                "site": "lever",
+                "role_focus": query.split('"')[1],
+                "filters": {},
+                "query": query,
+                "google_search_url": f"https://www.google.com/search?q={quote_plus(query)}",
+            }
+            for query in queries
+        ]
+    return {}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            # Clients drop the connection when they stop reading a stream early.
+            pass
+
+    def _send_json(self, status: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if payload.get("model") in CONFIG.missing_models:
+            error = f"model '{payload['model']}' not found, try pulling it first"
+            self._send_json(404, {"error": error})
+            return
+        if any(start <= time.monotonic() - _load["started"] < end for start, end in CONFIG.outages):
+            with _stats_lock:
+                STATS["dropped"] = STATS.get("dropped", 0) + 1
+            # No response at all: the client sees the connection drop.
+            self.close_connection = True
+            return
+        with _stats_lock:
+            if CONFIG.max_queue and _load["queued"] >= CONFIG.max_queue:
+                STATS["rejected"] = STATS.get("rejected", 0) + 1
+                busy = True
+            else:
+                _load["queued"] += 1
+                busy = False
+        if busy:
+            self._send_json(503, {"error": "server busy, please try again.  maximum pending requests exceeded"})
+            return
+        if _slots is not None:
+            _slots.acquire()
+        with _stats_lock:
+            _load["queued"] -= 1
+            _load["serving"] += 1
+            contention_ms = CONFIG.contention_ms * (_load["serving"] - 1)
+        try:
+            self._generate(payload, contention_ms)
+        finally:
+            with _stats_lock:
+                _load["serving"] -= 1
+            if _slots is not None:
+                _slots.release()
+
+    def _generate(self, payload: dict, contention_ms: float):
+        response = json.dumps(canned_response(payload))
+        if random.random() < CONFIG.off_schema_rate:
+            response = '{"reasoning": "' + "Let me think about this. " * 20 + '"}'
+        # About one token per four characters, plus any trailing whitespace.
+        tokens = [response[i : i + 4] for i in range(0, len(response), 4)]
+        tokens += [" "] * CONFIG.trailing_tokens
+
+        full_prompt = payload.get("system", "") + "\n" + payload.get("prompt", "")
+        with _stats_lock:
+            cached = _cached_tokens(payload, full_prompt)
+            # Like Ollama, only the evaluated (uncached) tokens are reported.
+            prompt_tokens = max(1, estimate_tokens(full_prompt) - cached)
+            STATS["requests"] += 1
+            STATS["prompt_tokens"] += prompt_tokens
+            STATS["cached_prompt_tokens"] += cached
+
+        first_token_ms = (
+            CONFIG.latency_ms
+            + contention_ms
+            + random.uniform(0, CONFIG.jitter_ms)
+            + CONFIG.prompt_token_ms * prompt_tokens
+        )
+        if payload.get("stream", True):
+            self._stream(payload, tokens, first_token_ms, prompt_tokens)
+            return
+
+        delay_ms = first_token_ms + CONFIG.per_token_ms * len(tokens)
+        time.sleep(delay_ms / 1000)
+        self._send_json(
+            200,
+            {
+                "model": payload.get("model"),
+                "response": "".join(tokens),
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": len(tokens),
+                "total_duration": int(delay_ms * 1e6),
+            },
+        )
+
+    def _stream(self, payload: dict, tokens: list, first_token_ms: float, prompt_tokens: int):
+        """NDJSON chunks of one token each, like Ollama's streaming mode."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(first_token_ms / 1000)
+        try:
+            for token in tokens:
+                self._write_chunk({"model": payload.get("model"), "response": token, "done": False})
+                time.sleep(CONFIG.per_token_ms / 1000)
+            self._write_chunk(
+                {
+                    "model": payload.get("model"),
+                    "response": "",
+                    "done": True,
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": len(tokens),
+                }
+            )
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, as a real Ollama would see it.
+            with _stats_lock:
+                STATS["cancelled"] = STATS.get("cancelled", 0) + 1
+            self.close_connection = True
+
+    def _write_chunk(self, data: dict):
+        line = json.dumps(data).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def start_fake_ollama(config: Optional[FakeOllamaConfig] = None, port: int = 0):
+    """Start the fake server; returns (server, base_url). Outage times count from here."""
+    global _slots
+    if config is not None:
+        for field, value in vars(config).items():
+            setattr(CONFIG, field, value)
+    _slots = threading.Semaphore(CONFIG.parallel) if CONFIG.parallel else None
+    _load["started"] = time.monotonic()
+    return start_stub_server(FakeOllamaHandler, port)
+
+
+def _outage(value: str) -> Tuple[float, float]:
+    start, end = value.split("-")
+    return float(start), float(end)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--prompt-token-ms", type=float, default=0.0)
+    parser.add_argument("--per-token-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--missing-models",
+        default="",
+        help="Comma separated models to answer with 404, e.g. qwen3:4b",
+    )
+    parser.add_argument("--off-schema-rate", type=float, default=0.0)
+    parser.add_argument("--trailing-tokens", type=int, default=0)
+    parser.add_argument(
+        "--parallel", type=int, default=0, help="Requests served at once (0 = unlimited)"
+    )
+    parser.add_argument(
+        "--contention-ms", type=float, default=0.0, help="Slowdown per other request served"
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=0, help="Queued requests before 503 (0 = unlimited)"
+    )
+    parser.add_argument(
+        "--outage",
+        type=_outage,
+        action="append",
+        default=[],
+        help="START-END seconds after start when connections are dropped; repeatable",
+    )
+
+
+def config_from_args(args) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        prompt_token_ms=args.prompt_token_ms,
+        per_token_ms=args.per_token_ms,
+        missing_models=tuple(m for m in args.missing_models.split(",") if m),
+        off_schema_rate=args.off_schema_rate,
+        trailing_tokens=args.trailing_tokens,
+        parallel=args.parallel,
+        contention_ms=args.contention_ms,
+        max_queue=args.max_queue,
+        outages=tuple(args.outage),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=11435)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server, url = start_fake_ollama(config_from_args(args), args.port)
+    print(f"Fake Ollama listening on {url}")
+    threading.Event().wait()
@@ -0,0 +1,116 @@
+"""
+Import-time budget for the API process.
+
+Imports `src.web.api` in fresh interpreters with `python -X importtime`,
+reports the cumulative import time (median of --runs) and the slowest
+top-level imports, and exits non-zero when the median exceeds --budget-ms
+or when a processing-tier module (pyppeteer, bs4, tqdm, requests, the
+agent and processor modules) is imported at API startup.
+
+    python -m benchmarks.import_budget --budget-ms 800 --runs 5
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import save_results
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_FORBIDDEN = (
+    "pyppeteer,bs4,tqdm,requests,"
+    "src.agents.lever,src.processors.lever,src.web.lever,src.jobs.lever"
+)
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_times(module: str) -> list:
+    """Return (self_us, cumulative_us, depth, name) for every import."""
+    workdir = tempfile.mkdtemp(prefix="hermes-import-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        DATABASE_URL=f"sqlite:///{Path(workdir) / 'import.db'}",
+        LOG_LEVEL="WARNING",
+        TRACE_EXPORTER="none",
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="src.web.api")
+    parser.add_argument("--budget-ms", type=float, default=800)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports shown")
+    parser.add_argument(
+        "--forbid",
+        default=DEFAULT_FORBIDDEN,
+        help="Comma separated modules that must not be imported ('' allows all)",
+    )
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals_ms = [
+        next(cumulative for _, cumulative, _, name in entries if name == args.module)
+        / 1000
+        for entries in runs
+    ]
+    median_ms = round(statistics.median(totals_ms), 1)
+    last = runs[-1]
+    top = sorted(
+        (entry for entry in last if entry[2] == 1), key=lambda entry: -entry[1]
+    )[: args.top]
+    imported = {name for _, _, _, name in last}
+    forbidden = [
+        name
+        for name in filter(None, args.forbid.split(","))
+        if name in imported
+    ]
+
+    results = {
+        "benchmark": "import_budget",
+        "config": vars(args),
+        "import_ms": median_ms,
+        "runs_ms": totals_ms,
+        "top_imports": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for _, cumulative, _, name in top
+        ],
+        "forbidden_imports": forbidden,
+        "passed": median_ms <= args.budget_ms and not forbidden,
+    }
+    path = save_results("import_budget", results, args.output)
+
+    print(f"import {args.module}: {median_ms} ms (budget {args.budget_ms} ms)")
+    for entry in results["top_imports"]:
+        print(f"  {entry['module']:<32} {entry['cumulative_ms']:>8} ms")
+    if forbidden:
+        print(f"Processing-tier modules imported: {', '.join(forbidden)}")
+    print(f"{'PASS' if results['passed'] else 'FAIL'}; results saved to {path}")
+    sys.exit(0 if results["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Load test that replays the extension flow for many simulated installations.
+
+Each simulated installation runs install -> listings -> status polling ->
+urls -> filler for every page -> job-processed against a live
+`src/web/api.py` server. Processing happens in the API's worker processes,
+with the fake Ollama and the Lever stub behind them. The installation count
+is ramped step by step until the error rate or time-to-ready limits are
+exceeded, to find where the backend falls over.
+
+    python -m benchmarks.load_test --installations 1,5,10,25 --links 10 --poll-interval 1
+"""
+
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.bench_pipeline import PREFERENCES, RESUME
+from benchmarks.common import (
+    latency_summary,
+    peak_rss_mb,
+    prepare_environment,
+    route_lever_to,
+    save_results,
+)
+from benchmarks.fake_ollama import add_arguments, config_from_args, start_fake_ollama
+from benchmarks.stub_server import start_stub_server
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.time_to_ready = []
+        self.timeouts = 0
+        # Listings deferred or rejected by admission control (429/503).
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def request(self, session: requests.Session, method: str, url: str, path: str, body):
+        start = time.perf_counter()
+        try:
+            response = session.request(method, f"{url}{path}", json=body, timeout=60)
+            rejected = response.status_code in (429, 503)
+            failed = response.status_code >= 500 and not rejected
+        except requests.RequestException:
+            response, failed, rejected = None, True, False
+        with self._lock:
+            self.latencies[path].append(time.perf_counter() - start)
+            if failed:
+                self.errors[path] += 1
+            if rejected:
+                self.rejected += 1
+        return response
+
+    @property
+    def total_requests(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def total_errors(self) -> int:
+        return sum(self.errors.values())
+
+
+def simulate_installation(url: str, args, recorder: Recorder):
+    installation_id = f"load-{uuid.uuid4()}"
+    session = requests.Session()
+    started = time.perf_counter()
+
+    recorder.request(
+        session,
+        "POST",
+        url,
+        "/api/install",
+        {"installation_id": installation_id, "resume": RESUME, "preferences": PREFERENCES},
+    )
+    links = [
+        f"https://jobs.lever.co/company-{i % 11}/{uuid.uuid4()}" for i in range(args.links)
+    ]
+    # The extension also forwards the non-Lever results of each SERP page.
+    links += [f"https://www.example.com/careers/{i}" for i in range(args.links // 2)]
+    deadline = time.monotonic() + args.ready_timeout
+    while True:
+        response = recorder.request(
+            session,
+            "POST",
+            url,
+            "/api/listings",
+            {"installation_id": installation_id, "links": links},
+        )
+        if response is None or response.status_code not in (429, 503):
+            break
+        # Like the extension: resend after Retry-After; stored links are skipped.
+        retry_after = float(response.headers.get("Retry-After", args.poll_interval))
+        if time.monotonic() + retry_after > deadline:
+            with recorder._lock:
+                recorder.timeouts += 1
+            return
+        time.sleep(retry_after)
+
+    while True:
+        response = recorder.request(
+            session, "POST", url, "/api/status", {"installation_id": installation_id}
+        )
+        if response is not None and response.status_code == 200:
+            if response.json().get("status") == "ready":
+                break
+        if time.monotonic() > deadline:
+            with recorder._lock:
+                recorder.timeouts += 1
+            return
+        time.sleep(args.poll_interval)
+    with recorder._lock:
+        recorder.time_to_ready.append(time.perf_counter() - started)
+
+    response = recorder.request(
+        session, "POST", url, "/api/urls", {"installation_id": installation_id}
+    )
+    urls = response.json().get("urls", []) if response is not None else []
+    for job_url in urls:
+        body = {"url": job_url, "timestamp": "0", "installation_id": installation_id}
+        recorder.request(session, "POST", url, "/api/filler", {**body, "html": ""})
+        recorder.request(session, "PUT", url, "/api/job-processed", body)
+
+
+def _lock_errors(url: str) -> float:
+    text = requests.get(f"{url}/metrics", timeout=10).text
+    for line in text.splitlines():
+        if line.startswith("hermes_db_lock_errors_total"):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def run_step(url: str, installations: int, args) -> dict:
+    recorder = Recorder()
+    lock_errors_before = _lock_errors(url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=installations) as pool:
+        for _ in range(installations):
+            pool.submit(simulate_installation, url, args, recorder)
+    elapsed = time.perf_counter() - start
+    total = recorder.total_requests
+    return {
+        "installations": installations,
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 1),
+        "jobs_per_minute": round(installations * args.links / elapsed * 60, 1),
+        "error_rate": round(recorder.total_errors / total, 4) if total else 0,
+        "errors": dict(recorder.errors),
+        "ready_timeouts": recorder.timeouts,
+        "listings_rejected": recorder.rejected,
+        "time_to_ready": latency_summary(recorder.time_to_ready),
+        "db_lock_errors": _lock_errors(url) - lock_errors_before,
+        "endpoints": {
+            path: latency_summary(values) for path, values in recorder.latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--installations",
+        default="1,5,10,25",
+        help="Comma separated installation counts to ramp through",
+    )
+    parser.add_argument("--links", type=int, default=10, help="Lever links per installation")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--workers", type=int, default=2, help="API processing workers")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", help="Results file (default benchmarks/results/)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    _, ollama_url = start_fake_ollama(config_from_args(args))
+    _, stub_url = start_stub_server()
+    workdir = prepare_environment(ollama_url)
+
+    from werkzeug.serving import make_server
+
+    from src.jobs.scheduler import FairScheduler
+    from src.jobs.worker import create_worker_pool
+    from src.web import api
+
+    route_lever_to(stub_url)
+    # Fork so the workers inherit the stub routing set up above.
+    api.SCHEDULER = FairScheduler(
+        create_worker_pool(args.workers, mp_context=multiprocessing.get_context("fork")),
+        max_in_flight=args.workers,
+        on_result=api._merge_worker_metrics,
+    )
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    steps = []
+    breaking_point = None
+    for installations in [int(n) for n in args.installations.split(",")]:
+        step = run_step(url, installations, args)
+        steps.append(step)
+        print(
+            f"{installations:>4} installations: {step['requests_per_s']:>7} req/s, "
+            f"{step['jobs_per_minute']:>7} jobs/min, error rate {step['error_rate']:.2%}, "
+            f"ready p95 {step['time_to_ready']['p95_ms']} ms, "
+            f"timeouts {step['ready_timeouts']}, lock errors {step['db_lock_errors']:.0f}"
+        )
+        if step["error_rate"] > args.max_error_rate or step["ready_timeouts"]:
+            breaking_point = installations
+            break
+
+    server.shutdown()
+    api.SCHEDULER.shutdown()
+    results = {
+        "benchmark": "load_test",
+        "config": vars(args),
+        "workdir": workdir,
+        "steps": steps,
+        "breaking_point": breaking_point,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    path = save_results("load_test", results, args.output)
+    if breaking_point:
+        print(f"Backend fell over at {breaking_point} installations")
+    print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Local stand-in for jobs.lever.co that serves the recorded fixtures.
+
+    GET /<company>/<posting_id>         posting page (fixtures/lever_posting.html)
+    GET /<company>/<posting_id>/apply   application form (fixtures/lever_apply.html)
+    GET /v0/postings/<company>          postings API JSON (fixtures/lever_postings.json)
+
+Point LEVER_API_URL at <url>/v0/postings to ingest from it.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def render_fixture(name: str, company: str, posting_id: str) -> str:
+    html = (FIXTURES_DIR / name).read_text(encoding="utf-8")
+    return (
+        html.replace("{company_name}", company.replace("-", " ").title())
+        .replace("{company}", company)
+        .replace("{posting_id}", posting_id)
+    )
+
+
+class LeverStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "text/html"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) == 3 and parts[:2] == ["v0", "postings"]:
+            body = render_fixture("lever_postings.json", parts[2], "")
+            self._send(200, body, "application/json")
+        elif len(parts) == 2:
+            self._send(200, render_fixture("lever_posting.html", *parts))
+        elif len(parts) == 3 and parts[2] == "apply":
+            self._send(200, render_fixture("lever_apply.html", parts[0], parts[1]))
+        else:
+            self._send(404, "Not found")
+
+
+def start_stub_server(handler=LeverStubHandler, port: int = 0):
+    """Start `handler` on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    server, url = start_stub_server(port=8090)
+    print(f"Serving Lever fixtures on {url}")
+    threading.Event().wait()
@@ -210,6 +210,32 @@ async function processNextUrl() {
 
 }
 
+// Post links to /api/listings. When the server is overloaded (503) or the
+// installation's queue is full (429), wait for Retry-After and resend; links
+// already stored are skipped by the server.
+const LISTINGS_MAX_ATTEMPTS = 5;
+
+async function postListings(links) {
+    for (let attempt = 1; ; attempt++) {
+        const response = await fetch(`${API_BASE_URL}/api/listings`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                installation_id: jobSearchState.installationId,
+                links: links
+            })
+        });
+        if ((response.status !== 429 && response.status !== 503) || attempt >= LISTINGS_MAX_ATTEMPTS) {
+            return response;
+        }
+        const retryAfter = parseInt(response.headers.get('Retry-After') || '30', 10);
+        console.log(`Listings deferred by server, retrying in ${retryAfter}s`);
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+    }
+}
+
 // Handle links extracted from a Google search page
 async function handleLinksExtracted(links, tabId, submitLinks) {
     console.log(`Received ${links.length} links from tab ${tabId}`);
@@ -224,16 +250,7 @@ async function handleLinksExtracted(links, tabId, submitLinks) {
     }
     try {
         // Send links to /api/listings
-        const response = await fetch(`${API_BASE_URL}/api/listings`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                installation_id: jobSearchState.installationId,
-                links: allLinks
-            })
-        });
+        const response = await postListings(allLinks);
 
         if (!response.ok) {
             throw new Error(`Server responded with status: ${response.status}`);
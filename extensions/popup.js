@@ -22,7 +22,7 @@
                 disableForm();
             } else if (statusData.status === 'ready') {
                 await chrome.storage.local.set({jobsReady: true});
-                showJobsReadyUI(statusData.job_count);
+                showJobsReadyUI(statusData.job_count, statusData.processing);
                 await chrome.storage.local.remove(['isProcessing']);
             } else if (statusData.status === 'google') {
                 disableForm()
@@ -91,7 +91,7 @@
                 // Jobs are ready
                 const result = await response.json();
                 await chrome.storage.local.set({jobsReady: true});
-                showJobsReadyUI(result.job_count);
+                showJobsReadyUI(result.job_count, result.processing);
                 await chrome.storage.local.remove(['isProcessing']);
             } else if (response.status === 202) {
                 // Still processing
@@ -106,14 +106,15 @@
     }
 
     // Show UI when jobs are ready
-    function showJobsReadyUI(jobCount) {
+    function showJobsReadyUI(jobCount, processing) {
         const applyBtn = document.getElementById('applyBtn');
         if (applyBtn) {
             applyBtn.style.display = 'block';
             applyBtn.addEventListener('click', handleStartApplying);
         }
         disableForm();
-        showStatus('success', 'Jobs Ready!', `${jobCount} job applications are ready. Click "Start Applying" to begin.`);
+        const more = processing ? ` ${processing} more are still being prepared.` : '';
+        showStatus('success', 'Jobs Ready!', `${jobCount} job applications are ready.${more} Click "Start Applying" to begin.`);
     }
 
     // Handle start applying button click
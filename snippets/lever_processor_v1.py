@@ -7,7 +7,6 @@ from src.agents.lever import LeverAgent
 from src.config.logger import get_logger
 from src.db.model import (
     ApplicationActions,
-    ApplicationQuestions,
     JobAnalysis,
     SessionLocal,
 )
@@ -99,8 +98,8 @@ class LeverAutoApply:
     def _retrieve_job_postings(self) -> List[dict]:
         with SessionLocal() as session:
             subquery = (
-                session.query(ApplicationQuestions)
-                .filter(ApplicationQuestions.job_analysis_id == JobAnalysis.id)
+                session.query(ApplicationActions)
+                .filter(ApplicationActions.job_analysis_id == JobAnalysis.id)
                 .exists()
             )
             query = session.query(JobAnalysis).filter(
@@ -125,21 +124,21 @@ class LeverAutoApply:
             ]
 
     @staticmethod
-    def _retrieve_job_questions(job_id: int) -> List[dict]:
+    def _retrieve_job_actions(job_id: int) -> List[dict]:
+        """The job's stored answers, in the form `LeverAutoBrowser.fill_form` takes."""
         with SessionLocal() as session:
-            query = session.query(ApplicationQuestions).filter(
-                ApplicationQuestions.job_analysis_id == job_id
+            records = (
+                session.query(ApplicationActions)
+                .filter(ApplicationActions.job_analysis_id == job_id)
+                .order_by(ApplicationActions.id)
+                .all()
             )
-            records = query.all()
             return [
                 {
-                    "id": record.id,
-                    "job_analysis_id": record.job_analysis_id,
-                    "question_html": record.question_html,
+                    "action": record.action,
+                    "query_selector": record.query_selector,
+                    "value": record.answer_text,
                     "question_text": record.question_text,
-                    "answer_text": record.answer_text,
-                    "answer_execution_code": record.answer_execution_code,
-                    "created_at": record.created_at,
                 }
                 for record in records
             ]
@@ -157,9 +156,9 @@ class LeverAutoApply:
         await browser.create_browser()
         for job_posting in job_postings:
             try:
-                questions = self._retrieve_job_questions(job_posting["id"])
+                actions = self._retrieve_job_actions(job_posting["id"])
                 self._logger.info(
-                    f"Found {len(questions)} questions for job [{job_posting['id']}]: [{job_posting['title']}]"
+                    f"Found {len(actions)} answers for job [{job_posting['id']}]: [{job_posting['title']}]"
                 )
                 link = job_posting["link"]
 
@@ -168,7 +167,7 @@ class LeverAutoApply:
                     await browser.new_page(apply_link)
                     apply_link = f"{apply_link}/apply"
                 pyperclip.copy(job_posting["cover_letter"])
-                await browser.auto_apply(apply_link, questions)
+                await browser.auto_apply(apply_link, actions)
                 print(
                     "\n-----------------------------------------------------------------------------\n"
                 )
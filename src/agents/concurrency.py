@@ -0,0 +1,319 @@
+"""
+Adaptive concurrency limits and circuit breaking for processing stages.
+
+`AIMDLimiter` bounds how many requests a stage (Ollama calls, browser form
+extraction) has in flight. It adds one slot per window of requests while
+latency stays near the stage's recent best, and halves the limit when
+latency goes past `tolerance` times that or a request times out or is
+refused. No fixed number is right for every machine: too few requests idle
+the GPU, and too many queue inside Ollama until they hit the client timeout.
+Each worker process adapts on its own, and like TCP senders they converge
+on a share of the endpoint's capacity.
+
+`CircuitBreaker` opens after consecutive failures. While it is open,
+callers wait for it to let a probe through instead of failing one by one.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Deque, Dict, Optional
+
+from src.config.logger import get_logger
+from src.telemetry.metrics import REGISTRY
+
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "hermes_concurrency_limit",
+    "Current adaptive concurrency limit of each stage.",
+    ["stage"],
+)
+CONCURRENCY_IN_FLIGHT = REGISTRY.gauge(
+    "hermes_concurrency_in_flight",
+    "Requests a stage has in flight.",
+    ["stage"],
+)
+CONCURRENCY_WAIT_SECONDS = REGISTRY.histogram(
+    "hermes_concurrency_wait_seconds",
+    "Time a request waited for a stage's concurrency slot.",
+    ["stage"],
+)
+CONCURRENCY_DECREASES = REGISTRY.counter(
+    "hermes_concurrency_decreases_total",
+    "Times a stage's concurrency limit was cut, by reason.",
+    ["stage", "reason"],
+)
+CIRCUIT_STATE = REGISTRY.gauge(
+    "hermes_circuit_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["name"],
+)
+CIRCUIT_OPENED = REGISTRY.counter(
+    "hermes_circuit_opened_total",
+    "Times a circuit breaker opened.",
+    ["name"],
+)
+
+logger = get_logger(__name__)
+
+
+class _Waiter:
+    """A caller queued for a slot, woken by the thread that frees one."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.granted = False
+        self.abandoned = False
+        if loop is None:
+            self._event = threading.Event()
+        else:
+            self._future = loop.create_future()
+
+    def wake(self):
+        self.granted = True
+        if self.loop is None:
+            self._event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+    def wait(self):
+        self._event.wait()
+
+    async def wait_async(self):
+        await self._future
+
+
+class AIMDLimiter:
+    """
+    Additive-increase, multiplicative-decrease concurrency limit, shared by
+    threads and coroutines. Slots are handed out in arrival order.
+
+    Example:
+        limiter = AIMDLimiter("llm", initial=2, minimum=1, maximum=8)
+        with limiter.slot(task):
+            call_ollama()
+
+    Args:
+        stage: Metric label
+        initial, minimum, maximum: Bounds of the limit
+        tolerance: Latency over this multiple of the key's recent minimum
+            counts as congestion
+        backoff: Factor the limit is multiplied by on congestion
+        is_overload: Whether an exception means the stage is overloaded
+            (timeouts, refused requests); other exceptions leave the limit
+            as it is
+        window: Latency samples per key the baseline is the minimum of
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        tolerance: float = 2.0,
+        backoff: float = 0.5,
+        is_overload: Optional[Callable[[BaseException], bool]] = None,
+        window: int = 50,
+    ):
+        self.stage = stage
+        self._minimum = max(1, minimum)
+        self._maximum = max(self._minimum, maximum)
+        self._limit = float(min(max(initial, self._minimum), self._maximum))
+        self._tolerance = tolerance
+        self._backoff = backoff
+        self._is_overload = is_overload or (lambda error: False)
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        # Requests started before the last cut do not cut again.
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+        CONCURRENCY_LIMIT.set(self.limit, stage=stage)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _try_acquire(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                CONCURRENCY_IN_FLIGHT.set(self._in_flight, stage=self.stage)
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def _grant(self):
+        """Hand free slots to waiters, oldest first. Call with the lock held."""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.abandoned:
+                continue
+            self._in_flight += 1
+            waiter.wake()
+        CONCURRENCY_IN_FLIGHT.set(self._in_flight, stage=self.stage)
+
+    def _release(self, key: str, started: float, latency: float, error: Optional[BaseException]):
+        """`latency` is per unit of cost, so requests of one key compare evenly."""
+        with self._lock:
+            self._in_flight -= 1
+            overload = error is not None and self._is_overload(error)
+            samples = self._samples.setdefault(key, deque(maxlen=self._window))
+            congested = (
+                error is None
+                and len(samples) >= 3
+                and latency > self._tolerance * min(samples)
+            )
+            if error is None:
+                samples.append(latency)
+            if overload or congested:
+                if started > self._last_decrease:
+                    self._last_decrease = time.monotonic()
+                    self._limit = max(self._minimum, math.floor(self._limit * self._backoff))
+                    reason = "overload" if overload else "latency"
+                    CONCURRENCY_DECREASES.inc(stage=self.stage, reason=reason)
+                    logger.info(
+                        "Cutting concurrency limit",
+                        extra={"stage": self.stage, "limit": self.limit, "reason": reason},
+                    )
+            elif error is None and self._in_flight + 1 >= self.limit:
+                # Only grow when the limit was what held requests back.
+                self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            CONCURRENCY_LIMIT.set(self.limit, stage=self.stage)
+            self._grant()
+
+    @contextmanager
+    def slot(self, key: str = "", cost: float = 1.0):
+        """
+        Hold one slot for the enclosed request. `key` groups comparable
+        requests; their latency is compared per unit of `cost` (e.g. the
+        questions of a batched request).
+        """
+        waiter = _Waiter()
+        queued = time.perf_counter()
+        if not self._try_acquire(waiter):
+            waiter.wait()
+        CONCURRENCY_WAIT_SECONDS.observe(time.perf_counter() - queued, stage=self.stage)
+        started, start = time.monotonic(), time.perf_counter()
+        cost = max(cost, 1.0)
+        try:
+            yield
+        except BaseException as e:
+            self._release(key, started, (time.perf_counter() - start) / cost, e)
+            raise
+        self._release(key, started, (time.perf_counter() - start) / cost, None)
+
+    @asynccontextmanager
+    async def async_slot(self, key: str = ""):
+        """`slot()` for coroutines; waiting does not block the event loop."""
+        waiter = _Waiter(asyncio.get_running_loop())
+        queued = time.perf_counter()
+        if not self._try_acquire(waiter):
+            try:
+                await waiter.wait_async()
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiter.abandoned = True
+                    if waiter.granted:
+                        self._in_flight -= 1
+                        self._grant()
+                raise
+        CONCURRENCY_WAIT_SECONDS.observe(time.perf_counter() - queued, stage=self.stage)
+        started, start = time.monotonic(), time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self._release(key, started, time.perf_counter() - start, e)
+            raise
+        self._release(key, started, time.perf_counter() - start, None)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a circuit stayed open for longer than a caller may wait."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures. After `reset_s` it lets one
+    probe through (half-open): success closes it, failure opens it again.
+
+    Example:
+        breaker = CircuitBreaker("ollama http://localhost:11434")
+        if breaker.available():
+            breaker.begin()
+            ...
+            breaker.success()  # or breaker.failure()
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failures: int = 5, reset_s: float = 15.0):
+        self.name = name
+        self._threshold = failures
+        self._reset_s = reset_s
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(self.CLOSED, name=name)
+
+    @property
+    def is_open(self) -> bool:
+        return self._state != self.CLOSED
+
+    def ready_at(self) -> float:
+        """Monotonic time a request may next be let through."""
+        if self._state == self.CLOSED:
+            return 0.0
+        return self._opened_at + self._reset_s
+
+    def available(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            return not self._probing and time.monotonic() >= self.ready_at()
+
+    def begin(self):
+        """Mark a request as sent; while open it is the probe."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                self._probing = True
+                self._set_state(self.HALF_OPEN)
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != self.CLOSED:
+                logger.info("Circuit closed", extra={"circuit": self.name})
+                self._set_state(self.CLOSED)
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state != self.CLOSED or self._failures >= self._threshold:
+                if self._state == self.CLOSED:
+                    CIRCUIT_OPENED.inc(name=self.name)
+                    logger.warning(
+                        "Circuit opened", extra={"circuit": self.name, "failures": self._failures}
+                    )
+                self._probing = False
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def _set_state(self, state: int):
+        self._state = state
+        CIRCUIT_STATE.set(state, name=self.name)
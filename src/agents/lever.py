@@ -1,20 +1,54 @@
+import hashlib
 import json
+import logging
 import time
 from typing import List, Literal, Optional
 
-import requests
-
-from src.config.logger import get_logger
+from src.config.logger import get_logger, get_sampled_logger
 from src.config.prompts import (
+    FILLER_AGENT_BATCH_INSTRUCTIONS,
     FILLER_AGENT_SYSTEM_PROMPT,
     GOOGLE_SEARCH_PROMPT,
     JOB_ANALYSIS_SYSTEM_PROMPT,
 )
-from src.models.agents import AgentAction, JobDetails, JobGoogleSearchQuery
+from src.agents.prompt_builder import PromptBuilder, count_tokens
+from src.agents.router import ModelRouter, models_for, record_usage
+from src.agents.streaming import (
+    LLM_STREAM_STOPS,
+    LLM_TIME_TO_RESULT,
+    GENERATED_LENGTHS,
+    LLM_TOKENS_SAVED,
+    RESPONSE_LENGTHS,
+    ResponseLengths,
+    JsonStreamScanner,
+    OffSchemaOutput,
+    read_stream,
+    timed_lines,
+)
+from src.models.agents import (
+    AgentAction,
+    IndexedAgentAction,
+    JobDetails,
+    JobGoogleSearchQuery,
+)
 from src.models.api import InstallRequest
+from src.processors.utils import get_http_session
+from src.telemetry.metrics import timed
+from src.telemetry.tracing import set_attribute
 from pathlib import Path
 import os
 
+# Stream responses, stop reading once the JSON document is complete and abort
+# as soon as it leaves the schema.
+OLLAMA_STREAM = os.getenv("OLLAMA_STREAM", "true").lower() in ("1", "true", "yes")
+# Same-model retries after an off-schema abort, before escalating.
+OLLAMA_STREAM_RETRIES = int(os.getenv("OLLAMA_STREAM_RETRIES", "1"))
+# Seconds to wait for Ollama to connect and for each read.
+OLLAMA_TIMEOUT_S = float(os.getenv("OLLAMA_TIMEOUT_S", "120"))
+# How long Ollama keeps a model (and its prompt cache) loaded after a request.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+
 def use_cached_google_searches(
     env_var: str = "USE_CACHED_GOOGLE_SEARCHES",
     cache_path: Path | None = None,
@@ -57,44 +91,153 @@ def use_cached_google_searches(
     return decorator
 
 
+def _schema_name(payload: dict) -> str:
+    schema = payload.get("format") or {}
+    if schema.get("type") == "array":
+        return f"array:{(schema.get('items') or {}).get('title')}"
+    return str(schema.get("title"))
+
+
 class LeverAgent:
-    def __init__(self):
-        models = ["gpt-oss:20b", "gemma3:12b", "qwen3:14b"]
-        self._model_name = models[2]
+    def __init__(self, router: Optional[ModelRouter] = None):
+        self._router = router or ModelRouter()
         self._logger = get_logger(__name__)
-        self._log_response = True
+        self._response_logger = get_sampled_logger(f"{__name__}.responses")
+
+    def _call_ollama(self, endpoint: str, payload) -> str:
+        if payload.get("stream"):
+            for attempt in range(OLLAMA_STREAM_RETRIES + 1):
+                try:
+                    return self._stream_ollama(endpoint, payload)
+                except OffSchemaOutput as e:
+                    if attempt == OLLAMA_STREAM_RETRIES:
+                        raise
+                    self._logger.info(
+                        "Retrying off-schema response",
+                        extra={"model": payload.get("model"), "error": str(e)},
+                    )
 
-    def _call_ollama(self, payload) -> str:
         start_time = time.time()
-        self._logger.info("Starting Ollama API request")
-        resp = requests.post(
-            "http://localhost:11434/api/generate", data=json.dumps(payload), timeout=120
+        self._logger.debug("Starting Ollama API request")
+        resp = get_http_session().post(
+            f"{endpoint}/api/generate", data=json.dumps(payload), timeout=OLLAMA_TIMEOUT_S
         )
         resp.raise_for_status()
         data = resp.json()
-        self._logger.info(
-            f"Ollama API request completed in {time.time() - start_time:.2f}s"
-        )
         raw = data.get("response", "").strip()
-        if self._log_response:
-            self._logger.info("--------------- Ollama API response ---------------")
-            self._logger.info(raw)
-            self._logger.info("---------------------------------------------------")
+        LLM_TIME_TO_RESULT.observe(
+            time.time() - start_time, model=payload.get("model"), mode="blocking"
+        )
+        if data.get("eval_count"):
+            for lengths in (RESPONSE_LENGTHS, GENERATED_LENGTHS):
+                lengths.record(
+                    payload.get("model"), _schema_name(payload), data["eval_count"]
+                )
+        self._log_response(payload, data, start_time, raw)
+        return raw
+
+    def _stream_ollama(self, endpoint: str, payload) -> str:
+        """
+        Stream a generate call and return the JSON document as soon as it is
+        complete. Closing the response early makes Ollama stop generating.
+        """
+        start_time = time.time()
+        model = payload.get("model")
+        schema = _schema_name(payload)
+        scanner = JsonStreamScanner(payload.get("format"))
+        self._logger.debug("Starting streaming Ollama API request")
+        with get_http_session().post(
+            f"{endpoint}/api/generate",
+            data=json.dumps(payload),
+            stream=True,
+            timeout=OLLAMA_TIMEOUT_S,
+        ) as resp:
+            resp.raise_for_status()
+            try:
+                result = read_stream(
+                    timed_lines(resp.iter_lines(), model, start_time), scanner
+                )
+            except OffSchemaOutput:
+                LLM_STREAM_STOPS.inc(model=model, reason="off_schema")
+                self._record_savings(model, schema, "off_schema", scanner.chunks)
+                raise
+
+        LLM_TIME_TO_RESULT.observe(time.time() - start_time, model=model, mode="stream")
+        final = result["final"] or {}
+        LLM_STREAM_STOPS.inc(
+            model=model, reason="complete" if result["early"] else "done"
+        )
+        RESPONSE_LENGTHS.record(model, schema, final.get("eval_count") or scanner.chunks)
+        if result["early"]:
+            self._record_savings(
+                model, schema, "complete", scanner.chunks, GENERATED_LENGTHS
+            )
+        elif final.get("eval_count"):
+            GENERATED_LENGTHS.record(model, schema, final["eval_count"])
+        raw = result["response"]
+        self._log_response(
+            payload,
+            {
+                # Ollama only reports prompt tokens in the done chunk.
+                "prompt_eval_count": final.get("prompt_eval_count")
+                or count_tokens(payload.get("system", "") + payload.get("prompt", "")),
+                "eval_count": final.get("eval_count") or scanner.chunks,
+            },
+            start_time,
+            raw,
+        )
         return raw
 
+    @staticmethod
+    def _record_savings(
+        model: str,
+        schema: str,
+        reason: str,
+        received: int,
+        lengths: ResponseLengths = RESPONSE_LENGTHS,
+    ):
+        # Estimated against the typical length of a response in `lengths`.
+        expected = lengths.expected(model, schema)
+        if expected and expected > received:
+            LLM_TOKENS_SAVED.inc(expected - received, model=model, reason=reason)
+
+    def _log_response(self, payload, data: dict, start_time: float, raw: str):
+        record_usage(data.get("prompt_eval_count"), data.get("eval_count"))
+        set_attribute("llm.model", payload.get("model"))
+        set_attribute("llm.prompt_tokens", data.get("prompt_eval_count"))
+        set_attribute("llm.response_tokens", data.get("eval_count"))
+        self._logger.debug(
+            "Ollama API request completed",
+            extra={
+                "model": payload.get("model"),
+                "duration_s": round(time.time() - start_time, 3),
+                "prompt_tokens": data.get("prompt_eval_count"),
+                "response_tokens": data.get("eval_count"),
+            },
+        )
+        if self._response_logger.isEnabledFor(logging.DEBUG):
+            self._response_logger.debug(
+                "Ollama API response", extra={"response": raw}
+            )
+
     @use_cached_google_searches()
     def generate_google_searches(
         self, payload: InstallRequest
     ) -> List[JobGoogleSearchQuery]:
+        built = (
+            PromptBuilder("search_queries", models_for("search_queries"))
+            .add("preferences", payload.preferences, priority=3, share=0.25)
+            .add("resume", payload.resume, priority=2, share=0.7)
+            .build(fixed=GOOGLE_SEARCH_PROMPT)
+        )
         prompt = (
             "Resume text:\n\n"
-            f"{payload.resume}\n\n"
+            f"{built.sections['resume']}\n\n"
             "Preferences:\n\n"
-            f"{payload.preferences}\n\n"
+            f"{built.sections['preferences']}\n\n"
         )
 
         payload = {
-            "model": self._model_name,
             "prompt": prompt,
             "system": GOOGLE_SEARCH_PROMPT,
             "format": {
@@ -102,56 +245,207 @@ class LeverAgent:
                 "items": JobGoogleSearchQuery.model_json_schema(mode="serialization"),
             },
             # instruct Ollama to return JSON matching schema
-            "stream": False,
+            "stream": OLLAMA_STREAM,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": 0.0,
+                "num_ctx": built.num_ctx,
             },
         }
-        raw = self._call_ollama(payload)
-        json_raw = json.loads(raw)
-        return [JobGoogleSearchQuery.model_validate(r) for r in json_raw]
+        with timed("generate_google_searches"):
+            return self._router.run(
+                "search_queries",
+                payload,
+                self._call_ollama,
+                lambda raw: [
+                    JobGoogleSearchQuery.model_validate(r) for r in json.loads(raw)
+                ],
+            )
 
     def generate_job_info(self, page_text: str) -> JobDetails:
-        prompt = f"Analyze the page below:\n{page_text}"
+        built = (
+            PromptBuilder("job_info", models_for("job_info"))
+            .add("page_text", page_text, priority=1, share=1.0)
+            .build(fixed=JOB_ANALYSIS_SYSTEM_PROMPT)
+        )
+        prompt = f"Analyze the page below:\n{built.sections['page_text']}"
 
         payload = {
-            "model": self._model_name,
             "prompt": prompt,
             "system": JOB_ANALYSIS_SYSTEM_PROMPT,
             "format": JobDetails.model_json_schema(),  # instruct Ollama to return JSON matching schema
-            "stream": False,
+            "stream": OLLAMA_STREAM,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": 0.0,
+                "num_ctx": built.num_ctx,
             },
         }
 
-        raw = self._call_ollama(payload)
-        return JobDetails.model_validate_json(raw)
+        with timed("generate_job_info"):
+            return self._router.run(
+                "job_info", payload, self._call_ollama, JobDetails.model_validate_json
+            )
+
+    @staticmethod
+    def _filler_prompt(
+        task: str,
+        questions: str,
+        job_description: str,
+        resume: str,
+        preferences: str,
+        reserve: int = 1024,
+        system_prompt: Optional[str] = None,
+    ):
+        """
+        Build the system prompt and prompt for answering form questions.
+
+        Everything that stays the same for one posting comes first (system
+        prompt with resume and preferences, then the job description), so that
+        consecutive calls only differ after it and Ollama can reuse the
+        evaluated prefix from its KV cache. Each section is capped at its
+        token budget for the task's models, the same way on every call for a
+        posting; when the prompt is still too long, the questions are trimmed
+        first so the prefix stays byte-identical. A pre-rendered
+        `system_prompt` (from the installation profile) is used as is instead
+        of formatting the resume and preferences into the template.
+
+        Returns:
+            (system prompt, prompt, affinity key for endpoint routing, num_ctx)
+        """
+        builder = PromptBuilder(task, models_for(task))
+        builder.add("questions", questions, priority=1, share=1.0)
+        if system_prompt is None:
+            builder.add("preferences", preferences, priority=4, share=0.1)
+            builder.add("resume", resume, priority=3, share=0.25)
+        builder.add("job_description", job_description, priority=2, share=0.4)
+        built = builder.build(
+            fixed=system_prompt
+            or FILLER_AGENT_SYSTEM_PROMPT.format(resume="", preferences=""),
+            reserve=reserve,
+        )
+        if system_prompt is None:
+            system_prompt = FILLER_AGENT_SYSTEM_PROMPT.format(
+                resume=built.sections["resume"],
+                preferences=built.sections["preferences"],
+            )
+        prefix = "Job Description:\n\n" f"{built.sections['job_description']}\n\n"
+        key = hashlib.sha1((system_prompt + prefix).encode("utf-8")).hexdigest()
+        return system_prompt, prefix + built.sections["questions"], key, built.num_ctx
 
     def generate_action(
-        self, question_html: str, job_description: str, resume: str, preferences: str
+        self,
+        question_html: str,
+        job_description: str,
+        resume: str,
+        preferences: str,
+        system_prompt: Optional[str] = None,
     ) -> AgentAction:
-        prompt = (
-            "Question HTML:\n\n"
-            f"{question_html}\n\n"
-            "Job Description:\n\n"
-            f"{job_description}\n\n"
+        # Free-text answers (cover letters, "why us") go straight to the large
+        # model; short fields, selects and checkboxes start on the small one.
+        task = "free_text_answer" if "<textarea" in question_html else "field_answer"
+        system_prompt, prompt, affinity, num_ctx = self._filler_prompt(
+            task,
+            "Question HTML:\n\n" f"{question_html}\n\n",
+            job_description,
+            resume,
+            preferences,
+            system_prompt=system_prompt,
         )
 
-        system_prompt = FILLER_AGENT_SYSTEM_PROMPT.format(
-            resume=resume, preferences=preferences
+        payload = {
+            "prompt": prompt,
+            "system": system_prompt,
+            "format": AgentAction.model_json_schema(),  # instruct Ollama to return JSON matching schema
+            "stream": OLLAMA_STREAM,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": 0.0,
+                "num_ctx": num_ctx,
+            },
+        }
+
+        with timed("generate_action", task=task):
+            return self._router.run(
+                task,
+                payload,
+                self._call_ollama,
+                AgentAction.model_validate_json,
+                affinity=affinity,
+            )
+
+    def generate_actions(
+        self,
+        questions_html: List[str],
+        job_description: str,
+        resume: str,
+        preferences: str,
+        system_prompt: Optional[str] = None,
+    ) -> List[Optional[AgentAction]]:
+        """
+        Answer all questions of a form in one call, so the resume, preferences
+        and job description are sent once instead of once per question.
+
+        Returns:
+            One entry per question, in order; None where the model's item was
+            missing or failed validation, so the caller can retry it alone
+        """
+        has_free_text = any("<textarea" in question for question in questions_html)
+        task = "free_text_answer" if has_free_text else "field_answer"
+        questions = "".join(
+            f"[{index}]\n{question_html}\n\n"
+            for index, question_html in enumerate(questions_html)
+        )
+        system_prompt, prompt, affinity, num_ctx = self._filler_prompt(
+            task,
+            FILLER_AGENT_BATCH_INSTRUCTIONS + "Questions:\n\n" + questions,
+            job_description,
+            resume,
+            preferences,
+            # Room for one action per question.
+            reserve=max(1024, 96 * len(questions_html)),
+            system_prompt=system_prompt,
         )
 
         payload = {
-            "model": self._model_name,
             "prompt": prompt,
             "system": system_prompt,
-            "format": AgentAction.model_json_schema(),  # instruct Ollama to return JSON matching schema
-            "stream": False,
+            "format": {
+                "type": "array",
+                "items": IndexedAgentAction.model_json_schema(),
+            },
+            "stream": OLLAMA_STREAM,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": 0.0,
+                "num_ctx": num_ctx,
             },
         }
 
-        raw = self._call_ollama(payload)
-        return AgentAction.model_validate_json(raw)
+        def parse(raw: str) -> List[Optional[AgentAction]]:
+            items = json.loads(raw)
+            if not isinstance(items, list):
+                raise ValueError("expected a JSON array of actions")
+            actions: List[Optional[AgentAction]] = [None] * len(questions_html)
+            for item in items:
+                try:
+                    indexed = IndexedAgentAction.model_validate(item)
+                except ValueError:
+                    continue
+                if 0 <= indexed.index < len(actions) and actions[indexed.index] is None:
+                    actions[indexed.index] = AgentAction.model_validate(
+                        indexed.model_dump(exclude={"index"})
+                    )
+            if not any(actions):
+                raise ValueError("no valid actions in batched response")
+            return actions
+
+        with timed("generate_actions", task=task, questions=len(questions_html)):
+            return self._router.run(
+                task,
+                payload,
+                self._call_ollama,
+                parse,
+                affinity=affinity,
+                batch_size=len(questions_html),
+            )
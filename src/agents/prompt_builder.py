@@ -0,0 +1,198 @@
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from src.config.logger import get_logger
+from src.telemetry.metrics import REGISTRY
+
+# Context window requested from Ollama (options.num_ctx). Ollama's own
+# default is small and silently drops the start of longer prompts.
+DEFAULT_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+# Tokens kept free for the response.
+RESPONSE_RESERVE = int(os.getenv("PROMPT_RESPONSE_RESERVE", "1024"))
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+
+PROMPT_SECTION_TOKENS = REGISTRY.histogram(
+    "hermes_prompt_section_tokens",
+    "Tokens per prompt section after trimming.",
+    ["task", "section"],
+    buckets=(64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, float("inf")),
+)
+PROMPT_TRIMMED = REGISTRY.counter(
+    "hermes_prompt_trimmed_total",
+    "Prompt sections cut to fit their token budget.",
+    ["task", "section"],
+)
+
+_logger = get_logger(__name__)
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception:
+        # Not installed, or the encoding file cannot be downloaded offline.
+        _logger.info("tiktoken unavailable, estimating token counts")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count from tiktoken when available, else a word/punctuation estimate."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # BPE vocabularies split long words; punctuation-heavy HTML is close to
+    # one token per match.
+    return sum(1 + len(match) // 8 for match in _WORD_PATTERN.findall(text))
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines, which cost tokens for nothing."""
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the start of `text` within `max_tokens`."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def num_ctx_for(model: str) -> int:
+    """``OLLAMA_NUM_CTX_<MODEL>`` (e.g. ``OLLAMA_NUM_CTX_QWEN3_14B``) or the default."""
+    key = re.sub(r"[^A-Za-z0-9]+", "_", model).upper()
+    return int(os.getenv(f"OLLAMA_NUM_CTX_{key}", DEFAULT_NUM_CTX))
+
+
+@dataclass
+class Section:
+    name: str
+    text: str
+    # Higher priority sections are trimmed last.
+    priority: int
+    # Share of the prompt tokens (window less the default response reserve)
+    # this section may always use.
+    share: float
+    tokens: int = 0
+    trimmed: bool = False
+
+
+@dataclass
+class BuiltPrompt:
+    sections: Dict[str, str]
+    tokens: Dict[str, int]
+    num_ctx: int
+    trimmed: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+
+class PromptBuilder:
+    """
+    Fits prompt sections into a model's context window.
+
+    Every section is whitespace-collapsed and capped at its share of the
+    window, so sections that stay the same across calls (resume, job
+    description) are cut the same way each time and keep a stable prompt
+    prefix. Caps do not depend on a call's `reserve`. If the prompt still
+    does not fit, sections are cut further from the lowest priority up, so
+    the sections that vary per call should have the lowest priority.
+
+        builder = PromptBuilder("generate_action", models)
+        builder.add("resume", resume, priority=2, share=0.25)
+        prompt = builder.build(fixed="...instructions...")
+    """
+
+    def __init__(self, task: str, models: List[str]):
+        self._task = task
+        self._num_ctx = min(num_ctx_for(model) for model in models) if models else DEFAULT_NUM_CTX
+        self._sections: List[Section] = []
+
+    def add(self, name: str, text: Optional[str], priority: int, share: float):
+        self._sections.append(
+            Section(name, collapse_whitespace(text or ""), priority, share)
+        )
+        return self
+
+    def _cut(self, section: Section, max_tokens: int):
+        section.text = truncate_to_tokens(section.text, max_tokens)
+        section.tokens = count_tokens(section.text)
+        section.trimmed = True
+
+    def build(self, fixed: str = "", reserve: int = RESPONSE_RESERVE) -> BuiltPrompt:
+        """
+        Args:
+            fixed: Text sent with every call that cannot be trimmed (instructions)
+            reserve: Tokens to leave free for the response
+
+        Returns:
+            The trimmed section texts and their token counts
+        """
+        fixed_tokens = count_tokens(fixed)
+        available = max(0, self._num_ctx - reserve - fixed_tokens)
+        capped = max(0, self._num_ctx - RESPONSE_RESERVE - fixed_tokens)
+        for section in self._sections:
+            section.tokens = count_tokens(section.text)
+            cap = math.floor(capped * section.share)
+            if section.tokens > cap:
+                self._cut(section, cap)
+
+        overflow = sum(section.tokens for section in self._sections) - available
+        for section in sorted(self._sections, key=lambda s: s.priority):
+            if overflow <= 0:
+                break
+            if not section.tokens:
+                continue
+            keep = max(0, section.tokens - overflow)
+            overflow -= section.tokens - keep
+            self._cut(section, keep)
+
+        built = BuiltPrompt(
+            sections={section.name: section.text for section in self._sections},
+            tokens={section.name: section.tokens for section in self._sections},
+            num_ctx=self._num_ctx,
+            trimmed=[section.name for section in self._sections if section.trimmed],
+        )
+        built.tokens["fixed"] = fixed_tokens
+        for name, tokens in built.tokens.items():
+            PROMPT_SECTION_TOKENS.observe(tokens, task=self._task, section=name)
+        for name in built.trimmed:
+            PROMPT_TRIMMED.inc(task=self._task, section=name)
+        _logger.debug(
+            "Prompt built",
+            extra={
+                "task": self._task,
+                "num_ctx": self._num_ctx,
+                "tokens": built.tokens,
+                "trimmed": built.trimmed,
+            },
+        )
+        return built
@@ -0,0 +1,361 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import requests
+
+from src.agents.concurrency import AIMDLimiter, CircuitBreaker, CircuitOpenError
+from src.config.logger import get_logger
+from src.telemetry.metrics import REGISTRY
+
+T = TypeVar("T")
+
+MODEL_TIERS = {
+    "small": os.getenv("OLLAMA_SMALL_MODEL", "qwen3:4b"),
+    "large": os.getenv("OLLAMA_LARGE_MODEL", "qwen3:14b"),
+}
+
+# Tiers tried in order for each agent task; a later tier is only used when the
+# earlier model returns output that fails schema validation or is not pulled.
+TASK_TIERS = {
+    "job_info": ("small", "large"),
+    "field_answer": ("small", "large"),
+    "free_text_answer": ("large",),
+    "search_queries": ("large",),
+}
+
+# How long an endpoint that reported a model as missing is skipped for it.
+MISSING_MODEL_TTL_S = float(os.getenv("OLLAMA_MISSING_MODEL_TTL_S", "300"))
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "hermes_llm_request_duration_seconds",
+    "Ollama generate latency per model and task.",
+    ["model", "task", "outcome"],
+)
+LLM_ESCALATIONS = REGISTRY.counter(
+    "hermes_llm_escalations_total",
+    "Tasks retried on the next model tier, by the model that failed and why.",
+    ["task", "model", "reason"],
+)
+# Prompt prefixes whose last endpoint is remembered, and how many more
+# in-flight requests than the least-loaded endpoint it may have to be reused.
+AFFINITY_CACHE_SIZE = 1024
+AFFINITY_SLACK = int(os.getenv("OLLAMA_AFFINITY_SLACK", "1"))
+
+LLM_AFFINITY = REGISTRY.counter(
+    "hermes_llm_prefix_affinity_total",
+    "Requests sent to the endpoint that last evaluated the same prompt prefix "
+    "(hit), or to another one (miss).",
+    ["result"],
+)
+LLM_DISPATCHED = REGISTRY.counter(
+    "hermes_llm_dispatched_total",
+    "Requests dispatched to each Ollama endpoint.",
+    ["endpoint"],
+)
+LLM_PAUSED_SECONDS = REGISTRY.histogram(
+    "hermes_llm_paused_seconds",
+    "Time requests waited for an Ollama endpoint whose circuit was open.",
+)
+
+# Adaptive bound on this process's Ollama requests in flight (see
+# src/agents/concurrency.py); set MIN and MAX equal for a fixed limit.
+LLM_CONCURRENCY_INITIAL = int(os.getenv("OLLAMA_CONCURRENCY_INITIAL", "2"))
+LLM_CONCURRENCY_MIN = int(os.getenv("OLLAMA_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("OLLAMA_CONCURRENCY_MAX", "8"))
+LLM_LATENCY_TOLERANCE = float(os.getenv("OLLAMA_LATENCY_TOLERANCE", "2.0"))
+# Consecutive refused, failed or timed out requests that open an endpoint's
+# circuit, how long it stays open before a probe, and how long requests wait
+# for an endpoint before failing.
+CIRCUIT_FAILURES = int(os.getenv("OLLAMA_CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET_S = float(os.getenv("OLLAMA_CIRCUIT_RESET_S", "15"))
+CIRCUIT_MAX_WAIT_S = float(os.getenv("OLLAMA_CIRCUIT_MAX_WAIT_S", "600"))
+# Times a request whose connection dropped or whose endpoint went down is sent again.
+OUTAGE_RETRIES = 3
+
+
+def is_overload(error: BaseException) -> bool:
+    """Timeouts, refused connections and 5xx responses: Ollama is overloaded or down."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return False
+
+
+LLM_LIMITER = AIMDLimiter(
+    "llm",
+    initial=LLM_CONCURRENCY_INITIAL,
+    minimum=LLM_CONCURRENCY_MIN,
+    maximum=LLM_CONCURRENCY_MAX,
+    tolerance=LLM_LATENCY_TOLERANCE,
+    is_overload=is_overload,
+)
+
+
+class ModelNotFound(Exception):
+    pass
+
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+
+
+_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_usage():
+    """Sum the tokens of every Ollama call made inside the block."""
+    usage = TokenUsage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def record_usage(prompt_tokens: Optional[int], response_tokens: Optional[int]):
+    usage = _usage.get()
+    if usage is not None:
+        usage.calls += 1
+        usage.prompt_tokens += prompt_tokens or 0
+        usage.response_tokens += response_tokens or 0
+
+
+def models_for(task: str) -> List[str]:
+    """
+    Models to try for a task, cheapest first.
+
+    ``OLLAMA_MODELS_<TASK>`` (e.g. ``OLLAMA_MODELS_JOB_INFO=qwen3:4b,qwen3:14b``)
+    overrides the tier mapping for one task.
+    """
+    override = os.getenv(f"OLLAMA_MODELS_{task.upper()}")
+    if override:
+        return [model.strip() for model in override.split(",") if model.strip()]
+    models = []
+    for tier in TASK_TIERS.get(task, ("large",)):
+        model = MODEL_TIERS[tier]
+        if model not in models:
+            models.append(model)
+    return models
+
+
+class EndpointPool:
+    """
+    Ollama endpoints from ``OLLAMA_ENDPOINTS`` (comma separated, falling back
+    to ``OLLAMA_URL``). Each request goes to the endpoint with the fewest
+    in-flight requests in this process, ties broken by recent latency.
+
+    Requests that share a prompt prefix (an `affinity` key) stay on the
+    endpoint that served the previous one while it is not much busier than
+    the others, because only that endpoint has the prefix in its KV cache.
+
+    Each endpoint has a circuit breaker. Endpoints whose circuit is open are
+    skipped, and while every endpoint's is, requests wait for a probe to get
+    through, up to OLLAMA_CIRCUIT_MAX_WAIT_S.
+    """
+
+    def __init__(self, endpoints: Optional[List[str]] = None):
+        if endpoints is None:
+            configured = os.getenv("OLLAMA_ENDPOINTS") or os.getenv(
+                "OLLAMA_URL", "http://localhost:11434"
+            )
+            endpoints = [url.strip() for url in configured.split(",") if url.strip()]
+        self.endpoints = [url.rstrip("/") for url in endpoints]
+        self._inflight: Dict[str, int] = {url: 0 for url in self.endpoints}
+        self._latency: Dict[str, float] = {url: 0.0 for url in self.endpoints}
+        self._missing: Dict[Tuple[str, str], float] = {}
+        self._affinity: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._breakers = {
+            url: CircuitBreaker(url, CIRCUIT_FAILURES, CIRCUIT_RESET_S)
+            for url in self.endpoints
+        }
+        self._logger = get_logger(__name__)
+        self._lock = threading.Lock()
+
+    def mark_missing(self, endpoint: str, model: str):
+        with self._lock:
+            self._missing[(endpoint, model)] = time.monotonic() + MISSING_MODEL_TTL_S
+
+    def _has_model(self, endpoint: str, model: str) -> bool:
+        until = self._missing.get((endpoint, model))
+        return until is None or until < time.monotonic()
+
+    def is_down(self, endpoint: str) -> bool:
+        return self._breakers[endpoint].is_open
+
+    def _choose(self, candidates: List[str], model: str, affinity: Optional[str]) -> str:
+        """The least-loaded candidate, or the prefix's last one. Call with the lock held."""
+        endpoint = min(
+            candidates, key=lambda url: (self._inflight[url], self._latency[url])
+        )
+        if affinity is not None:
+            previous = self._affinity.get((affinity, model))
+            if previous in candidates and (
+                self._inflight[previous] <= self._inflight[endpoint] + AFFINITY_SLACK
+            ):
+                endpoint = previous
+            LLM_AFFINITY.inc(result="hit" if endpoint == previous else "miss")
+            self._affinity[(affinity, model)] = endpoint
+            self._affinity.move_to_end((affinity, model))
+            if len(self._affinity) > AFFINITY_CACHE_SIZE:
+                self._affinity.popitem(last=False)
+        return endpoint
+
+    def _wait_for_endpoint(self, candidates: List[str], paused_since: float):
+        now = time.monotonic()
+        if now - paused_since > CIRCUIT_MAX_WAIT_S:
+            raise CircuitOpenError(f"No Ollama endpoint up for {CIRCUIT_MAX_WAIT_S:.0f}s")
+        ready_at = min(self._breakers[url].ready_at() for url in candidates)
+        time.sleep(min(max(ready_at - now, 0.05), 1.0))
+
+    @contextmanager
+    def acquire(self, model: str, affinity: Optional[str] = None):
+        """Reserve the least-loaded endpoint that is up and not known to lack `model`."""
+        paused_since = None
+        while True:
+            with self._lock:
+                candidates = [url for url in self.endpoints if self._has_model(url, model)]
+                if not candidates:
+                    raise ModelNotFound(f"{model} is not available on any endpoint")
+                up = [url for url in candidates if self._breakers[url].available()]
+                if up:
+                    endpoint = self._choose(up, model, affinity)
+                    self._breakers[endpoint].begin()
+                    self._inflight[endpoint] += 1
+                    break
+            if paused_since is None:
+                paused_since = time.monotonic()
+                self._logger.warning("Ollama is down, pausing requests", extra={"model": model})
+            self._wait_for_endpoint(candidates, paused_since)
+        if paused_since is not None:
+            LLM_PAUSED_SECONDS.observe(time.monotonic() - paused_since)
+        LLM_DISPATCHED.inc(endpoint=endpoint)
+        start = time.perf_counter()
+        try:
+            yield endpoint
+        except BaseException as e:
+            if is_overload(e):
+                self._breakers[endpoint].failure()
+            else:
+                self._breakers[endpoint].success()
+            raise
+        else:
+            self._breakers[endpoint].success()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._inflight[endpoint] -= 1
+                # Exponentially weighted so a slow endpoint recovers quickly.
+                self._latency[endpoint] = 0.8 * self._latency[endpoint] + 0.2 * elapsed
+
+
+class ModelRouter:
+    """Runs an agent task on its model tiers, escalating when a tier fails."""
+
+    def __init__(self, pool: Optional[EndpointPool] = None):
+        self._pool = pool or EndpointPool()
+        self._logger = get_logger(__name__)
+
+    def run(
+        self,
+        task: str,
+        payload: dict,
+        call: Callable[[str, dict], str],
+        parse: Callable[[str], T],
+        affinity: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> T:
+        """
+        Run `payload` for `task`, trying each model for the task in order.
+
+        Args:
+            task: Key in TASK_TIERS, e.g. "job_info"
+            payload: Ollama generate payload without the model
+            call: Sends a payload to an endpoint URL and returns the raw response
+            parse: Validates the raw response; ValueError (including pydantic's
+                ValidationError) escalates to the next model
+            affinity: Key of the stable prompt prefix, to keep requests that
+                share it on one endpoint
+            batch_size: Questions answered by a batched request
+
+        Requests wait for a slot of LLM_LIMITER first. A request whose
+        connection dropped or whose endpoint went down is sent again, once an
+        endpoint is up, rather than failing the job.
+
+        Returns:
+            The parsed response of the first model that produced a valid one
+        """
+        models = models_for(task)
+        last_error: Optional[Exception] = None
+        for index, model in enumerate(models):
+            # Batched and single requests, and each model, have their own
+            # latency baseline; batches are compared per question.
+            limiter_key = f"{task}:{model}" + (":batch" if batch_size else "")
+            for attempt in range(OUTAGE_RETRIES + 1):
+                start = time.perf_counter()
+                outcome = "ok"
+                endpoint = None
+                try:
+                    with LLM_LIMITER.slot(limiter_key, cost=batch_size or 1):
+                        with self._pool.acquire(model, affinity) as endpoint:
+                            raw = call(endpoint, {**payload, "model": model})
+                            return parse(raw)
+                except ModelNotFound as e:
+                    outcome, reason, last_error = "model_not_found", "model_not_found", e
+                except requests.HTTPError as e:
+                    if e.response is None or e.response.status_code != 404:
+                        outcome = self._failure_outcome(e, endpoint, attempt)
+                        if outcome == "error":
+                            raise
+                        continue
+                    self._pool.mark_missing(endpoint, model)
+                    outcome, reason, last_error = "model_not_found", "model_not_found", e
+                except ValueError as e:
+                    outcome, reason, last_error = "invalid", "validation", e
+                except Exception as e:
+                    outcome = self._failure_outcome(e, endpoint, attempt)
+                    if outcome == "error":
+                        raise
+                    continue
+                finally:
+                    LLM_REQUEST_SECONDS.observe(
+                        time.perf_counter() - start, model=model, task=task, outcome=outcome
+                    )
+                break
+            if index + 1 < len(models):
+                LLM_ESCALATIONS.inc(task=task, model=model, reason=reason)
+                self._logger.info(
+                    "Escalating to next model",
+                    extra={"task": task, "model": model, "reason": reason},
+                )
+        raise last_error
+
+    def _failure_outcome(self, error: Exception, endpoint: Optional[str], attempt: int) -> str:
+        """
+        "unavailable" when the request should be sent again: its connection
+        dropped, or its endpoint's circuit opened. Otherwise "error".
+        """
+        dropped = isinstance(error, requests.ConnectionError) and not isinstance(
+            error, requests.Timeout
+        )
+        if (
+            endpoint is not None
+            and attempt < OUTAGE_RETRIES
+            and (dropped or (is_overload(error) and self._pool.is_down(endpoint)))
+        ):
+            self._logger.info(
+                "Retrying request after Ollama outage",
+                extra={"endpoint": endpoint, "error": str(error)},
+            )
+            return "unavailable"
+        return "error"
@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.telemetry.metrics import REGISTRY
+
+LLM_TIME_TO_RESULT = REGISTRY.histogram(
+    "hermes_llm_time_to_result_seconds",
+    "Time from sending a generate request to having a usable response.",
+    ["model", "mode"],
+)
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "hermes_llm_time_to_first_token_seconds",
+    "Time from sending a streamed generate request to its first chunk; "
+    "mostly prompt evaluation, so it drops when the prompt prefix is cached.",
+    ["model"],
+)
+LLM_STREAM_STOPS = REGISTRY.counter(
+    "hermes_llm_stream_stops_total",
+    "How streamed responses ended: complete (closed before Ollama sent done), "
+    "done, or off_schema (aborted).",
+    ["model", "reason"],
+)
+LLM_TOKENS_SAVED = REGISTRY.counter(
+    "hermes_llm_tokens_saved_total",
+    "Estimated response tokens not generated because a stream was closed early: "
+    "complete (the JSON was closed) or off_schema (aborted).",
+    ["model", "reason"],
+)
+
+
+class OffSchemaOutput(ValueError):
+    """Raised while streaming when the model's output cannot match the schema."""
+
+
+class JsonStreamScanner:
+    """
+    Incremental reader for a streamed JSON document constrained by `schema`.
+
+    `feed()` returns True as soon as the top-level value is closed, so the
+    caller can stop reading. It raises OffSchemaOutput when the output starts
+    with the wrong type, uses a property an object's schema does not declare,
+    or gives an enum/const property a value outside the allowed ones. Objects
+    whose schema lists no properties (free-form dicts) are not checked.
+    """
+
+    def __init__(self, schema: Optional[dict]):
+        self._root = schema if isinstance(schema, dict) else {}
+        self._defs = self._root.get("$defs", {})
+        self._parts: List[str] = []
+        # Stream chunks fed so far; Ollama sends about one token per chunk.
+        self.chunks = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        # Characters of the JSON string being read, quotes included.
+        self._string: List[str] = []
+        # One (is_object, schema) entry per open container.
+        self._stack: List[Tuple[bool, Optional[dict]]] = []
+        self._expect_key = False
+        self._last_key: Optional[str] = None
+
+    def _resolve(self, node: Optional[dict], kind: Optional[str] = None):
+        """Follow $ref and pick the anyOf branch of the given JSON type."""
+        if not isinstance(node, dict):
+            return None
+        if "$ref" in node:
+            node = self._defs.get(node["$ref"].rsplit("/", 1)[-1])
+        branches = (node or {}).get("anyOf") or (node or {}).get("oneOf")
+        if branches:
+            for branch in branches:
+                branch = self._resolve(branch)
+                if branch and (kind is None or branch.get("type") == kind):
+                    return branch
+            return None
+        return node
+
+    def _child_schema(self) -> Optional[dict]:
+        if not self._stack:
+            return self._root
+        is_object, schema = self._stack[-1]
+        if schema is None:
+            return None
+        if is_object:
+            return schema.get("properties", {}).get(self._last_key)
+        return schema.get("items")
+
+    def feed(self, chunk: str) -> bool:
+        self.chunks += 1
+        self._parts.append(chunk)
+        for index, char in enumerate(chunk):
+            if self._in_string:
+                self._string.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string()
+                continue
+            if char.isspace():
+                continue
+            if not self._started:
+                expected = "[" if self._root.get("type") == "array" else "{"
+                if self._root and char != expected:
+                    raise OffSchemaOutput(f"expected {expected!r}, got {char!r}")
+                self._started = True
+            if char == '"':
+                self._in_string = True
+                self._string = [char]
+            elif char in "{[":
+                is_object = char == "{"
+                schema = self._resolve(
+                    self._child_schema(), "object" if is_object else "array"
+                )
+                self._stack.append((is_object, schema))
+                self._expect_key = is_object
+            elif char in "}]":
+                if not self._stack:
+                    raise OffSchemaOutput("unbalanced JSON output")
+                self._stack.pop()
+                self._expect_key = False
+                if not self._stack:
+                    self._parts[-1] = chunk[: index + 1]
+                    return True
+            elif char == ",":
+                self._expect_key = bool(self._stack and self._stack[-1][0])
+        return False
+
+    def _end_string(self):
+        value = json.loads("".join(self._string))
+        if not self._stack or not self._stack[-1][0]:
+            return
+        schema = self._stack[-1][1]
+        if self._expect_key:
+            properties = (schema or {}).get("properties")
+            if properties and value not in properties:
+                raise OffSchemaOutput(f"unexpected property {value!r}")
+            self._last_key = value
+            self._expect_key = False
+            return
+        node = self._resolve(self._child_schema(), "string") or {}
+        allowed = node.get("enum") or ([node["const"]] if "const" in node else None)
+        if allowed and value not in allowed:
+            raise OffSchemaOutput(f"{value!r} is not a valid {self._last_key!r}")
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def document(self) -> str:
+        return self.text.strip()
+
+
+def timed_lines(lines: Iterable[bytes], model: str, start: float) -> Iterator[bytes]:
+    """Pass `lines` through, recording the time to the first non-empty one."""
+    first = True
+    for line in lines:
+        if first and line:
+            LLM_TIME_TO_FIRST_TOKEN.observe(time.time() - start, model=model)
+            first = False
+        yield line
+
+
+def read_stream(lines: Iterable[bytes], scanner: JsonStreamScanner) -> dict:
+    """
+    Feed Ollama's NDJSON stream into `scanner` until the document is complete.
+
+    Returns:
+        ``{"response": <json text>, "early": <stopped before Ollama sent
+        done>, "final": <the done chunk, if read>}``
+    """
+    for line in lines:
+        if not line:
+            continue
+        data = json.loads(line)
+        if data.get("error"):
+            raise RuntimeError(data["error"])
+        complete = scanner.feed(data.get("response", ""))
+        if complete or data.get("done"):
+            return {
+                "response": scanner.document,
+                "early": not data.get("done"),
+                "final": data if data.get("done") else None,
+            }
+    return {"response": scanner.document, "early": False, "final": None}
+
+
+class ResponseLengths:
+    """Running mean of response tokens per (model, schema), for savings estimates."""
+
+    def __init__(self):
+        self._means: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, schema: str, tokens: int):
+        key = (model, schema)
+        with self._lock:
+            previous = self._means.get(key)
+            self._means[key] = tokens if previous is None else 0.9 * previous + 0.1 * tokens
+
+    def expected(self, model: str, schema: str) -> Optional[float]:
+        return self._means.get((model, schema))
+
+
+RESPONSE_LENGTHS = ResponseLengths()
+# Tokens Ollama generated up to done, trailing whitespace included: what a
+# stream closed as soon as its JSON is complete no longer pays for.
+GENERATED_LENGTHS = ResponseLengths()
@@ -1,57 +1,211 @@
+import atexit
+import json
 import logging
 import os
-from typing import Optional
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
 
+_RESERVED_RECORD_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__.keys()
+) | {"message", "asctime"}
 
-def setup_logger(
-    name: str = __name__, level: int = logging.INFO, file_path: Optional[str] = None
-) -> logging.Logger:
+_lock = threading.Lock()
+_configured_pid: Optional[int] = None
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as one JSON object per line.
+
+    Any ``extra={...}`` fields passed to the logging call are included as
+    top-level keys, so callers can log structured data instead of formatting
+    it into the message.
     """
-    Configure and return a logger instance with specified name and level.
 
-    Args:
-        name: Logger name (defaults to module name)
-        level: Logging level (defaults to INFO)
-        file_path: Optional path to log file. If provided, logs will be written to this file
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
-    Returns:
-        Configured logger instance
+
+class SamplingFilter(logging.Filter):
+    """Let through roughly ``rate`` of the records (0.0 - 1.0)."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self._rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self._rate >= 1.0 or random.random() < self._rate
+
+
+def _level_number(name: str) -> Optional[int]:
+    """The numeric level for a name like ``DEBUG``, or None if it is not one."""
+    level = logging.getLevelName(name.strip().upper())
+    return level if isinstance(level, int) else None
+
+
+def _parse_module_levels(spec: str) -> Tuple[Dict[str, int], List[str]]:
     """
-    logger = logging.getLogger(name)
+    Parse ``"src.agents=DEBUG,src.web.api=WARNING"`` into a level mapping,
+    and the entries that were skipped because their level is unknown.
+    """
+    levels, invalid = {}, []
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        number = _level_number(level)
+        if number is None:
+            invalid.append(item.strip())
+            continue
+        levels[name.strip()] = number
+    return levels, invalid
 
-    logger.setLevel(level)
 
-    formatter = logging.Formatter(
+def _build_formatter(fmt: str) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter(
         "[%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s]: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
-    if file_path:
-        file_handler = logging.FileHandler(file_path)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        _listener = None
 
-    return logger
+
+def setup_logger(level: Optional[int] = None, file_path: Optional[str] = None):
+    """
+    Configure logging for the current process. Safe to call many times; only
+    the first call in each process has an effect.
+
+    Records are put on an in-memory queue by a ``QueueHandler`` attached to the
+    root logger and written out by a ``QueueListener`` thread, so logging calls
+    never block on console or file I/O.
+
+    Environment:
+        LOG_LEVEL: Root level (defaults to INFO)
+        LOG_LEVELS: Per-module levels, e.g. ``src.agents=DEBUG,src.web.api=WARNING``
+        LOG_FORMAT: ``json`` (default) or ``text``
+        LOGS_FILE: Optional path to a log file
+
+    Args:
+        level: Root logging level, overrides LOG_LEVEL
+        file_path: Optional path to log file, overrides LOGS_FILE
+    """
+    global _configured_pid, _queue_handler, _listener
+
+    with _lock:
+        if _configured_pid == os.getpid():
+            return
+
+        root = logging.getLogger()
+        if _queue_handler is not None:
+            # Inherited from the parent over fork; its listener thread is gone.
+            root.removeHandler(_queue_handler)
+            _listener = None
+
+        invalid = []
+        if level is None:
+            level = _level_number(os.getenv("LOG_LEVEL", "INFO"))
+            if level is None:
+                invalid.append(f"LOG_LEVEL={os.getenv('LOG_LEVEL')}")
+                level = logging.INFO
+        root.setLevel(level)
+        module_levels, invalid_modules = _parse_module_levels(os.getenv("LOG_LEVELS", ""))
+        invalid.extend(invalid_modules)
+        for name, module_level in module_levels.items():
+            logging.getLogger(name).setLevel(module_level)
+
+        formatter = _build_formatter(os.getenv("LOG_FORMAT", "json").lower())
+        handlers = [logging.StreamHandler()]
+        file_path = file_path or os.getenv("LOGS_FILE")
+        if file_path:
+            handlers.append(logging.FileHandler(file_path))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        root.addHandler(_queue_handler)
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _configured_pid = os.getpid()
+
+    if invalid:
+        logging.getLogger(__name__).warning(
+            "Ignoring unknown log levels: %s", ", ".join(invalid)
+        )
 
 
 def get_logger(name: str = __name__, file_path: Optional[str] = None) -> logging.Logger:
     """
-    Get a configured logger instance.
+    Get a logger, configuring process-wide logging on first use.
 
     Args:
         name: Logger name (defaults to module name)
-        file_path: Optional path to log file. If provided, logs will be written to this file
+        file_path: Optional path to log file. Only honoured by the first call
+            in a process; prefer LOGS_FILE.
+
+    Returns:
+        Logger instance
+    """
+    setup_logger(file_path=file_path)
+    return logging.getLogger(name)
+
+
+def get_sampled_logger(name: str, rate: Optional[float] = None) -> logging.Logger:
+    """
+    Get a DEBUG channel for bulky payloads (LLM responses, page dumps) that
+    only emits a sample of its records.
+
+    The channel is silent unless its level is enabled, e.g. with
+    ``LOG_LEVELS=src.agents.lever.responses=DEBUG``.
+
+    Args:
+        name: Logger name, conventionally ``<module>.responses``
+        rate: Fraction of records to keep, defaults to LOG_SAMPLE_RATE (0.1)
 
     Returns:
-        Configured logger instance
+        Logger instance
     """
+    logger = get_logger(name)
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        if rate is None:
+            rate = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+        logger.addFilter(SamplingFilter(rate))
+    return logger
+
+
+def _reconfigure_after_fork():
+    global _lock
+    _lock = threading.Lock()
+    if _configured_pid is not None:
+        setup_logger()
 
-    logs_file = os.getenv("LOGS_FILE")
-    if logs_file and not file_path:
-        file_path = logs_file
 
-    return setup_logger(name, file_path=file_path)
+os.register_at_fork(after_in_child=_reconfigure_after_fork)
+atexit.register(_stop_listener)
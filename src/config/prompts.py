@@ -65,3 +65,8 @@ The job text will be provided by the user. The user's resume is specified below:
 {preferences}
 </important_user_preferences>
 """
+
+FILLER_AGENT_BATCH_INSTRUCTIONS = """Answer every question below. Each one is from the same application form and is introduced by its index in square brackets.
+Respond with a JSON array containing exactly one object per question, in the same order, and set `index` to the question's index.
+
+"""
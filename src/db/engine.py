@@ -0,0 +1,85 @@
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from src.telemetry.metrics import REGISTRY
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///jobs_analyzer.db")
+
+DB_LOCK_ERRORS = REGISTRY.counter(
+    "hermes_db_lock_errors_total",
+    "Statements that failed because the database was locked.",
+)
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # With WAL, NORMAL only syncs at checkpoints instead of on every commit.
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB, so -65536 is a 64 MiB page cache.
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _count_lock_errors(context):
+    if "database is locked" in str(context.original_exception):
+        DB_LOCK_ERRORS.inc()
+
+
+def create_db_engine(url: str = DATABASE_URL, echo: bool = False) -> Engine:
+    """
+    Create the SQLAlchemy engine for `url`.
+
+    SQLite files get WAL mode and the pragmas in SQLITE_PRAGMAS on every new
+    connection. Other URLs (e.g. postgresql+psycopg://...) also get pre-ping
+    and connection recycling. Both use a QueuePool sized by DB_POOL_SIZE /
+    DB_MAX_OVERFLOW.
+
+    Pooled connections must not be shared across processes, so forked workers
+    drop the pool they inherit (see `dispose_after_fork`).
+    """
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            return create_engine(url, echo=echo, future=True)
+        # A small per-process pool keeps connections (and their page cache and
+        # mmap) warm across sessions; Flask threads share it.
+        engine = create_engine(
+            url,
+            echo=echo,
+            future=True,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+            },
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        )
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            url,
+            echo=echo,
+            future=True,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+    event.listen(engine, "handle_error", _count_lock_errors)
+    dispose_after_fork(engine)
+    return engine
+
+
+def dispose_after_fork(engine: Engine):
+    """Drop pooled connections inherited from the parent in forked children."""
+    os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.db.model import FormTemplate
+
+
+def get_template_selectors(session: Session, fingerprint: str) -> Optional[Dict[str, dict]]:
+    """The learned selectors of a known template, or None for an unknown form."""
+    row = (
+        session.query(FormTemplate.selectors)
+        .filter(FormTemplate.fingerprint == fingerprint)
+        .one_or_none()
+    )
+    if row is None:
+        return None
+    return row.selectors or {}
+
+
+def save_form_template(session: Session, fingerprint: str, questions_html: List[str]):
+    """
+    Record a newly extracted form. Other processes may extract the same form
+    concurrently, so it is inserted with ON CONFLICT DO NOTHING.
+    """
+    values = {"fingerprint": fingerprint, "questions_html": questions_html, "selectors": {}}
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(FormTemplate).on_conflict_do_nothing(
+            index_elements=["fingerprint"]
+        )
+    elif dialect == "postgresql":
+        statement = postgresql.insert(FormTemplate).on_conflict_do_nothing(
+            index_elements=["fingerprint"]
+        )
+    else:
+        if session.query(FormTemplate.id).filter_by(fingerprint=fingerprint).first():
+            return
+        statement = insert(FormTemplate)
+    session.execute(statement, [values])
+
+
+def add_template_selectors(session: Session, fingerprint: str, selectors: Dict[str, dict]):
+    """Add selectors learned for questions the template has none for yet."""
+    template = (
+        session.query(FormTemplate)
+        .filter(FormTemplate.fingerprint == fingerprint)
+        .one_or_none()
+    )
+    if template is None:
+        return
+    known = template.selectors or {}
+    new = {key: entry for key, entry in selectors.items() if key not in known}
+    if new:
+        template.selectors = {**known, **new}
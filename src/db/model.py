@@ -1,28 +1,87 @@
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Integer,
     String,
     Text,
-    create_engine,
+    inspect,
+    text,
 )
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.sql import func
 
-DATABASE_URL = "sqlite:///jobs_analyzer.db"
+from src.db.engine import DATABASE_URL, create_db_engine
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
 
+class Posting(Base):
+    """
+    A Lever posting, shared by every installation that found it. Holds the
+    resume-independent work: fetched page text, extracted job details and the
+    application form's question HTML.
+    """
+
+    __tablename__ = "postings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    link = Column(String(2048), nullable=False, unique=True, index=True)
+    title = Column(String(256))
+    location = Column(String(256))
+    company = Column(String(256))
+    salary = Column(String(256))
+    description = Column(Text)
+    page_text = Column(Text)
+    questions_html = Column(JSON)
+    # FormTemplate fingerprint of the application form.
+    form_fingerprint = Column(String(64))
+    # When the company published it, if known (postings API createdAt).
+    posted_at = Column(DateTime(timezone=True))
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class FormTemplate(Base):
+    """
+    An application form shared by postings, identified by the fingerprint of
+    its questions' labels and fields. Holds the question HTML extracted once
+    and the query selector learned for each question, so postings with the
+    same form skip browser extraction and selector generation.
+    """
+
+    __tablename__ = "form_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), nullable=False, unique=True, index=True)
+    questions_html = Column(JSON, nullable=False)
+    # question key -> {"action", "query_selector", "question_text"}
+    selectors = Column(JSON)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
 class JobAnalysis(Base):
+    """
+    An installation's application to a posting: its state and, through
+    ApplicationActions, the personalized answers. Job details are copied from
+    the posting for the API.
+    """
+
     __tablename__ = "job_analysis"
 
     id = Column(Integer, primary_key=True, index=True)
+    posting_id = Column(Integer, ForeignKey("postings.id"), index=True)
     link = Column(String(2048), nullable=False)
     title = Column(String(256), nullable=False)
     location = Column(String(256))
@@ -37,6 +96,11 @@ class JobAnalysis(Base):
     is_processed = Column(Boolean, nullable=False, default=False)
     notes = Column(Text)
     is_agent_processed = Column(Boolean, nullable=False, default=False)
+    # Set by the relevance prefilter; parked jobs are neither processed nor listed.
+    is_parked = Column(Boolean, default=False)
+    relevance_score = Column(Float)
+    # Failed processing attempts; the job is retried until MAX_JOB_ATTEMPTS.
+    attempts = Column(Integer)
     installation_id = Column(String(128), nullable=False)
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
@@ -86,6 +150,24 @@ class JobGoogleSearchQuery(Base):
     )
 
 
+class TraceSpan(Base):
+    __tablename__ = "trace_spans"
+    id = Column(Integer, primary_key=True, index=True)
+    trace_id = Column(String(32), nullable=False, index=True)
+    span_id = Column(String(16), nullable=False)
+    parent_span_id = Column(String(16))
+    name = Column(String(128), nullable=False)
+    job_analysis_id = Column(Integer, ForeignKey("job_analysis.id"), index=True)
+    installation_id = Column(String(128))
+    start_ns = Column(BigInteger, nullable=False)
+    duration_ms = Column(Float, nullable=False)
+    status = Column(String(16), nullable=False)
+    attributes = Column(JSON)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
 class InstalledExtensions(Base):
     __tablename__ = "installed_extensions"
     id = Column(Integer, primary_key=True, index=True)
@@ -98,4 +180,56 @@ class InstalledExtensions(Base):
     )
 
 
-Base.metadata.create_all(bind=engine)
+class InstallationProfile(Base):
+    """
+    Preprocessed resume and preferences of an installation: the parsed
+    profile, a condensed resume for prompts and the rendered filler system
+    prompt. Rebuilt when `resume_hash` no longer matches the installation.
+    """
+
+    __tablename__ = "installation_profiles"
+    id = Column(Integer, primary_key=True, index=True)
+    installation_id = Column(String(128), nullable=False, unique=True, index=True)
+    resume_hash = Column(String(64), nullable=False)
+    profile = Column(JSON)
+    resume_summary = Column(Text)
+    system_prompt = Column(Text)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+def _add_missing_columns():
+    """
+    Add nullable columns introduced after a table was first created.
+    `create_all` only creates missing tables, not missing columns.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(
+                        f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                    )
+                )
+
+
+def init_db():
+    """
+    Create missing tables and columns. Run once at deployment or server
+    start (`python -m src.db.model`), not on import.
+    """
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+
+if __name__ == "__main__":
+    init_db()
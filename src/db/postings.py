@@ -0,0 +1,40 @@
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.db.model import Posting
+
+
+def get_or_create_postings(session: Session, links: List[str]) -> Dict[str, Posting]:
+    """
+    Return the shared Posting row for each link, creating missing ones.
+
+    Other processes may insert the same links concurrently, so missing rows
+    are inserted with ON CONFLICT DO NOTHING on the unique `link` column.
+    """
+    links = list(dict.fromkeys(links))
+    if not links:
+        return {}
+    existing = {
+        link for (link,) in session.query(Posting.link).filter(Posting.link.in_(links))
+    }
+    missing = [{"link": link} for link in links if link not in existing]
+    if missing:
+        dialect = session.get_bind().dialect.name
+        if dialect == "sqlite":
+            statement = sqlite.insert(Posting).on_conflict_do_nothing(
+                index_elements=["link"]
+            )
+        elif dialect == "postgresql":
+            statement = postgresql.insert(Posting).on_conflict_do_nothing(
+                index_elements=["link"]
+            )
+        else:
+            statement = insert(Posting)
+        session.execute(statement, missing)
+    return {
+        posting.link: posting
+        for posting in session.query(Posting).filter(Posting.link.in_(links))
+    }
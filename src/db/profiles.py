@@ -0,0 +1,70 @@
+from typing import Dict
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.db.model import InstallationProfile
+from src.processors.profile import build_profile, resume_hash
+
+# installation_id -> profile dict, valid while its resume_hash matches.
+_cache: Dict[str, dict] = {}
+
+
+def _upsert(session: Session, installation_id: str, values: dict):
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        statement = module.insert(InstallationProfile).values(
+            installation_id=installation_id, **values
+        )
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["installation_id"], set_=values
+            )
+        )
+        return
+    record = (
+        session.query(InstallationProfile)
+        .filter(InstallationProfile.installation_id == installation_id)
+        .one_or_none()
+    )
+    if record is None:
+        session.add(InstallationProfile(installation_id=installation_id, **values))
+    else:
+        for key, value in values.items():
+            setattr(record, key, value)
+
+
+def get_installation_profile(
+    session: Session, installation_id: str, resume: str, preferences: str
+) -> dict:
+    """
+    Return the installation's profile, from memory, then the database, and
+    only rebuild it when the resume or preferences changed. A rebuilt
+    profile is written but not committed.
+
+    Returns:
+        Dict with resume_hash, profile, resume_summary and system_prompt
+    """
+    current_hash = resume_hash(resume, preferences)
+    cached = _cache.get(installation_id)
+    if cached is not None and cached["resume_hash"] == current_hash:
+        return cached
+
+    record = (
+        session.query(InstallationProfile)
+        .filter(InstallationProfile.installation_id == installation_id)
+        .one_or_none()
+    )
+    if record is not None and record.resume_hash == current_hash:
+        values = {
+            "resume_hash": record.resume_hash,
+            "profile": record.profile,
+            "resume_summary": record.resume_summary,
+            "system_prompt": record.system_prompt,
+        }
+    else:
+        values = build_profile(resume, preferences)
+        _upsert(session, installation_id, values)
+    _cache[installation_id] = values
+    return values
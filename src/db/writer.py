@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from src.config.logger import get_logger
+from src.db.model import ApplicationActions, JobAnalysis, SessionLocal
+from src.telemetry.metrics import REGISTRY, timed
+
+DB_FLUSHED_JOBS = REGISTRY.counter(
+    "hermes_db_flushed_jobs_total",
+    "Job write sets committed by the write-behind buffer.",
+)
+DB_FLUSHES = REGISTRY.counter(
+    "hermes_db_flushes_total",
+    "Transactions committed by the write-behind buffer, by outcome.",
+    ["outcome"],
+)
+
+# Buffers not closed yet, flushed by `flush_open_buffers()` on shutdown.
+_OPEN_BUFFERS: "weakref.WeakSet[WriteBehindBuffer]" = weakref.WeakSet()
+
+
+class _JobWrites:
+    def __init__(self):
+        self.updates: dict = {}
+        self.actions: List[dict] = []
+        self.ready = False
+
+
+class WriteBehindBuffer:
+    """
+    Collects the writes of many jobs and commits them together.
+
+    A job's JobAnalysis updates are held back until the job reaches a final
+    state, then committed in one transaction together with every other
+    finished job. ApplicationActions rows are checkpoints: they go out with
+    the next flush whether or not their job has finished, so an interrupted
+    job keeps the answers it already paid for. A flush happens when
+    `max_items` jobs are waiting or the oldest write has waited `max_delay`
+    seconds, and on `close()`.
+
+    If a batch fails, it is rolled back and each job is retried in its own
+    transaction. A finished job that still fails is marked `has_error` so it
+    does not stay stuck in `is_processing`; an unfinished job's checkpoint is
+    kept for the next flush.
+    """
+
+    def __init__(self, max_items: Optional[int] = None, max_delay: Optional[float] = None):
+        self._max_items = max_items or int(os.getenv("DB_WRITE_BATCH_SIZE", "50"))
+        self._max_delay = (
+            max_delay
+            if max_delay is not None
+            else float(os.getenv("DB_WRITE_FLUSH_INTERVAL_S", "2"))
+        )
+        self._logger = get_logger(__name__)
+        self._pending: Dict[int, _JobWrites] = {}
+        self._ready_since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        _OPEN_BUFFERS.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def update_job(self, job_id: int, values: dict, final: bool = False):
+        """Queue column updates for a job; `final` makes its writes flushable."""
+        with self._lock:
+            writes = self._pending.setdefault(job_id, _JobWrites())
+            writes.updates.update(values)
+            if final:
+                self._mark_ready(writes)
+        self._maybe_flush()
+
+    def add_actions(self, job_id: int, actions: List[dict]):
+        """
+        Queue ApplicationActions rows (column dicts) for a job. They are
+        written with the next flush, even if the job has not finished.
+        """
+        with self._lock:
+            writes = self._pending.setdefault(job_id, _JobWrites())
+            writes.actions.extend(
+                {**action, "job_analysis_id": job_id} for action in actions
+            )
+            if writes.actions:
+                self._start_delay()
+        self._maybe_flush()
+
+    def _mark_ready(self, writes: _JobWrites):
+        writes.ready = True
+        self._start_delay()
+
+    def _start_delay(self):
+        if self._ready_since is None:
+            self._ready_since = time.monotonic()
+
+    def _maybe_flush(self):
+        with self._lock:
+            ready = sum(1 for writes in self._pending.values() if writes.ready)
+            due = self._ready_since is not None
+        if ready >= self._max_items:
+            self.flush()
+        elif due:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="db-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self._max_delay)
+            self._wakeup.clear()
+            with self._lock:
+                due = (
+                    self._ready_since is not None
+                    and time.monotonic() - self._ready_since >= self._max_delay
+                )
+            if due:
+                self.flush()
+
+    def _take(self, include_unfinished: bool) -> Dict[int, _JobWrites]:
+        """Take finished jobs' writes and unfinished jobs' checkpointed actions."""
+        with self._lock:
+            taken = {}
+            for job_id, writes in list(self._pending.items()):
+                if writes.ready or include_unfinished:
+                    taken[job_id] = writes
+                    del self._pending[job_id]
+                elif writes.actions:
+                    checkpoint = _JobWrites()
+                    checkpoint.actions, writes.actions = writes.actions, []
+                    taken[job_id] = checkpoint
+            self._ready_since = None
+            return taken
+
+    def flush(self, include_unfinished: bool = False):
+        """Commit every finished job's writes in a single transaction."""
+        with self._flush_lock:
+            batch = self._take(include_unfinished)
+            if not batch:
+                return
+            try:
+                with timed("db_commit"), SessionLocal() as session:
+                    self._write(session, batch)
+                    session.commit()
+                DB_FLUSHES.inc(outcome="batch")
+                DB_FLUSHED_JOBS.inc(len(batch))
+            except Exception:
+                self._logger.exception(
+                    f"Batched write of {len(batch)} jobs failed, retrying one by one"
+                )
+                self._flush_individually(batch)
+
+    def _flush_individually(self, batch: Dict[int, _JobWrites]):
+        for job_id, writes in batch.items():
+            try:
+                with timed("db_commit"), SessionLocal() as session:
+                    self._write(session, {job_id: writes})
+                    session.commit()
+                DB_FLUSHES.inc(outcome="single")
+                DB_FLUSHED_JOBS.inc()
+            except Exception:
+                DB_FLUSHES.inc(outcome="failed")
+                self._logger.exception(f"Could not write results of job {job_id}")
+                if not writes.ready and not writes.updates and not self._closed:
+                    # A checkpoint of a job still running: retry with its next write.
+                    with self._lock:
+                        pending = self._pending.setdefault(job_id, _JobWrites())
+                        pending.actions[:0] = writes.actions
+                    continue
+                with SessionLocal() as session:
+                    session.query(JobAnalysis).filter(JobAnalysis.id == job_id).update(
+                        {"has_error": True, "is_processing": False}
+                    )
+                    session.commit()
+
+    @staticmethod
+    def _write(session, batch: Dict[int, _JobWrites]):
+        actions = [action for writes in batch.values() for action in writes.actions]
+        if actions:
+            session.execute(insert(ApplicationActions), actions)
+        updates = [
+            {"id": job_id, **writes.updates}
+            for job_id, writes in batch.items()
+            if writes.updates
+        ]
+        if updates:
+            session.execute(update(JobAnalysis), updates)
+
+    def close(self):
+        """Flush everything still buffered and stop the background flusher."""
+        self._closed = True
+        self._wakeup.set()
+        self.flush(include_unfinished=True)
+        _OPEN_BUFFERS.discard(self)
+
+
+def flush_open_buffers():
+    """
+    Close every open buffer, writing what its jobs have done so far. Used on
+    shutdown, so that killed jobs resume from their checkpoints.
+    """
+    for buffer in list(_OPEN_BUFFERS):
+        try:
+            buffer.close()
+        except Exception:
+            get_logger(__name__).exception("Could not flush buffered writes")
@@ -1,18 +1,45 @@
 import asyncio
+import time
+from typing import Optional
 
 from src.config.logger import get_logger
 from src.processors.lever import LeverProcessor
+from src.telemetry.metrics import REGISTRY, export_run_summary
+from src.telemetry.tracing import flush_traces
 
 logger = get_logger(__name__)
 
 
-async def _execute(installation_id: str):
+async def _execute(installation_id: str, started: float):
+    from src.jobs.worker import TASK_STARTUP_SECONDS
+
     processor = LeverProcessor(installation_id)
+    TASK_STARTUP_SECONDS.observe(time.perf_counter() - started, mode="cold")
     await processor.process()
 
 
-def execute(installation_id: str):
+def finish_run(installation_id: str) -> Optional[dict]:
+    """Flush traces, write the run summary and snapshot the run's metrics."""
+    flush_traces()
+    try:
+        path = export_run_summary(installation_id)
+        logger.info(f"Run metrics written to {path}")
+    except OSError as e:
+        logger.warning(f"Could not write run metrics: {e}")
+    return REGISTRY.snapshot()
+
+
+def execute(installation_id: str) -> Optional[dict]:
+    """
+    Process the pending jobs of an installation in a worker process.
+
+    Returns a snapshot of the metrics recorded during the run, so the API
+    process can merge it into its own registry.
+    """
+    started = time.perf_counter()
+    REGISTRY.reset()
     try:
-        return asyncio.run(_execute(installation_id))
+        asyncio.run(_execute(installation_id, started))
     except Exception as e:
         logger.exception(e)
+    return finish_run(installation_id)
@@ -0,0 +1,342 @@
+"""
+Fair-share scheduling and admission control for the API's worker pool.
+
+Every installation shares one pool of processing workers. `FairScheduler`
+keeps a queue of tasks per installation and hands them to the pool
+round-robin. It runs one task per installation at a time and never has more
+tasks in the pool than it has workers, so queued work waits here, in fair
+order, rather than in the pool's FIFO queue. A processing run covers at most
+SCHEDULER_SLICE_JOBS jobs. When jobs remain, the installation goes to the
+back of the rotation, so a user posting 2,000 links shares the workers with
+everyone else instead of holding them.
+
+`admit()` decides whether /api/listings may queue more jobs. It rejects when
+the global queue or the LLM latency is over its limit, and defers what goes
+over the installation's queue quota.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from src.config.logger import get_logger
+from src.db.model import JobAnalysis, SessionLocal
+from src.telemetry.metrics import REGISTRY
+
+# Jobs per processing run before the installation yields its worker.
+SCHEDULER_SLICE_JOBS = int(os.getenv("SCHEDULER_SLICE_JOBS", "25"))
+# Queued jobs across all installations above which /api/listings is rejected.
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "5000"))
+# Queued jobs one installation may have; links over it are deferred.
+INSTALLATION_QUEUE_QUOTA = int(os.getenv("INSTALLATION_QUEUE_QUOTA", "500"))
+# Mean LLM request latency (seconds, smoothed over recent runs) above which
+# /api/listings is rejected; 0 disables the check.
+LLM_LATENCY_LIMIT_S = float(os.getenv("LLM_LATENCY_LIMIT_S", "60"))
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "30"))
+# Weight of the latest run in the smoothed LLM latency.
+LATENCY_SMOOTHING = 0.3
+# Seconds after the last run a latency estimate still counts for admission.
+# Rejected listings start no runs, so an old estimate must not lock them out.
+LLM_LATENCY_MAX_AGE_S = float(os.getenv("LLM_LATENCY_MAX_AGE_S", "300"))
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "hermes_scheduler_queue_depth",
+    "Jobs queued for processing, per installation.",
+    ["installation_id"],
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "hermes_scheduler_wait_seconds",
+    "Time a task waits in the fair-share queue before a worker gets it.",
+    ["installation_id"],
+)
+TASKS_IN_FLIGHT = REGISTRY.gauge(
+    "hermes_scheduler_tasks_in_flight",
+    "Tasks handed to the worker pool and not finished yet.",
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "hermes_admission_rejected_total",
+    "Listings requests rejected or deferred by admission control, by reason.",
+    ["reason"],
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Admission:
+    """
+    Outcome of an admission check: how many of the new links may be queued,
+    and if not all, why and when to retry.
+    """
+
+    accepted: int
+    reason: Optional[str] = None
+    retry_after: int = ADMISSION_RETRY_AFTER_S
+
+    @property
+    def overloaded(self) -> bool:
+        return self.reason in ("queue_depth", "llm_latency")
+
+
+@dataclass
+class _Task:
+    fn: Callable
+    args: Tuple
+    is_run: bool
+    queued_at: float = field(default_factory=time.perf_counter)
+    # Jobs queued for the installation when a run was dispatched, and the
+    # attempts they had used.
+    pending: int = 0
+    attempts: int = 0
+
+
+def queue_depths() -> Dict[str, int]:
+    """Jobs waiting to be processed, per installation, also set as gauges."""
+    with SessionLocal() as session:
+        depths = dict(
+            session.query(JobAnalysis.installation_id, func.count(JobAnalysis.id))
+            .filter(
+                JobAnalysis.is_processing == True,
+                JobAnalysis.is_parked.isnot(True),
+            )
+            .group_by(JobAnalysis.installation_id)
+            .all()
+        )
+    for installation_id, depth in depths.items():
+        QUEUE_DEPTH.set(depth, installation_id=installation_id)
+    return depths
+
+
+def _queue_state(installation_id: str) -> Tuple[int, int]:
+    """
+    Jobs waiting for the installation, failed ones that will be retried
+    included, and the attempts they have used so far.
+    """
+    with SessionLocal() as session:
+        depth, attempts = (
+            session.query(
+                func.count(JobAnalysis.id),
+                func.coalesce(func.sum(JobAnalysis.attempts), 0),
+            )
+            .filter(
+                JobAnalysis.installation_id == installation_id,
+                JobAnalysis.is_processing == True,
+                JobAnalysis.is_parked.isnot(True),
+            )
+            .one()
+        )
+    QUEUE_DEPTH.set(depth, installation_id=installation_id)
+    return depth, int(attempts)
+
+
+def _mean_llm_latency(snapshot: Optional[dict]) -> Optional[float]:
+    samples = ((snapshot or {}).get("hermes_llm_request_duration_seconds") or {}).get(
+        "samples", []
+    )
+    total = sum(sample["value"][-2] for sample in samples)
+    count = sum(sample["value"][-1] for sample in samples)
+    return total / count if count else None
+
+
+class FairScheduler:
+    """
+    Round-robin dispatch of per-installation tasks to a worker pool.
+
+    Example:
+        scheduler = FairScheduler(create_worker_pool(2), max_in_flight=2)
+        scheduler.submit_run(installation_id)
+
+    Args:
+        executor: The worker pool; tasks must be picklable for it
+        max_in_flight: Tasks handed to the pool at once, usually its size
+        on_result: Called with each finished task's future, e.g. to merge
+            worker metrics
+        run_task: Processes an installation's jobs; called as
+            `run_task(installation_id, max_jobs)`
+        slice_jobs: Jobs per processing run
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_in_flight: int,
+        on_result: Optional[Callable[[Future], None]] = None,
+        run_task: Optional[Callable] = None,
+        slice_jobs: int = SCHEDULER_SLICE_JOBS,
+    ):
+        if run_task is None:
+            from src.jobs.worker import run_task
+        self.executor = executor
+        self._max_in_flight = max_in_flight
+        self._on_result = on_result
+        self._run_task = run_task
+        self._slice_jobs = slice_jobs
+        self._queues: Dict[str, Deque[_Task]] = {}
+        # Installations with queued tasks and none running, in turn order.
+        self._rotation: Deque[str] = deque()
+        self._running: Set[str] = set()
+        # Installations that got new jobs while a run of theirs was going.
+        self._rerun: Set[str] = set()
+        self._in_flight = 0
+        self._llm_latency: Optional[float] = None
+        self._llm_latency_at = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit_run(self, installation_id: str):
+        """
+        Queue processing of the installation's jobs. A run already queued
+        covers new jobs too, so at most one is queued per installation.
+        """
+        with self._lock:
+            queue = self._queues.get(installation_id)
+            if queue and any(task.is_run for task in queue):
+                return
+            if installation_id in self._running:
+                self._rerun.add(installation_id)
+                return
+            self._enqueue(installation_id, _Task(self._run_task, (), is_run=True))
+        self._dispatch()
+
+    def submit(self, installation_id: str, fn: Callable, *args):
+        """Queue a one-off task in the installation's turn."""
+        with self._lock:
+            self._enqueue(installation_id, _Task(fn, args, is_run=False))
+        self._dispatch()
+
+    def admit(self, installation_id: str, new_links: Optional[int] = None) -> Admission:
+        """
+        Check whether `new_links` more jobs may be queued for the installation.
+        Without `new_links`, accepts as many as its queue quota has room for.
+        """
+        depths = queue_depths()
+        if sum(depths.values()) >= MAX_QUEUE_DEPTH:
+            return self._reject("queue_depth")
+        if LLM_LATENCY_LIMIT_S > 0 and self._current_llm_latency() > LLM_LATENCY_LIMIT_S:
+            return self._reject("llm_latency")
+        room = max(INSTALLATION_QUEUE_QUOTA - depths.get(installation_id, 0), 0)
+        if new_links is None:
+            return Admission(accepted=room)
+        if new_links > room:
+            ADMISSION_REJECTED.inc(reason="installation_quota")
+            return Admission(accepted=room, reason="installation_quota")
+        return Admission(accepted=new_links)
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._queues.clear()
+            self._rotation.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def record_deferred(admission: Admission, deferred: int):
+        """Count links left out over the installation's quota after `admit()`."""
+        if deferred:
+            ADMISSION_REJECTED.inc(reason="installation_quota")
+            admission.reason = "installation_quota"
+
+    @staticmethod
+    def _reject(reason: str) -> Admission:
+        ADMISSION_REJECTED.inc(reason=reason)
+        logger.warning(f"Rejecting listings: {reason} over limit")
+        return Admission(accepted=0, reason=reason)
+
+    def _enqueue(self, installation_id: str, task: _Task):
+        queue = self._queues.setdefault(installation_id, deque())
+        queue.append(task)
+        if installation_id not in self._running and installation_id not in self._rotation:
+            self._rotation.append(installation_id)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if (
+                    self._closed
+                    or self._in_flight >= self._max_in_flight
+                    or not self._rotation
+                ):
+                    return
+                installation_id = self._rotation.popleft()
+                task = self._queues[installation_id].popleft()
+                if not self._queues[installation_id]:
+                    del self._queues[installation_id]
+                self._running.add(installation_id)
+                self._in_flight += 1
+                TASKS_IN_FLIGHT.set(self._in_flight)
+            QUEUE_WAIT_SECONDS.observe(
+                time.perf_counter() - task.queued_at, installation_id=installation_id
+            )
+            try:
+                if task.is_run:
+                    task.pending, task.attempts = _queue_state(installation_id)
+                    future = self.executor.submit(
+                        task.fn, installation_id, self._slice_jobs
+                    )
+                else:
+                    future = self.executor.submit(task.fn, installation_id, *task.args)
+            except Exception:
+                logger.exception(f"Could not start task for {installation_id}")
+                self._finish(installation_id, task, None)
+                continue
+            future.add_done_callback(partial(self._finish, installation_id, task))
+
+    def _finish(self, installation_id: str, task: _Task, future: Optional[Future]):
+        if future is not None and not future.cancelled():
+            if self._on_result is not None:
+                self._on_result(future)
+            if future.exception() is None:
+                self._observe_latency(future.result())
+        # Run again while the last run made progress, so a failing run does
+        # not loop, or when new jobs came in while it was going. A failed job
+        # uses up one of its MAX_JOB_ATTEMPTS, so retrying it is progress too.
+        requeue = False
+        if task.is_run and not self._closed:
+            remaining, attempts = _queue_state(installation_id)
+            requeue = remaining > 0 and (
+                remaining < task.pending or attempts > task.attempts
+            )
+        with self._lock:
+            self._in_flight -= 1
+            TASKS_IN_FLIGHT.set(self._in_flight)
+            self._running.discard(installation_id)
+            if installation_id in self._rerun:
+                self._rerun.discard(installation_id)
+                requeue = True
+            if requeue:
+                self._enqueue(installation_id, _Task(self._run_task, (), is_run=True))
+            elif self._queues.get(installation_id):
+                self._rotation.append(installation_id)
+        self._dispatch()
+
+    def _current_llm_latency(self) -> float:
+        """
+        The smoothed LLM latency, or 0 when no run is going and the last
+        sample is older than LLM_LATENCY_MAX_AGE_S.
+        """
+        with self._lock:
+            if self._llm_latency is None:
+                return 0.0
+            stale = time.monotonic() - self._llm_latency_at > LLM_LATENCY_MAX_AGE_S
+            if stale and self._in_flight == 0:
+                self._llm_latency = None
+                return 0.0
+            return self._llm_latency
+
+    def _observe_latency(self, snapshot: Optional[dict]):
+        latency = _mean_llm_latency(snapshot)
+        if latency is None:
+            return
+        with self._lock:
+            if self._llm_latency is None:
+                self._llm_latency = latency
+            else:
+                self._llm_latency += LATENCY_SMOOTHING * (latency - self._llm_latency)
+            self._llm_latency_at = time.monotonic()
@@ -0,0 +1,199 @@
+"""
+Long-lived processing workers for the API's process pool.
+
+`create_worker_pool()` starts worker processes that load the processing stack
+once in `initialize_worker()`. That covers the processor, agent, BeautifulSoup,
+pyppeteer and tqdm imports, an event loop, a LeverAgent (with its Ollama
+endpoint state), a BrowserPool that keeps Chrome running between jobs, the
+HTTP session and a database connection. Each `run_task()` pulled from the
+pool's queue reuses all of these, rather than paying for them the way
+`src.jobs.lever.execute` does per call.
+
+On SIGTERM or SIGINT a worker writes out what its running jobs have done
+(finished jobs and answered questions) before it exits, and the next run
+resumes those jobs from there. `terminate_workers()` sends the signal.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from src.config.logger import get_logger
+from src.telemetry.metrics import REGISTRY
+
+TASK_STARTUP_SECONDS = REGISTRY.histogram(
+    "hermes_task_startup_seconds",
+    "Time from a worker picking up a task until its processor is ready.",
+    ["mode"],
+)
+WORKER_INIT_SECONDS = REGISTRY.histogram(
+    "hermes_worker_init_seconds",
+    "Time a worker process spends preloading modules and connections.",
+)
+
+# Seconds a terminated worker may spend writing buffered results.
+SHUTDOWN_FLUSH_TIMEOUT_S = float(os.getenv("SHUTDOWN_FLUSH_TIMEOUT_S", "10"))
+
+logger = get_logger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_agent = None
+_browser_pool = None
+
+
+def initialize_worker():
+    """ProcessPoolExecutor initializer: warm everything tasks reuse."""
+    global _loop, _agent, _browser_pool
+    start = time.perf_counter()
+
+    import bs4  # noqa: F401
+    import pyppeteer  # noqa: F401
+    import tqdm  # noqa: F401
+    from sqlalchemy import text
+
+    from src.agents.lever import LeverAgent
+    from src.db.model import engine
+    from src.processors.lever import LeverProcessor  # noqa: F401
+    from src.processors.utils import get_http_session
+    from src.web.lever import BrowserPool
+
+    # Connections inherited through fork belong to the parent process.
+    engine.dispose(close=False)
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _agent = LeverAgent()
+    _browser_pool = BrowserPool()
+    try:
+        _loop.run_until_complete(_browser_pool.get())
+    except Exception as e:
+        logger.warning(f"Could not prelaunch the browser: {e}")
+    get_http_session()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    atexit.register(_shutdown_worker)
+    # Replace the handlers inherited from the API process through fork.
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    signal.signal(signal.SIGINT, _handle_sigterm)
+
+    WORKER_INIT_SECONDS.observe(time.perf_counter() - start)
+    logger.debug(
+        "Worker ready", extra={"init_s": round(time.perf_counter() - start, 3)}
+    )
+
+
+def _handle_sigterm(signum, frame):
+    """Write buffered results, then exit without finishing the running jobs."""
+    from src.db.writer import flush_open_buffers
+
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Flush from another thread: the interrupted main thread may hold a
+    # buffer's lock, and then the timeout lets the worker exit anyway.
+    flusher = threading.Thread(target=flush_open_buffers, daemon=True)
+    flusher.start()
+    flusher.join(SHUTDOWN_FLUSH_TIMEOUT_S)
+    if flusher.is_alive():
+        logger.warning("Exiting before buffered results were written")
+    os._exit(0)
+
+
+def _shutdown_worker():
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        _loop.run_until_complete(_browser_pool.close())
+    except Exception:
+        pass
+    _loop.close()
+
+
+async def _process(installation_id: str, started: float, max_jobs: Optional[int]):
+    from src.processors.lever import LeverProcessor
+
+    processor = LeverProcessor(
+        installation_id, agent=_agent, browser_pool=_browser_pool
+    )
+    TASK_STARTUP_SECONDS.observe(time.perf_counter() - started, mode="warm")
+    await processor.process(limit=max_jobs)
+
+
+def run_task(installation_id: str, max_jobs: Optional[int] = None) -> Optional[dict]:
+    """
+    Process an installation's pending jobs, or its `max_jobs` most urgent
+    ones, on this worker's warm state.
+
+    Returns a snapshot of the metrics recorded during the run, like
+    `src.jobs.lever.execute`.
+    """
+    from src.jobs.lever import finish_run
+
+    started = time.perf_counter()
+    if _loop is None:
+        initialize_worker()
+    REGISTRY.reset()
+    try:
+        _loop.run_until_complete(_process(installation_id, started, max_jobs))
+    except Exception as e:
+        logger.exception(e)
+    return finish_run(installation_id)
+
+
+def refine_search_queries(
+    installation_id: str, resume: str, preferences: str
+) -> Optional[dict]:
+    """
+    Ask the LLM for search queries and add the ones the installation's
+    template queries do not already cover.
+
+    Returns a snapshot of the metrics recorded during the call.
+    """
+    from src.db.model import SessionLocal
+    from src.models.api import InstallRequest
+    from src.processors.search_queries import save_search_queries
+
+    if _loop is None:
+        initialize_worker()
+    REGISTRY.reset()
+    try:
+        queries = _agent.generate_google_searches(
+            InstallRequest(
+                installation_id=installation_id, resume=resume, preferences=preferences
+            )
+        )
+        with SessionLocal() as session:
+            save_search_queries(session, installation_id, queries, source="llm")
+            session.commit()
+    except Exception as e:
+        logger.exception(e)
+    return REGISTRY.snapshot()
+
+
+def terminate_workers(executor: ProcessPoolExecutor):
+    """
+    Send SIGTERM to the pool's workers, so they checkpoint and exit. Call it
+    before `executor.shutdown()`, which clears the process table.
+    """
+    # ProcessPoolExecutor has no public way to reach its workers, and
+    # shutdown(wait=False, cancel_futures=True) only cancels queued tasks: a
+    # worker in the middle of a job would run it to the end. `_processes` is
+    # private (None after shutdown), hence the getattr and the `or {}`.
+    for process in list((getattr(executor, "_processes", {}) or {}).values()):
+        try:
+            process.terminate()
+        except Exception:
+            pass
+
+
+def create_worker_pool(
+    max_workers: int = 2, mp_context: Optional[multiprocessing.context.BaseContext] = None
+) -> ProcessPoolExecutor:
+    """A process pool whose workers run `initialize_worker()` once at start."""
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=mp_context, initializer=initialize_worker
+    )
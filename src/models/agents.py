@@ -65,3 +65,9 @@ class AgentAction(BaseModel):
         default=None,
         description="The answer value. This is not required for 'click' actions.",
     )
+
+
+class IndexedAgentAction(AgentAction):
+    """AgentAction answering one question of a batched form request."""
+
+    index: int = Field(description="Index of the question this action answers.")
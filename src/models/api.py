@@ -28,6 +28,13 @@ class ListingsRequest(BaseModel):
     links: list[str]
 
 
+class LeverPostingsRequest(BaseModel):
+    installation_id: str
+    companies: list[str] = []
+    keywords: Optional[list[str]] = None
+    locations: list[str] = []
+
+
 class StatusRequest(BaseModel):
     installation_id: str
 
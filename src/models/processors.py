@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
 
 from src.models.agents import AgentAction
 
@@ -6,3 +8,14 @@ from src.models.agents import AgentAction
 class LeverQuestion(BaseModel):
     action: AgentAction
     question_html: str
+
+
+class ResumeProfile(BaseModel):
+    """Contact fields and highlights parsed from a resume without the LLM."""
+
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    links: Dict[str, str] = Field(default_factory=dict)
+    skills: List[str] = Field(default_factory=list)
+    years_of_experience: Optional[int] = None
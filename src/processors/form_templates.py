@@ -0,0 +1,148 @@
+"""
+Fingerprints of Lever application forms, so postings that share a form
+template share its extraction and query selectors.
+
+Many companies use the same form, or the same custom question cards, for
+every posting. A question's structure is its label and the names, types and
+options of its visible fields; a form's fingerprint hashes the structure of
+all its questions. Posting-specific values (hidden ids, prefilled text) are
+left out, so the same template hashes the same on every posting.
+
+Selectors are learned per question from LLM answers and reused while only
+the values are personalized. Questions for contact fields (email, phone,
+profile links) are then filled from the installation profile without an LLM
+call.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from src.models.agents import AgentAction
+
+_SPACE = re.compile(r"\s+")
+# Text field name -> installation profile value, for Lever's standard fields
+# the resume parser extracts reliably. The name is a guess from the resume's
+# first line, so the Name field is left to the LLM.
+_PROFILE_FIELDS = {
+    "email": lambda profile: profile.get("email"),
+    "phone": lambda profile: profile.get("phone"),
+    "urls[linkedin]": lambda profile: (profile.get("links") or {}).get("linkedin"),
+    "urls[github]": lambda profile: (profile.get("links") or {}).get("github"),
+    "urls[portfolio]": lambda profile: (profile.get("links") or {}).get("website"),
+}
+_TEXT_TYPES = ("text", "email", "tel", "url")
+# Click selectors pick the chosen option, so they depend on the answer.
+_REUSABLE_ACTIONS = ("type", "select")
+
+
+def _normalize(text: str) -> str:
+    return _SPACE.sub(" ", text.replace("✱", "")).strip().lower()
+
+
+def question_structure(question_html: str) -> dict:
+    """Label and visible fields (name, type, options) of one form question."""
+    soup = BeautifulSoup(question_html, "html.parser")
+    label = soup.select_one(".application-label") or soup
+    fields: Dict[tuple, List[str]] = {}
+    for element in soup.select("input, select, textarea"):
+        if element.name == "input":
+            kind = (element.get("type") or "text").lower()
+        else:
+            kind = element.name
+        if kind in ("hidden", "submit", "button", "file"):
+            continue
+        options = fields.setdefault((element.get("name") or element.get("id") or "", kind), [])
+        if kind in ("radio", "checkbox"):
+            options.append(element.get("value", ""))
+        elif kind == "select":
+            options.extend(
+                option.get("value", option.get_text(strip=True))
+                for option in element.find_all("option")
+            )
+    return {
+        "label": _normalize(label.get_text(" ", strip=True)),
+        "fields": [[name, kind, options] for (name, kind), options in fields.items()],
+    }
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def question_key(question_html: str) -> str:
+    """Identifies a question's structure within and across templates."""
+    return _digest(question_structure(question_html))[:16]
+
+
+def form_fingerprint(questions_html: List[str]) -> str:
+    """Hash of the structure of every question of a form, in order."""
+    return _digest([question_structure(question) for question in questions_html])
+
+
+def learned_selector(question_html: str, action: AgentAction) -> Optional[dict]:
+    """
+    The template entry to remember for an answered question: its action,
+    selector and question text. None for click actions and for selectors
+    that match nothing in the question.
+    """
+    if action.action not in _REUSABLE_ACTIONS:
+        return None
+    try:
+        found = BeautifulSoup(question_html, "html.parser").select_one(action.query_selector)
+    except Exception:
+        return None
+    if found is None:
+        return None
+    return {
+        "action": action.action,
+        "query_selector": action.query_selector,
+        "question_text": action.question_text,
+    }
+
+
+def with_template_selector(
+    question_html: str, action: AgentAction, selectors: Dict[str, dict]
+) -> Optional[AgentAction]:
+    """The LLM's answer with the template's selector, or None without one."""
+    entry = selectors.get(question_key(question_html))
+    if action.action not in _REUSABLE_ACTIONS or entry is None:
+        return None
+    if entry["action"] != action.action:
+        return None
+    return action.model_copy(update={"query_selector": entry["query_selector"]})
+
+
+def profile_action(
+    question_html: str, selectors: Dict[str, dict], profile: Optional[dict]
+) -> Optional[AgentAction]:
+    """
+    Answer a contact field question from the installation profile, when the
+    template knows its selector and the profile has the value.
+    """
+    if not profile:
+        return None
+    structure = question_structure(question_html)
+    if len(structure["fields"]) != 1:
+        return None
+    name, kind, _ = structure["fields"][0]
+    value_of = _PROFILE_FIELDS.get(name.lower())
+    entry = selectors.get(_digest(structure)[:16])
+    if value_of is None or kind not in _TEXT_TYPES:
+        return None
+    if entry is None or entry["action"] != "type":
+        return None
+    value = value_of(profile)
+    if not value:
+        return None
+    return AgentAction(
+        action="type",
+        question_text=entry["question_text"],
+        query_selector=entry["query_selector"],
+        value=value,
+    )
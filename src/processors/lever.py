@@ -1,30 +1,126 @@
-from typing import AsyncIterator, List, Optional
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+from src.agents.concurrency import AIMDLimiter
 from src.agents.lever import AgentAction, LeverAgent
+from src.agents.router import track_usage
 from src.config.logger import get_logger
 from src.db.model import (
     ApplicationActions,
     JobAnalysis,
+    Posting,
     SessionLocal,
     InstalledExtensions,
 )
+from src.db.form_templates import (
+    add_template_selectors,
+    get_template_selectors,
+    save_form_template,
+)
+from src.db.postings import get_or_create_postings
+from src.db.profiles import get_installation_profile
+from src.db.writer import WriteBehindBuffer
+from src.models.agents import JobDetails
 from src.models.processors import LeverQuestion
-from src.processors.utils import clean_url
-from src.web.lever import LeverAutoBrowser, LeverBrowser
+from src.processors.form_templates import (
+    form_fingerprint,
+    learned_selector,
+    profile_action,
+    question_key,
+    with_template_selector,
+)
+from src.processors.relevance import RelevanceScorer, is_parked, record_parked
+from src.processors.utils import clean_url, get_http_session
+from src.telemetry.metrics import JOBS_PROCESSED, REGISTRY, timed
+from src.web.lever import BrowserPool, LeverAutoBrowser, LeverBrowser
+
+POSTING_CACHE = REGISTRY.counter(
+    "hermes_posting_cache_total",
+    "Shared posting work reused from another installation (hit) or done now (miss).",
+    ["stage", "result"],
+)
+FORM_PROMPT_TOKENS = REGISTRY.histogram(
+    "hermes_form_prompt_tokens",
+    "Prompt tokens sent to answer all questions of one application form.",
+    ["mode"],
+    buckets=(1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, float("inf")),
+)
+FORM_TEMPLATES = REGISTRY.counter(
+    "hermes_form_template_total",
+    "Forms and question selectors found in a known form template (hit) or not (miss).",
+    ["stage", "result"],
+)
+PROFILE_ANSWERS = REGISTRY.counter(
+    "hermes_profile_answers_total",
+    "Form questions answered from the installation profile without an LLM call.",
+)
+ANSWERS_RESUMED = REGISTRY.counter(
+    "hermes_answers_resumed_total",
+    "Form answers kept from an interrupted or failed attempt at the same job.",
+)
+TIME_TO_FIRST_READY = REGISTRY.histogram(
+    "hermes_time_to_first_ready_seconds",
+    "Time from an installation's jobs being queued until the first is ready to apply.",
+    buckets=(1, 2, 5, 10, 20, 30, 60, 120, 300, 600, float("inf")),
+)
+# Jobs whose relevance differs by less than this are ordered by freshness.
+RELEVANCE_PRIORITY_STEP = float(os.getenv("RELEVANCE_PRIORITY_STEP", "0.05"))
+# Questions answered per LLM call; 1 disables batching.
+FILLER_BATCH_SIZE = int(os.getenv("FILLER_BATCH_SIZE", "20"))
+# Jobs of a run processed at once. Their Ollama calls and browser pages are
+# bounded separately, by OLLAMA_CONCURRENCY_* and BROWSER_CONCURRENCY_*.
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+# Times a job is tried before it is left failed.
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+BROWSER_CONCURRENCY_INITIAL = int(os.getenv("BROWSER_CONCURRENCY_INITIAL", "2"))
+BROWSER_CONCURRENCY_MAX = int(os.getenv("BROWSER_CONCURRENCY_MAX", "4"))
+
+
+def _is_browser_timeout(error: BaseException) -> bool:
+    # pyppeteer's TimeoutError does not derive from the builtin one.
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError)) or (
+        type(error).__name__ == "TimeoutError"
+    )
+
+
+BROWSER_LIMITER = AIMDLimiter(
+    "browser",
+    initial=BROWSER_CONCURRENCY_INITIAL,
+    minimum=1,
+    maximum=BROWSER_CONCURRENCY_MAX,
+    is_overload=_is_browser_timeout,
+)
 
 
 class LeverProcessor:
-    def __init__(self, installation_id: str):
-        self._agent = LeverAgent()
+    browser_class = LeverBrowser
+
+    def __init__(
+        self,
+        installation_id: str,
+        agent: Optional[LeverAgent] = None,
+        browser_pool: Optional[BrowserPool] = None,
+    ):
+        self._agent = agent or LeverAgent()
+        self._browser_pool = browser_pool
         self._logger = get_logger(__name__)
         self._installation_id = installation_id
         self._headless_mode = True
+        self._writer = WriteBehindBuffer()
         self._installation_data = self._get_installation_data()
+        self._relevance = RelevanceScorer(
+            self._installation_data["resume"], self._installation_data["preferences"]
+        )
+        # Form template fingerprint -> learned selectors, for this run.
+        self._templates: Dict[str, Dict[str, dict]] = {}
 
     def _get_installation_data(self):
         with SessionLocal() as session:
@@ -35,36 +131,176 @@ class LeverProcessor:
             )
             if not record:
                 raise ValueError(f"{self._installation_id} not found in database")
+            profile = get_installation_profile(
+                session, record.installation_id, record.resume, record.preferences
+            )
+            session.commit()
             return {
                 "installation_id": record.installation_id,
                 "resume": record.resume,
                 "preferences": record.preferences,
+                "profile": profile["profile"],
+                "system_prompt": profile["system_prompt"],
             }
 
-    async def process_questions(
-        self, link: str, page_text: str
-    ) -> AsyncIterator[LeverQuestion]:
+    @staticmethod
+    def _apply_link(link: str) -> str:
         apply_link = clean_url(link)
         if not apply_link.endswith("/apply"):
             apply_link = f"{apply_link}/apply"
-        extractor = LeverBrowser(apply_link, headless=self._headless_mode)
-        form_html = await extractor.open_and_get_form_html()
-        questions_html = extractor.get_questions_html(form_html)
-        self._logger.info(f"Found {len(questions_html)} questions")
-        for question_html in tqdm(questions_html):
-            try:
-                resume, preferences = (
-                    self._installation_data["resume"],
-                    self._installation_data["preferences"],
-                )
-                action = self._agent.generate_action(
-                    question_html, page_text, resume, preferences
-                )
-                yield LeverQuestion(action=action, question_html=question_html)
-            except Exception:
-                self._logger.exception(
-                    f"Error processing question:\n\n{question_html}.\n"
+        return apply_link
+
+    async def _extract_questions_html(self, link: str) -> List[str]:
+        apply_link = self._apply_link(link)
+        extractor = self.browser_class(
+            apply_link, headless=self._headless_mode, browser_pool=self._browser_pool
+        )
+        async with BROWSER_LIMITER.async_slot("extract_questions"):
+            with timed("extract_questions"):
+                form_html = await extractor.open_and_get_form_html()
+                return extractor.get_questions_html(form_html)
+
+    async def _fetch_form_questions(self, apply_link: str) -> Optional[List[str]]:
+        """Question HTML of the apply page's form as served, without a browser."""
+        try:
+            with timed("form_fetch"):
+                response = await asyncio.to_thread(
+                    get_http_session().get, apply_link, timeout=30
                 )
+                response.raise_for_status()
+            form = BeautifulSoup(response.text, "html.parser").select_one(
+                "#application-form"
+            )
+        except Exception as e:
+            self._logger.debug(f"Could not fetch form of {apply_link}: {e}")
+            return None
+        if form is None:
+            return None
+        return self.browser_class(apply_link).get_questions_html(form.decode_contents())
+
+    def _template_selectors(self, fingerprint: str) -> Optional[Dict[str, dict]]:
+        if fingerprint not in self._templates:
+            with SessionLocal() as session:
+                selectors = get_template_selectors(session, fingerprint)
+            if selectors is None:
+                return None
+            self._templates[fingerprint] = selectors
+        return self._templates[fingerprint]
+
+    async def _form_questions(self, link: str) -> Tuple[List[str], str]:
+        """
+        Question HTML of a posting's form and its fingerprint. When the form
+        served with the apply page matches a known template, Chrome is not
+        needed; otherwise the form is extracted in the browser and recorded
+        as a new template.
+        """
+        questions_html = await self._fetch_form_questions(self._apply_link(link))
+        if questions_html:
+            fingerprint = form_fingerprint(questions_html)
+            if self._template_selectors(fingerprint) is not None:
+                FORM_TEMPLATES.inc(stage="extraction", result="hit")
+                return questions_html, fingerprint
+        FORM_TEMPLATES.inc(stage="extraction", result="miss")
+        questions_html = await self._extract_questions_html(link)
+        return questions_html, self._save_template(questions_html)
+
+    def _save_template(self, questions_html: List[str]) -> str:
+        fingerprint = form_fingerprint(questions_html)
+        with SessionLocal() as session:
+            save_form_template(session, fingerprint, questions_html)
+            with timed("db_commit"):
+                session.commit()
+        return fingerprint
+
+    def _learn_selectors(self, fingerprint: str, selectors: Dict[str, dict]):
+        with SessionLocal() as session:
+            add_template_selectors(session, fingerprint, selectors)
+            with timed("db_commit"):
+                session.commit()
+        known = self._templates.setdefault(fingerprint, {})
+        for key, entry in selectors.items():
+            known.setdefault(key, entry)
+
+    async def process_questions(
+        self,
+        questions_html: List[str],
+        page_text: str,
+        selectors: Optional[Dict[str, dict]] = None,
+    ) -> AsyncIterator[LeverQuestion]:
+        """
+        Answer form questions. With the selectors of the form's template,
+        contact fields are filled from the profile without the LLM, and the
+        LLM's answers keep the template's selectors.
+        """
+        self._logger.debug(f"Found {len(questions_html)} questions")
+        resume, preferences, system_prompt = (
+            self._installation_data["resume"],
+            self._installation_data["preferences"],
+            self._installation_data["system_prompt"],
+        )
+        selectors = selectors or {}
+        unanswered = []
+        for question_html in questions_html:
+            action = profile_action(
+                question_html, selectors, self._installation_data["profile"]
+            )
+            if action is None:
+                unanswered.append(question_html)
+                continue
+            PROFILE_ANSWERS.inc()
+            yield LeverQuestion(action=action, question_html=question_html)
+        questions_html = unanswered
+        mode = "batch" if FILLER_BATCH_SIZE > 1 else "single"
+        with track_usage() as usage:
+            for start in range(0, len(questions_html), max(FILLER_BATCH_SIZE, 1)):
+                batch = questions_html[start : start + max(FILLER_BATCH_SIZE, 1)]
+                actions: List[Optional[AgentAction]] = [None] * len(batch)
+                if len(batch) > 1:
+                    try:
+                        actions = await asyncio.to_thread(
+                            self._agent.generate_actions,
+                            batch,
+                            page_text,
+                            resume,
+                            preferences,
+                            system_prompt,
+                        )
+                    except Exception:
+                        self._logger.exception(
+                            "Batched answers failed, answering questions one by one"
+                        )
+                for question_html, action in zip(tqdm(batch), actions):
+                    if action is None:
+                        try:
+                            action = await asyncio.to_thread(
+                                self._agent.generate_action,
+                                question_html,
+                                page_text,
+                                resume,
+                                preferences,
+                                system_prompt,
+                            )
+                        except Exception:
+                            self._logger.exception(
+                                f"Error processing question:\n\n{question_html}.\n"
+                            )
+                            continue
+                    if action.action != "click":
+                        templated = with_template_selector(question_html, action, selectors)
+                        FORM_TEMPLATES.inc(
+                            stage="selector", result="miss" if templated is None else "hit"
+                        )
+                        action = templated or action
+                    yield LeverQuestion(action=action, question_html=question_html)
+        FORM_PROMPT_TOKENS.observe(usage.prompt_tokens, mode=mode)
+        self._logger.debug(
+            "Answered form questions",
+            extra={
+                "questions": len(questions_html),
+                "llm_calls": usage.calls,
+                "prompt_tokens": usage.prompt_tokens,
+            },
+        )
 
     def _validate_lever_url(self, url: str) -> bool:
         try:
@@ -78,7 +314,115 @@ class LeverProcessor:
         except Exception:
             return False
 
-    async def process_job(self, job_data: dict):
+    @staticmethod
+    def _posting_job_info(posting: Posting) -> Optional[JobDetails]:
+        if not posting.title:
+            return None
+        return JobDetails.model_validate(
+            {
+                field: getattr(posting, field)
+                for field in JobDetails.model_fields
+                if getattr(posting, field) is not None
+            }
+        )
+
+    def _get_posting(self, job_data: dict, link: str) -> dict:
+        with SessionLocal() as session:
+            posting = None
+            if job_data.get("posting_id"):
+                posting = session.get(Posting, job_data["posting_id"])
+            if posting is None:
+                posting = get_or_create_postings(session, [link])[link]
+                session.commit()
+            return {
+                "id": posting.id,
+                "page_text": posting.page_text,
+                "questions_html": posting.questions_html,
+                "form_fingerprint": posting.form_fingerprint,
+                "job_info": self._posting_job_info(posting),
+            }
+
+    @staticmethod
+    def _answered_questions(job_id: int) -> Dict[str, str]:
+        """Question text by question HTML of the answers a job already has."""
+        with SessionLocal() as session:
+            return dict(
+                session.query(
+                    ApplicationActions.question_html, ApplicationActions.question_text
+                ).filter(ApplicationActions.job_analysis_id == job_id)
+            )
+
+    def _save_posting(self, posting_id: int, updates: dict):
+        """Postings are shared across installations, so they are written at once."""
+        with SessionLocal() as session:
+            session.query(Posting).filter(Posting.id == posting_id).update(updates)
+            with timed("db_commit"):
+                session.commit()
+
+    def _park(self, job_id: int, score: float, stage: str, posting: dict):
+        questions_html = posting.get("questions_html") or []
+        record_parked(
+            stage, posting.get("job_info") is not None, len(questions_html), FILLER_BATCH_SIZE
+        )
+        updates = {"is_parked": True, "is_processing": False, "relevance_score": score}
+        if posting.get("job_info") is not None:
+            updates.update(posting["job_info"].model_dump())
+        self._writer.update_job(job_id, updates, final=True)
+        JOBS_PROCESSED.inc(outcome="parked")
+
+    def _park_if_irrelevant(
+        self, job_data: dict, page_text: Optional[str], posting: dict, stage: str
+    ) -> bool:
+        """Score a posting not scored in the batch pass, and park it when it does not fit."""
+        if not page_text or "relevance_score" in job_data:
+            return False
+        score = float(self._relevance.score([page_text])[0])
+        job_data["relevance_score"] = score
+        if not is_parked(score):
+            return False
+        self._park(job_data["id"], score, stage, posting)
+        return True
+
+    def _prefilter(self, data_list: List[dict]) -> List[dict]:
+        """
+        Score every job whose posting text is already known in one batch and
+        park the ones below RELEVANCE_THRESHOLD before any per-job work.
+        """
+        with SessionLocal() as session:
+            postings = {
+                posting.id: posting
+                for posting in session.query(Posting).filter(
+                    Posting.id.in_([data["posting_id"] for data in data_list]),
+                    Posting.page_text.isnot(None),
+                )
+            }
+        known = [data for data in data_list if data["posting_id"] in postings]
+        if not known:
+            return data_list
+        with timed("relevance_prefilter"):
+            scores = self._relevance.score(
+                [postings[data["posting_id"]].page_text for data in known]
+            )
+        parked = set()
+        for data, score in zip(known, scores):
+            data["relevance_score"] = float(score)
+            if is_parked(score):
+                posting = postings[data["posting_id"]]
+                parked.add(data["id"])
+                self._park(
+                    data["id"],
+                    float(score),
+                    "batch",
+                    {
+                        "questions_html": posting.questions_html,
+                        "job_info": self._posting_job_info(posting),
+                    },
+                )
+        return [data for data in data_list if data["id"] not in parked]
+
+    async def process_job(self, job_data: dict) -> bool:
+        """Process one job; returns True when it is ready to apply."""
+        start_time = time.time()
         link = job_data["link"]
         job_id = job_data["id"]
         if link.endswith("/apply"):
@@ -87,65 +431,223 @@ class LeverProcessor:
         if not self._validate_lever_url(link):
             raise ValueError(f"Invalid Lever job URL format: {link}")
 
-        r = requests.get(link)
+        posting = self._get_posting(job_data, link)
+        page_text, job_info = posting["page_text"], posting["job_info"]
+        if job_info is None:
+            POSTING_CACHE.inc(stage="job_info", result="miss")
+            # Postings parked for another installation keep their page text
+            # but not job details; relevance is scored per installation.
+            if page_text:
+                POSTING_CACHE.inc(stage="page_text", result="hit")
+                if self._park_if_irrelevant(job_data, page_text, posting, "cached"):
+                    return False
+            else:
+                POSTING_CACHE.inc(stage="page_text", result="miss")
+                with timed("http_fetch"):
+                    r = await asyncio.to_thread(get_http_session().get, link, timeout=30)
+                    r.raise_for_status()
 
-        r.raise_for_status()
+                with timed("html_parse"):
+                    soup = BeautifulSoup(r.text, "html.parser")
+                    page_text = soup.get_text()
+                if self._park_if_irrelevant(job_data, page_text, posting, "fetched"):
+                    self._save_posting(posting["id"], {"page_text": page_text})
+                    return False
+            job_info = await asyncio.to_thread(self._agent.generate_job_info, page_text)
+            self._save_posting(
+                posting["id"], {**job_info.model_dump(), "page_text": page_text}
+            )
+        else:
+            POSTING_CACHE.inc(stage="job_info", result="hit")
+            if self._park_if_irrelevant(job_data, page_text, posting, "cached"):
+                return False
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        page_text = soup.get_text()
-        job_info = self._agent.generate_job_info(page_text)
         is_unknown = job_info.title.lower() == "unknown"
-        with SessionLocal() as session:
-            updates = job_info.model_dump()
-            if is_unknown:
-                updates["is_processing"] = False
-            session.query(JobAnalysis).filter(JobAnalysis.id == job_id).update(updates)
-            session.commit()
+        updates = {
+            **job_info.model_dump(),
+            "posting_id": posting["id"],
+            "relevance_score": job_data.get("relevance_score"),
+        }
+        if is_unknown:
+            updates["is_processing"] = False
+        self._writer.update_job(job_id, updates, final=is_unknown)
 
         if is_unknown:
-            return
+            JOBS_PROCESSED.inc(outcome="unknown")
+            return False
 
-        questions = [answer async for answer in self.process_questions(link, page_text)]
+        questions_html, fingerprint = posting["questions_html"], posting["form_fingerprint"]
+        if questions_html is None:
+            POSTING_CACHE.inc(stage="questions", result="miss")
+            questions_html, fingerprint = await self._form_questions(link)
+            self._save_posting(
+                posting["id"],
+                {"questions_html": questions_html, "form_fingerprint": fingerprint},
+            )
+        else:
+            POSTING_CACHE.inc(stage="questions", result="hit")
+            if fingerprint is None:
+                # Extracted before form templates were recorded.
+                fingerprint = self._save_template(questions_html)
+                self._save_posting(posting["id"], {"form_fingerprint": fingerprint})
+        selectors = self._template_selectors(fingerprint) or {}
 
-        with SessionLocal() as session:
-            db_actions = [
-                ApplicationActions(
-                    job_analysis_id=job_id,
-                    question_html=question.question_html,
-                    question_text=question.action.question_text,
-                    answer_text=question.action.value,
-                    action=question.action.action,
-                    query_selector=question.action.query_selector,
+        # Answers are checkpointed one by one, so a job that was interrupted
+        # or failed only asks for the questions it has no answer to yet.
+        answered = self._answered_questions(job_id)
+        if answered:
+            ANSWERS_RESUMED.inc(len(answered))
+        unanswered = [html for html in questions_html if html not in answered]
+        questions = len(answered)
+        learned = {}
+        with timed("process_questions"):
+            async for question in self.process_questions(
+                unanswered, page_text, selectors
+            ):
+                key = question_key(question.question_html)
+                if key not in selectors:
+                    entry = learned_selector(question.question_html, question.action)
+                    if entry is not None:
+                        learned[key] = entry
+                self._writer.add_actions(
+                    job_id,
+                    [
+                        {
+                            "question_html": question.question_html,
+                            "question_text": question.action.question_text,
+                            "answer_text": question.action.value,
+                            "action": question.action.action,
+                            "query_selector": question.action.query_selector,
+                        }
+                    ],
                 )
-                for question in questions
-            ]
-            session.add_all(db_actions)
-            session.commit()
+                questions += 1
 
-            session.query(JobAnalysis).filter(JobAnalysis.id == job_id).update(
-                {"is_processing": False}
+        if learned:
+            self._learn_selectors(fingerprint, learned)
+        self._writer.update_job(
+            job_id, {"is_processing": False, "has_error": False}, final=True
+        )
+        JOBS_PROCESSED.inc(outcome="success")
+
+        duration_s = round(time.time() - start_time, 3)
+        self._logger.info(
+            "Processed job %s: %d questions, %d resumed, %.3fs",
+            job_id,
+            questions,
+            len(answered),
+            duration_s,
+            extra={
+                "job_id": job_id,
+                "questions": questions,
+                "resumed": len(answered),
+                "duration_s": duration_s,
+            },
+        )
+        return True
+
+    @staticmethod
+    def _priority(data: dict):
+        """
+        Sort key: jobs that have not failed before first, then those whose
+        relevance is known, most relevant first (in RELEVANCE_PRIORITY_STEP
+        bands), then the most recently posted, then the most recently queued.
+        """
+        score = data.get("relevance_score")
+        posted_at = data.get("posted_at")
+        return (
+            bool(data.get("has_error")),
+            score is None,
+            -math.floor((score or 0.0) / RELEVANCE_PRIORITY_STEP),
+            -(posted_at.timestamp() if posted_at else 0.0),
+            -data["id"],
+        )
+
+    def _record_first_ready(self, queued_at: Optional[datetime]):
+        # Users can start applying once one job is written, so don't leave it
+        # waiting in the write-behind buffer.
+        self._writer.flush()
+        if queued_at is not None:
+            if queued_at.tzinfo is None:
+                queued_at = queued_at.replace(tzinfo=timezone.utc)
+            TIME_TO_FIRST_READY.observe(
+                max(0.0, (datetime.now(timezone.utc) - queued_at).total_seconds())
             )
-            session.commit()
 
-    async def process(self):
+    async def process(self, limit: Optional[int] = None):
+        """
+        Process the installation's queued jobs in priority order.
+
+        Args:
+            limit: Process at most this many jobs; the rest stay queued for
+                the next run
+        """
         with SessionLocal() as session:
             records = (
-                session.query(JobAnalysis)
+                session.query(JobAnalysis, Posting.posted_at)
+                .outerjoin(Posting, Posting.id == JobAnalysis.posting_id)
                 .filter(
                     JobAnalysis.installation_id == self._installation_id,
-                    JobAnalysis.title == "processing...",
+                    # Queued, interrupted and failed jobs with attempts left.
+                    JobAnalysis.is_processing == True,
+                    JobAnalysis.is_parked.isnot(True),
                 )
                 .all()
             )
-            data_list = [{"link": record.link, "id": record.id} for record in records]
-
-        for data in data_list:
-            try:
-                await self.process_job(data)
-            except Exception as e:
-                job_id = data["id"]
-                self._logger.exception(f"Job [{data}] Error: {e}")
-                with SessionLocal() as session:
-                    session.query(JobAnalysis).filter(JobAnalysis.id == job_id).update(
-                        {"has_error": True, "is_processing": False}
-                    )
+            data_list = [
+                {
+                    "link": record.link,
+                    "id": record.id,
+                    "posting_id": record.posting_id,
+                    "posted_at": posted_at,
+                    "has_error": record.has_error,
+                    "attempts": record.attempts or 0,
+                }
+                for record, posted_at in records
+            ]
+            queued_at = min(
+                (record.created_at for record, _ in records if record.created_at),
+                default=None,
+            )
+
+        with self._writer:
+            data_list = sorted(self._prefilter(data_list), key=self._priority)[:limit]
+            # Workers take jobs in priority order; blocking calls run in threads.
+            pending = iter(data_list)
+            first_ready = False
+
+            async def work():
+                nonlocal first_ready
+                for data in pending:
+                    if await self._process_one(data) and not first_ready:
+                        first_ready = True
+                        self._record_first_ready(queued_at)
+
+            await asyncio.gather(
+                *(work() for _ in range(max(1, min(JOB_CONCURRENCY, len(data_list)))))
+            )
+
+    async def _process_one(self, data: dict) -> bool:
+        try:
+            with timed(
+                "process_job",
+                job_analysis_id=data["id"],
+                installation_id=self._installation_id,
+            ):
+                return await self.process_job(data)
+        except Exception as e:
+            JOBS_PROCESSED.inc(outcome="error")
+            self._logger.exception(f"Job [{data}] Error: {e}")
+            # The job stays queued, behind the others, until it has failed
+            # MAX_JOB_ATTEMPTS times.
+            attempts = data["attempts"] + 1
+            self._writer.update_job(
+                data["id"],
+                {
+                    "has_error": True,
+                    "is_processing": attempts < MAX_JOB_ATTEMPTS,
+                    "attempts": attempts,
+                },
+                final=True,
+            )
+            return False
@@ -0,0 +1,327 @@
+"""
+Bulk ingestion of Lever postings from the public postings API.
+
+One request per company (`{LEVER_API_URL}/{company}?mode=json`) returns every
+open posting with its title, categories and description, so matching
+postings get their job details without a page fetch or LLM extraction.
+Workers then only extract and answer the application form.
+
+    python -m src.processors.lever_postings --installation <id> acme globex --keyword "backend engineer"
+    LEVER_API_URL=http://127.0.0.1:8090/v0/postings python -m src.processors.lever_postings --installation <id>
+"""
+
+import argparse
+import html
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy.orm import Session
+
+from src.config.logger import get_logger
+from src.db.model import (
+    InstalledExtensions,
+    JobAnalysis,
+    JobGoogleSearchQuery,
+    Posting,
+    SessionLocal,
+)
+from src.db.postings import get_or_create_postings
+from src.processors.search_queries import bare_role
+from src.processors.utils import clean_url, get_http_session
+from src.telemetry.metrics import REGISTRY, timed
+
+LEVER_API_URL = os.getenv("LEVER_API_URL", "https://api.lever.co/v0/postings").rstrip("/")
+
+LEVER_API_POSTINGS = REGISTRY.counter(
+    "hermes_lever_api_postings_total",
+    "Postings returned by the Lever postings API, by whether they matched the filters.",
+    ["result"],
+)
+
+logger = get_logger(__name__)
+
+_TAG = re.compile(r"<[^>]+>")
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+
+def company_slug(link: str) -> Optional[str]:
+    """The company slug of a jobs.lever.co link, e.g. `acme` for /acme/<id>."""
+    parts = urlsplit(link)
+    path = parts.path.strip("/").split("/")
+    if "lever.co" not in parts.netloc or len(path) < 2 or not path[0]:
+        return None
+    return path[0]
+
+
+def _plain(text: Optional[str]) -> str:
+    return html.unescape(_TAG.sub(" ", text or "")).strip()
+
+
+def _salary(raw: dict) -> str:
+    salary = raw.get("salaryRange") or {}
+    if salary.get("min") is None and salary.get("max") is None:
+        return raw.get("salaryDescriptionPlain") or "unknown"
+    amounts = "-".join(
+        f"{amount:,}" for amount in (salary.get("min"), salary.get("max")) if amount is not None
+    )
+    # e.g. per-year-salary, per-hour-wage, one-time
+    interval = re.sub(r"-(salary|wage)$", "", salary.get("interval") or "").replace("-", " ")
+    return " ".join(part for part in (salary.get("currency"), amounts, interval) if part)
+
+
+def _location(raw: dict) -> str:
+    categories = raw.get("categories") or {}
+    locations = categories.get("allLocations") or [categories.get("location")]
+    location = ", ".join(dict.fromkeys(filter(None, locations)))
+    if raw.get("workplaceType") == "remote" and "remote" not in location.lower():
+        location = f"{location} (Remote)" if location else "Remote"
+    return location or "unknown"
+
+
+def parse_posting(raw: dict, company: str) -> dict:
+    """
+    Map a postings API entry to Posting columns: the JobDetails fields plus
+    link, posted_at and page_text, the text used as the job description in
+    prompts.
+    """
+    categories = raw.get("categories") or {}
+    sections = [raw.get("descriptionPlain") or _plain(raw.get("description"))]
+    for item in raw.get("lists") or []:
+        content = _plain(item.get("content", "").replace("</li>", "\n"))
+        sections.append(f"{item.get('text', '')}\n{content}")
+    sections.append(raw.get("additionalPlain") or _plain(raw.get("additional")))
+    description = "\n\n".join(section.strip() for section in sections if section.strip())
+
+    title = raw.get("text") or "unknown"
+    location = _location(raw)
+    header = " | ".join(
+        filter(None, [title, location, categories.get("team"), categories.get("commitment")])
+    )
+    return {
+        "link": clean_url(raw.get("hostedUrl") or f"https://jobs.lever.co/{company}/{raw['id']}"),
+        "title": title,
+        "location": location,
+        "company": company.replace("-", " ").title(),
+        "salary": _salary(raw),
+        "description": description or "unknown",
+        "page_text": f"{header}\n\n{description}",
+        "posted_at": (
+            datetime.fromtimestamp(raw["createdAt"] / 1000, tz=timezone.utc)
+            if raw.get("createdAt")
+            else None
+        ),
+    }
+
+
+def matches(
+    posting: dict, keywords: Iterable[str] = (), locations: Iterable[str] = ()
+) -> bool:
+    """
+    A posting matches when its title contains every word of any keyword
+    phrase, and its location contains any of the locations. Empty filters
+    match everything.
+    """
+    keywords, locations = list(keywords), list(locations)
+    if keywords:
+        title_words = set(_WORD.findall(posting["title"].lower()))
+        if not any(
+            set(_WORD.findall(keyword.lower())) <= title_words for keyword in keywords
+        ):
+            return False
+    if locations:
+        location = posting["location"].lower()
+        if not any(wanted.lower() in location for wanted in locations):
+            return False
+    return True
+
+
+def fetch_company_postings(company: str) -> List[dict]:
+    """All open postings of a company, as returned by the postings API."""
+    with timed("lever_api_fetch"):
+        response = get_http_session().get(
+            f"{LEVER_API_URL}/{company}", params={"mode": "json"}, timeout=30
+        )
+        response.raise_for_status()
+    return response.json()
+
+
+def _default_companies(session: Session, installation_id: str) -> List[str]:
+    links = session.query(JobAnalysis.link).filter(
+        JobAnalysis.installation_id == installation_id
+    )
+    return sorted({slug for (link,) in links if (slug := company_slug(link))})
+
+
+def _default_keywords(session: Session, installation_id: str) -> List[str]:
+    """
+    The role focus of the installation's search queries, without seniority:
+    every keyword word has to be in a posting's title, and most titles do not
+    say "Senior".
+    """
+    role_focus = session.query(JobGoogleSearchQuery.role_focus).filter(
+        JobGoogleSearchQuery.installation_id == installation_id
+    )
+    roles = (bare_role(role) for (role,) in role_focus)
+    return list(dict.fromkeys(role for role in roles if role))
+
+
+def _relevance_scores(
+    session: Session, installation_id: str, texts: List[str]
+) -> List[Optional[float]]:
+    from src.processors.relevance import RelevanceScorer
+
+    installation = (
+        session.query(InstalledExtensions)
+        .filter(InstalledExtensions.installation_id == installation_id)
+        .one_or_none()
+    )
+    if installation is None or not texts:
+        return [None] * len(texts)
+    scorer = RelevanceScorer(installation.resume, installation.preferences)
+    with timed("relevance_prefilter"):
+        return [float(score) for score in scorer.score(texts)]
+
+
+def ingest_postings(
+    installation_id: str,
+    companies: Optional[List[str]] = None,
+    keywords: Optional[List[str]] = None,
+    locations: Optional[List[str]] = None,
+    max_added: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Fetch the postings of each company, keep those matching the filters, fill
+    in their shared Posting rows and queue them for the installation.
+
+    Companies default to those of the installation's known links, and
+    keywords to the role focus of its search queries. With `max_added`, at
+    most that many jobs are queued, most relevant first; the rest are not
+    stored, so a later call can queue them.
+
+    Returns:
+        Counts of companies, failed companies, postings found, postings
+        matched, jobs added, jobs parked by the relevance prefilter and
+        postings deferred over `max_added`
+    """
+    from src.processors.relevance import is_parked, record_parked
+
+    stats = {
+        "companies": 0,
+        "failed": 0,
+        "found": 0,
+        "matched": 0,
+        "added": 0,
+        "parked": 0,
+        "deferred": 0,
+    }
+    with SessionLocal() as session:
+        if not companies:
+            companies = _default_companies(session, installation_id)
+        if keywords is None:
+            keywords = _default_keywords(session, installation_id)
+
+        matched: Dict[str, dict] = {}
+        for company in dict.fromkeys(companies):
+            stats["companies"] += 1
+            try:
+                raw_postings = fetch_company_postings(company)
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Could not fetch Lever postings of {company}: {e}")
+                continue
+            for raw in raw_postings:
+                stats["found"] += 1
+                posting = parse_posting(raw, company)
+                if matches(posting, keywords, locations or ()):
+                    LEVER_API_POSTINGS.inc(result="matched")
+                    matched[posting["link"]] = posting
+                else:
+                    LEVER_API_POSTINGS.inc(result="filtered")
+        stats["matched"] = len(matched)
+
+        postings = get_or_create_postings(session, list(matched))
+        for link, posting in postings.items():
+            if posting.title is None:
+                session.query(Posting).filter(Posting.id == posting.id).update(
+                    {key: value for key, value in matched[link].items() if key != "link"}
+                )
+        existing = {
+            link
+            for (link,) in session.query(JobAnalysis.link).filter(
+                JobAnalysis.installation_id == installation_id,
+                JobAnalysis.link.in_(list(matched)),
+            )
+        }
+        new_links = [link for link in matched if link not in existing]
+        scores = _relevance_scores(
+            session, installation_id, [matched[link]["page_text"] for link in new_links]
+        )
+        ranked = sorted(
+            zip(new_links, scores),
+            key=lambda item: -item[1] if item[1] is not None else 0.0,
+        )
+        records = []
+        for link, score in ranked:
+            parked = score is not None and is_parked(score)
+            if not parked and max_added is not None and stats["added"] >= max_added:
+                stats["deferred"] += 1
+                continue
+            record = JobAnalysis(
+                link=link,
+                posting_id=postings[link].id,
+                title="processing...",
+                expired=False,
+                installation_id=installation_id,
+                is_processing=True,
+                relevance_score=score,
+            )
+            if parked:
+                record_parked("ingest", job_info_cached=True)
+                details = {
+                    key: value
+                    for key, value in matched[link].items()
+                    if key not in ("link", "page_text", "posted_at")
+                }
+                for key, value in details.items():
+                    setattr(record, key, value)
+                record.is_processing = False
+                record.is_parked = True
+                stats["parked"] += 1
+            else:
+                stats["added"] += 1
+            records.append(record)
+        session.add_all(records)
+        session.commit()
+
+    logger.info("Ingested Lever postings", extra={"installation_id": installation_id, **stats})
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--installation", required=True)
+    parser.add_argument("companies", nargs="*", help="Company slugs (default: from known links)")
+    parser.add_argument("--keyword", action="append", dest="keywords")
+    parser.add_argument("--location", action="append", dest="locations")
+    parser.add_argument(
+        "--process", action="store_true", help="Process the added jobs afterwards"
+    )
+    args = parser.parse_args(argv)
+
+    stats = ingest_postings(args.installation, args.companies, args.keywords, args.locations)
+    print(
+        f"{stats['companies']} companies ({stats['failed']} failed), "
+        f"{stats['found']} postings, {stats['matched']} matched, {stats['added']} added, "
+        f"{stats['parked']} parked, {stats['deferred']} deferred"
+    )
+    if args.process and stats["added"]:
+        from src.jobs.lever import execute
+
+        execute(args.installation)
+
+
+if __name__ == "__main__":
+    main()
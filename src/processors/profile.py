@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from src.agents.prompt_builder import collapse_whitespace, truncate_to_tokens
+from src.config.prompts import FILLER_AGENT_SYSTEM_PROMPT
+from src.models.processors import ResumeProfile
+
+# Token cap of the condensed resume placed in filler prompts.
+PROFILE_RESUME_TOKENS = int(os.getenv("PROFILE_RESUME_TOKENS", "1500"))
+# Bumped when parsing changes, so stored profiles are rebuilt.
+PROFILE_VERSION = 2
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_LINKS = {
+    "linkedin": re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/in/[\w%-]+/?", re.I),
+    "github": re.compile(r"(?:https?://)?(?:www\.)?github\.com/[\w-]+/?", re.I),
+}
+_URL = re.compile(r"https?://[^\s|,;)]+", re.I)
+_SKILLS_LINE = re.compile(
+    r"^\s*(?:technical\s+)?(?:skills|technologies|tech stack)\s*[:\-–]\s*(.+)$",
+    re.I | re.M,
+)
+_SKILLS_HEADER = re.compile(r"^\s*(?:technical\s+)?skills\s*:?\s*$", re.I)
+_YEARS = re.compile(r"(\d{1,2})\+?\s*(?:years|yrs)", re.I)
+_YEAR_RANGE = re.compile(
+    r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)", re.I
+)
+_BULLET = re.compile(r"^[\s•●▪◦*·-]+")
+_NAME_WORD = re.compile(r"^[A-ZÀ-Þ][\w'’.-]*$")
+# Words of headlines and titles that often open a resume instead of the name.
+_NOT_NAME_WORDS = {
+    "senior", "junior", "staff", "lead", "principal", "head", "chief", "intern",
+    "engineer", "developer", "scientist", "architect", "designer", "analyst",
+    "manager", "director", "consultant", "specialist", "administrator", "sre",
+    "software", "backend", "frontend", "full-stack", "fullstack", "data",
+    "resume", "résumé", "cv", "curriculum", "vitae", "profile", "summary",
+}
+
+
+def resume_hash(resume: str, preferences: str) -> str:
+    """Identifies the inputs a profile was built from, and the parser version."""
+    return hashlib.sha256(
+        f"{PROFILE_VERSION}\0{resume}\0{preferences}".encode("utf-8")
+    ).hexdigest()
+
+
+def _split_skills(text: str) -> List[str]:
+    return [
+        skill.strip(" .")
+        for skill in re.split(r"[,;|•/]", text)
+        if 0 < len(skill.strip(" .")) <= 40
+    ]
+
+
+def _years_of_experience(resume: str) -> Optional[int]:
+    stated = [int(years) for years in _YEARS.findall(resume) if 0 < int(years) <= 50]
+    if stated:
+        return max(stated)
+    starts = [int(start) for start, _ in _YEAR_RANGE.findall(resume)]
+    if starts:
+        return max(0, datetime.now().year - min(starts))
+    return None
+
+
+def _name(line: str) -> Optional[str]:
+    """`line` if it reads like a person's name: 2-4 capitalized words, no title words."""
+    words = line.split()
+    if not 2 <= len(words) <= 4:
+        return None
+    if any(not _NAME_WORD.match(word) or word.lower() in _NOT_NAME_WORDS for word in words):
+        return None
+    return line
+
+
+def parse_profile(resume: str) -> ResumeProfile:
+    """Pull contact fields, links, skills and experience out of resume text."""
+    lines = [line.strip() for line in resume.splitlines() if line.strip()]
+
+    name = _name(lines[0]) if lines else None
+
+    links = {}
+    for key, pattern in _LINKS.items():
+        match = pattern.search(resume)
+        if match:
+            links[key] = match.group(0)
+    for url in _URL.findall(resume):
+        if url not in links.values() and "website" not in links:
+            links["website"] = url
+
+    skills: List[str] = []
+    for match in _SKILLS_LINE.finditer(resume):
+        skills.extend(_split_skills(match.group(1)))
+    for index, line in enumerate(lines):
+        if _SKILLS_HEADER.match(line):
+            for skill_line in lines[index + 1 : index + 6]:
+                if skill_line.endswith(":") or len(skill_line) > 200:
+                    break
+                skills.extend(_split_skills(_BULLET.sub("", skill_line)))
+            break
+
+    email = _EMAIL.search(resume)
+    phone = _PHONE.search(resume)
+    return ResumeProfile(
+        name=name,
+        email=email.group(0) if email else None,
+        phone=phone.group(0).strip() if phone else None,
+        links=links,
+        skills=list(dict.fromkeys(skills)),
+        years_of_experience=_years_of_experience(resume),
+    )
+
+
+def condense_resume(resume: str, profile: ResumeProfile) -> str:
+    """
+    Resume text for prompts: the parsed profile first, then the resume with
+    bullets, repeated lines and extra whitespace removed, capped at
+    PROFILE_RESUME_TOKENS.
+    """
+    header = [
+        f"{label}: {value}"
+        for label, value in (
+            ("Name", profile.name),
+            ("Email", profile.email),
+            ("Phone", profile.phone),
+            ("Links", ", ".join(profile.links.values())),
+            ("Years of experience", profile.years_of_experience),
+            ("Skills", ", ".join(profile.skills)),
+        )
+        if value
+    ]
+    body = []
+    seen = set()
+    for line in collapse_whitespace(resume).split("\n"):
+        line = _BULLET.sub("", line).strip()
+        if line and line.lower() not in seen:
+            seen.add(line.lower())
+            body.append(line)
+    summary = "\n".join(header) + "\n\n" + "\n".join(body)
+    return truncate_to_tokens(summary.strip(), PROFILE_RESUME_TOKENS)
+
+
+def build_profile(resume: str, preferences: str) -> dict:
+    """
+    Build everything prompts need from an installation's resume and
+    preferences once, instead of for every question.
+
+    Returns:
+        Dict with resume_hash, profile, resume_summary and system_prompt
+    """
+    profile = parse_profile(resume)
+    summary = condense_resume(resume, profile)
+    return {
+        "resume_hash": resume_hash(resume, preferences),
+        "profile": profile.model_dump(),
+        "resume_summary": summary,
+        "system_prompt": FILLER_AGENT_SYSTEM_PROMPT.format(
+            resume=summary, preferences=collapse_whitespace(preferences)
+        ),
+    }
@@ -0,0 +1,138 @@
+"""
+Resume-to-posting relevance scoring, used to park postings that clearly do
+not fit before any browser or LLM work is spent on them.
+
+Texts are turned into hashed word unigram and bigram counts (stable crc32
+buckets, so scores match across processes) with stopwords removed,
+weighted with sublinear TF, L2-normalised, and compared with one sparse
+matrix product against the installation's resume and preferences. There is
+no batch IDF, so a posting's score does not depend on what it was scored
+with and one threshold holds for every batch.
+"""
+
+import math
+import os
+import re
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from src.telemetry.metrics import REGISTRY
+
+# Postings scoring below this cosine similarity are parked; 0 disables parking.
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.05"))
+RELEVANCE_FEATURES = int(os.getenv("RELEVANCE_FEATURES", str(2**18)))
+# Preferences are short but say the most about fit, so they count extra.
+PREFERENCES_WEIGHT = 2.0
+
+RELEVANCE_SCORE = REGISTRY.histogram(
+    "hermes_relevance_score",
+    "Cosine similarity between posting text and the installation's resume and preferences.",
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0),
+)
+POSTINGS_PARKED = REGISTRY.counter(
+    "hermes_postings_parked_total",
+    "Postings parked by the relevance prefilter instead of processed, by stage.",
+    ["stage"],
+)
+LLM_CALLS_AVOIDED = REGISTRY.counter(
+    "hermes_relevance_llm_calls_avoided_total",
+    "Estimated LLM calls not made because their posting was parked, by task.",
+    ["task"],
+)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_STOPWORDS = frozenset(
+    "a about all also an and any are as at be been but by can do for from has have "
+    "how if in into is it its may more most must not of on or our out over so such "
+    "than that the their them then there these they this to up us we what when where "
+    "which who will with within you your".split()
+)
+_buckets: Dict[str, int] = {}
+
+
+def _bucket(term: str) -> int:
+    index = _buckets.get(term)
+    if index is None:
+        if len(_buckets) > 500_000:
+            _buckets.clear()
+        index = _buckets[term] = zlib.crc32(term.encode("utf-8")) % RELEVANCE_FEATURES
+    return index
+
+
+def _terms(text: str) -> List[str]:
+    words = [word for word in _TOKEN.findall(text.lower()) if word not in _STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _counts(texts: Sequence[str], weights: Sequence[float]) -> sparse.csr_matrix:
+    indptr, indices, data = [0], [], []
+    for text, weight in zip(texts, weights):
+        row: Dict[int, float] = {}
+        for term in _terms(text):
+            index = _bucket(term)
+            row[index] = row.get(index, 0.0) + weight
+        indices.extend(row)
+        data.extend(row.values())
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), indptr),
+        shape=(len(texts), RELEVANCE_FEATURES),
+    )
+
+
+def _normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+
+class RelevanceScorer:
+    """
+    Scores posting texts against one installation's resume and preferences.
+
+    Example:
+        scorer = RelevanceScorer(resume, preferences)
+        scores = scorer.score(page_texts)
+        parked = scores < RELEVANCE_THRESHOLD
+    """
+
+    def __init__(self, resume: str, preferences: str):
+        # One document: the resume and preferences together.
+        counts = _counts([resume, preferences], [1.0, PREFERENCES_WEIGHT])
+        query = sparse.csr_matrix(counts.sum(axis=0))
+        query.data = 1.0 + np.log(query.data)
+        self._query = _normalize(query)
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of each text to the resume and preferences, in [0, 1]."""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        postings = _counts(texts, [1.0] * len(texts))
+        # Sublinear TF: a term repeated 20 times is not 20 times as relevant.
+        postings.data = 1.0 + np.log(postings.data)
+        postings = _normalize(postings)
+        scores = np.asarray(postings.dot(self._query.T).todense()).ravel()
+        for value in scores:
+            RELEVANCE_SCORE.observe(float(value))
+        return scores
+
+
+def is_parked(score: float) -> bool:
+    return RELEVANCE_THRESHOLD > 0 and score < RELEVANCE_THRESHOLD
+
+
+def record_parked(stage: str, job_info_cached: bool, questions: int = 0, batch_size: int = 1):
+    """
+    Count a parked posting and the LLM calls it would have taken: job detail
+    extraction unless already cached, and the form's answer calls (at least
+    one when the form has not been extracted yet).
+    """
+    POSTINGS_PARKED.inc(stage=stage)
+    if not job_info_cached:
+        LLM_CALLS_AVOIDED.inc(task="job_info")
+    LLM_CALLS_AVOIDED.inc(
+        max(1, math.ceil(questions / max(batch_size, 1))), task="form_answers"
+    )
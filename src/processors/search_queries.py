@@ -0,0 +1,238 @@
+"""
+Template-based Google search queries for /api/install.
+
+Builds the queries GOOGLE_SEARCH_PROMPT asks the LLM for (site:jobs.lever.co,
+a quoted role focus, seniority and tech OR-groups, location and minus
+terms) from keywords found locally in the resume, preferences and parsed
+profile, so install returns in milliseconds. The LLM's queries can be added
+later with `save_search_queries`.
+"""
+
+import re
+from collections import Counter
+from typing import Iterable, List, Optional
+from urllib.parse import quote_plus
+
+from sqlalchemy.orm import Session
+
+from src.db.model import JobGoogleSearchQuery as JobGoogleSearchQueryRecord
+from src.models.agents import JobGoogleSearchQuery
+from src.models.processors import ResumeProfile
+from src.telemetry.metrics import REGISTRY
+
+SEARCH_QUERIES = REGISTRY.counter(
+    "hermes_search_queries_total",
+    "Google search queries stored for installations, by source.",
+    ["source"],
+)
+
+MAX_QUERIES = 6
+MAX_TECH_TERMS = 4
+
+_SENIORITY = ("intern", "junior", "mid", "senior", "staff", "lead", "principal")
+_ROLE = re.compile(
+    r"\b((?:(?:senior|staff|lead|principal|junior)[ \t]+)?"
+    r"(?:[a-z+#.]+[ \t]+){0,2}?"
+    r"(?:engineer|developer|scientist|architect|designer|analyst|manager|sre))s?\b",
+    re.I,
+)
+_ROLE_STOPWORDS = {
+    "a", "an", "and", "as", "at", "for", "in", "of", "or", "the", "to", "with",
+    "roles", "role", "no", "not", "remote", "hybrid",
+}
+_FOCUS = re.compile(
+    r"\b(backend|back-end|frontend|front-end|full[- ]stack|platform|data|machine learning|ml"
+    r"|infrastructure|mobile|devops|security)\s+(?:roles|positions|jobs|engineering)\b",
+    re.I,
+)
+_TECH = {
+    "python", "django", "flask", "fastapi", "go", "golang", "rust", "java", "kotlin",
+    "scala", "ruby", "rails", "node", "node.js", "typescript", "javascript", "react",
+    "vue", "angular", "c++", "c#", ".net", "php", "swift", "postgresql", "postgres",
+    "mysql", "redis", "kafka", "spark", "airflow", "aws", "gcp", "azure", "docker",
+    "kubernetes", "terraform", "graphql", "pytorch", "tensorflow", "ml", "llm",
+}
+_LOCATIONS = (
+    "remote", "hybrid", "united states", "canada", "europe", "london", "berlin",
+    "new york", "san francisco", "toronto", "emea", "apac",
+)
+# Matched case-sensitively, so "join us" is not a location.
+_COUNTRY_CODES = re.compile(r"\b(US|USA|UK|EU)\b")
+_TRAILING_NOUNS = {"role", "roles", "position", "positions", "job", "jobs", "work"}
+_EXCLUDE = re.compile(
+    r"\b(?:no|not|exclude|excluding|without|avoid)\s+([a-z][a-z\s,/-]{2,40}?)(?=[.;\n]|$)",
+    re.I,
+)
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9+#.]+", text.lower())
+
+
+def _role_focuses(resume: str, preferences: str) -> List[str]:
+    """Role titles, most mentioned first; preferences outrank the resume."""
+    counts: Counter = Counter()
+    for match in _FOCUS.finditer(preferences):
+        focus = match.group(1).lower().replace("-", "").replace("full stack", "full-stack")
+        focus = "machine learning" if focus == "ml" else focus
+        counts[f"{focus} engineer"] += 3
+    for text, weight in ((preferences, 3), (resume, 1)):
+        for match in _ROLE.finditer(text):
+            words = [
+                word
+                for word in match.group(1).lower().split()
+                if word not in _ROLE_STOPWORDS and word not in _SENIORITY
+            ]
+            if words:
+                counts[" ".join(words)] += weight
+    return [role.title() for role, _ in counts.most_common()]
+
+
+def bare_role(role_focus: str) -> str:
+    """
+    A role focus without its seniority words, e.g. "Backend Engineer" for
+    "Senior Backend Engineer".
+    """
+    return " ".join(word for word in role_focus.split() if word.lower() not in _SENIORITY)
+
+
+def _seniority(preferences: str, profile: ResumeProfile) -> List[str]:
+    stated = [level for level in _SENIORITY if level in _words(preferences)]
+    if stated:
+        return stated
+    years = profile.years_of_experience
+    if years is None:
+        return []
+    if years >= 8:
+        return ["senior", "staff"]
+    if years >= 4:
+        return ["senior"]
+    if years < 2:
+        return ["junior"]
+    return []
+
+
+def _tech(resume: str, preferences: str, profile: ResumeProfile) -> List[str]:
+    counts = Counter(
+        word for word in _words(f"{preferences} {preferences} {resume}") if word in _TECH
+    )
+    for skill in profile.skills:
+        if skill.lower() in _TECH:
+            counts[skill.lower()] += 2
+    return [term for term, _ in counts.most_common(MAX_TECH_TERMS)]
+
+
+def _locations(preferences: str) -> List[str]:
+    text = f" {' '.join(re.findall(r'[a-z]+', preferences.lower()))} "
+    found = [location for location in _LOCATIONS if f" {location} " in text]
+    return list(dict.fromkeys(found + _COUNTRY_CODES.findall(preferences)))
+
+
+def _exclusions(preferences: str) -> List[str]:
+    terms = []
+    for match in _EXCLUDE.finditer(preferences):
+        for term in re.split(r"[,/]|\bor\b|\band\b", match.group(1).lower()):
+            words = term.split()
+            # "no sales, no agency roles" repeats the negation per term.
+            while words and words[0] in ("no", "not"):
+                words.pop(0)
+            while words and words[-1] in _TRAILING_NOUNS:
+                words.pop()
+            if 0 < len(words) <= 2:
+                terms.append(" ".join(words))
+    return list(dict.fromkeys(terms))
+
+
+def _or_group(terms: Iterable[str], quote: bool = False) -> str:
+    terms = [f'"{term}"' if quote and " " in term else term for term in terms]
+    if not terms:
+        return ""
+    return f"({' OR '.join(terms)})"
+
+
+def build_search_queries(
+    resume: str, preferences: str, profile: Optional[ResumeProfile] = None
+) -> List[JobGoogleSearchQuery]:
+    """
+    Compose up to MAX_QUERIES Lever search queries without the LLM: one per
+    role focus, plus two narrower tech splits when fewer than three roles
+    were found.
+    """
+    profile = profile or ResumeProfile()
+    roles = _role_focuses(resume, preferences)[:MAX_QUERIES] or ["Software Engineer"]
+    seniority = _seniority(preferences, profile)
+    tech = _tech(resume, preferences, profile)
+    locations = _locations(preferences)
+    exclude = _exclusions(preferences)
+    if seniority and "intern" not in seniority and "intern" not in exclude:
+        exclude.append("intern")
+
+    filters = {
+        key: value
+        for key, value in (
+            ("seniority", " OR ".join(seniority)),
+            ("tech", " OR ".join(tech)),
+            ("location", " OR ".join(locations)),
+            ("exclude", " OR ".join(exclude)),
+        )
+        if value
+    }
+    minus = " ".join(f'-"{term}"' if " " in term else f"-{term}" for term in exclude)
+
+    slices = [(role, tech) for role in roles]
+    if len(roles) < 3 and len(tech) > 2:
+        # A second slice per stack half, so the queries are not all alike.
+        slices.append((roles[0], tech[: len(tech) // 2]))
+        slices.append((roles[0], tech[len(tech) // 2 :]))
+
+    queries = []
+    for role, role_tech in slices[:MAX_QUERIES]:
+        parts = [
+            "site:jobs.lever.co",
+            f'("{role}")',
+            _or_group(seniority),
+            _or_group(role_tech),
+            _or_group(locations, quote=True),
+            minus,
+        ]
+        query = " ".join(part for part in parts if part)
+        queries.append(
+            JobGoogleSearchQuery(
+                site="lever",
+                role_focus=" ".join(seniority[:1] + [role]).title(),
+                filters={**filters, "tech": " OR ".join(role_tech)} if role_tech else filters,
+                query=query,
+                google_search_url=f"https://www.google.com/search?q={quote_plus(query)}",
+            )
+        )
+    return list({query.query: query for query in queries}.values())
+
+
+def save_search_queries(
+    session: Session,
+    installation_id: str,
+    queries: List[JobGoogleSearchQuery],
+    source: str,
+) -> List[JobGoogleSearchQueryRecord]:
+    """Add the queries the installation does not have yet; not committed."""
+    existing = {
+        query
+        for (query,) in session.query(JobGoogleSearchQueryRecord.query).filter(
+            JobGoogleSearchQueryRecord.installation_id == installation_id
+        )
+    }
+    records = [
+        JobGoogleSearchQueryRecord(
+            installation_id=installation_id,
+            site=query.site,
+            role_focus=query.role_focus,
+            filters=query.filters,
+            query=query.query,
+            google_search_url=query.google_search_url,
+        )
+        for query in queries
+        if query.query not in existing
+    ]
+    session.add_all(records)
+    SEARCH_QUERIES.inc(len(records), source=source)
+    return records
@@ -1,3 +1,25 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+_http_session = None
+
+
+def get_http_session() -> "requests.Session":
+    """Process-wide HTTP session, so posting fetches reuse connections."""
+    global _http_session
+    if _http_session is None:
+        import requests
+
+        _http_session = requests.Session()
+        # Jobs run concurrently, each with its own fetches and Ollama calls.
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=32)
+        _http_session.mount("http://", adapter)
+        _http_session.mount("https://", adapter)
+    return _http_session
+
+
 def clean_url(url: str) -> str:
     from urllib.parse import urlsplit, urlunsplit
 
@@ -0,0 +1,131 @@
+"""
+Offline profiling of recorded job traces.
+
+    python -m src.telemetry.cli slowest --installation <id> --limit 10
+    python -m src.telemetry.cli flame --installation <id>
+    python -m src.telemetry.cli flame --job <job_analysis_id> --folded > job.folded
+"""
+
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.db.model import JobAnalysis, SessionLocal, TraceSpan
+
+
+def _load_spans(
+    installation_id: Optional[str] = None, job_id: Optional[int] = None
+) -> List[TraceSpan]:
+    with SessionLocal() as session:
+        query = session.query(TraceSpan).filter(TraceSpan.job_analysis_id.isnot(None))
+        if installation_id:
+            query = query.filter(TraceSpan.installation_id == installation_id)
+        if job_id is not None:
+            query = query.filter(TraceSpan.job_analysis_id == job_id)
+        return query.all()
+
+
+def _stage_paths(spans: List[TraceSpan]) -> Dict[Tuple[str, ...], Tuple[float, float]]:
+    """Aggregate spans by their name path: (total ms, self ms)."""
+    by_id = {(span.trace_id, span.span_id): span for span in spans}
+    child_time = defaultdict(float)
+    for span in spans:
+        if span.parent_span_id:
+            child_time[(span.trace_id, span.parent_span_id)] += span.duration_ms
+
+    totals: Dict[Tuple[str, ...], List[float]] = defaultdict(lambda: [0.0, 0.0])
+    for span in spans:
+        path = [span.name]
+        parent = by_id.get((span.trace_id, span.parent_span_id))
+        while parent is not None:
+            path.append(parent.name)
+            parent = by_id.get((parent.trace_id, parent.parent_span_id))
+        key = tuple(reversed(path))
+        self_ms = max(span.duration_ms - child_time[(span.trace_id, span.span_id)], 0)
+        totals[key][0] += span.duration_ms
+        totals[key][1] += self_ms
+    return {key: (value[0], value[1]) for key, value in totals.items()}
+
+
+def print_slowest(installation_id: Optional[str], limit: int):
+    spans = _load_spans(installation_id)
+    roots = sorted(
+        (span for span in spans if span.name == "process_job"),
+        key=lambda span: span.duration_ms,
+        reverse=True,
+    )[:limit]
+    if not roots:
+        print("No job traces recorded.")
+        return
+
+    stages = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        if span.parent_span_id and span.name != "process_questions":
+            stages[span.trace_id][span.name] += span.duration_ms
+
+    with SessionLocal() as session:
+        links = dict(
+            session.query(JobAnalysis.id, JobAnalysis.link).filter(
+                JobAnalysis.id.in_([root.job_analysis_id for root in roots])
+            )
+        )
+
+    print(f"{'job':>6} {'total_s':>9} {'status':<6} top stages / link")
+    for root in roots:
+        top = sorted(stages[root.trace_id].items(), key=lambda i: i[1], reverse=True)
+        top_text = ", ".join(f"{name} {ms / 1000:.1f}s" for name, ms in top[:3])
+        print(
+            f"{root.job_analysis_id:>6} {root.duration_ms / 1000:>9.2f} "
+            f"{root.status:<6} {top_text}"
+        )
+        print(f"{'':>23}{links.get(root.job_analysis_id, '')}")
+
+
+def print_flame(installation_id: Optional[str], job_id: Optional[int], folded: bool):
+    paths = _stage_paths(_load_spans(installation_id, job_id))
+    if not paths:
+        print("No job traces recorded.")
+        return
+
+    if folded:
+        # Brendan Gregg's folded format, usable with flamegraph.pl or speedscope.
+        for path, (_, self_ms) in sorted(paths.items()):
+            print(f"{';'.join(path)} {int(self_ms * 1000)}")
+        return
+
+    grand_total = sum(total for path, (total, _) in paths.items() if len(path) == 1)
+    print(f"{'stage':<48} {'total_s':>9} {'self_s':>9} {'share':>7}")
+    for path, (total, self_ms) in sorted(paths.items()):
+        share = total / grand_total if grand_total else 0
+        label = "  " * (len(path) - 1) + path[-1]
+        bar = "#" * int(share * 20)
+        print(
+            f"{label:<48} {total / 1000:>9.2f} {self_ms / 1000:>9.2f} "
+            f"{share:>6.1%} {bar}"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    slowest = subparsers.add_parser("slowest", help="List the slowest jobs")
+    slowest.add_argument("--installation")
+    slowest.add_argument("--limit", type=int, default=10)
+
+    flame = subparsers.add_parser("flame", help="Per-stage time breakdown")
+    flame.add_argument("--installation")
+    flame.add_argument("--job", type=int)
+    flame.add_argument(
+        "--folded", action="store_true", help="Print folded stacks for flame graphs"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "slowest":
+        print_slowest(args.installation, args.limit)
+    else:
+        print_flame(args.installation, args.job, args.folded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.telemetry.tracing import span
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    math.inf,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def load(self, key: LabelValues, value: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.samples().items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down; merged snapshots replace it."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def load(self, key: LabelValues, value: float):
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+
+    def load(self, key: LabelValues, state: List[float]):
+        with self._lock:
+            current = self._values.get(key)
+            if current is None:
+                self._values[key] = list(state)
+            else:
+                self._values[key] = [a + b for a, b in zip(current, state)]
+
+    def quantile(self, q: float, state: List[float]) -> Optional[float]:
+        """Estimate a quantile from bucket counts, like PromQL histogram_quantile."""
+        total = state[-1]
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0.0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            count = state[i]
+            if cumulative + count >= rank and count > 0:
+                if bound == math.inf:
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self.samples().items()):
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics store.
+
+    Worker processes record into their own registry and hand a snapshot back
+    to the API process, which merges it so `/metrics` covers the whole
+    pipeline.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Counter:
+        return self._get_or_create(Counter, name, documentation, tuple(labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, tuple(labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, tuple(labelnames), buckets
+        )
+
+    def reset(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            with metric._lock:
+                metric._values.clear()
+
+    def snapshot(self) -> dict:
+        """Return all samples as plain JSON-serialisable data."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "kind": metric.kind,
+                "samples": [
+                    {"labels": list(key), "value": value}
+                    for key, value in metric.samples().items()
+                ],
+            }
+            for metric in metrics
+        }
+
+    def merge(self, snapshot: Optional[dict]):
+        """Add the samples of a snapshot taken in another process."""
+        if not snapshot:
+            return
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, data in snapshot.items():
+            metric = metrics.get(name)
+            if metric is None or metric.kind != data["kind"]:
+                continue
+            for sample in data["samples"]:
+                metric.load(tuple(sample["labels"]), sample["value"])
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Summarise histograms (count, total, mean, p50, p95) and counters."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result = {}
+        for metric in metrics:
+            entries = []
+            for key, value in metric.samples().items():
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    count, total = value[-1], value[-2]
+                    entries.append(
+                        {
+                            "labels": labels,
+                            "count": int(count),
+                            "total_s": round(total, 4),
+                            "mean_s": round(total / count, 4) if count else None,
+                            "p50_s": metric.quantile(0.5, value),
+                            "p95_s": metric.quantile(0.95, value),
+                        }
+                    )
+                else:
+                    entries.append({"labels": labels, "value": value})
+            if entries:
+                result[metric.name] = entries
+        return result
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "hermes_stage_duration_seconds",
+    "Wall time spent in each processing stage.",
+    ["stage"],
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "hermes_stage_errors_total",
+    "Processing stages that raised an exception.",
+    ["stage"],
+)
+JOBS_PROCESSED = REGISTRY.counter(
+    "hermes_jobs_processed_total",
+    "Jobs handled by the processor, by outcome.",
+    ["outcome"],
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "hermes_http_request_duration_seconds",
+    "API request latency.",
+    ["method", "endpoint", "status"],
+)
+
+
+@contextmanager
+def timed(stage: str, **attributes: Any):
+    """
+    Time the enclosed block into hermes_stage_duration_seconds{stage=...} and
+    record it as a trace span named after the stage.
+    """
+    start = time.perf_counter()
+    try:
+        with span(stage, **attributes):
+            yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def export_run_summary(run_name: str, directory: Optional[str] = None) -> Path:
+    """
+    Write the current registry summary to ``<METRICS_DIR>/<run_name>-<ts>.json``.
+
+    Args:
+        run_name: Identifies the run, usually the installation id
+        directory: Output directory, defaults to METRICS_DIR (data/metrics)
+
+    Returns:
+        Path of the written file
+    """
+    directory = Path(directory or os.getenv("METRICS_DIR", "data/metrics"))
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = directory / f"{run_name}-{timestamp}.json"
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(
+            {"run": run_name, "created_at": timestamp, "metrics": REGISTRY.summary()},
+            f,
+            indent=2,
+        )
+    return path
@@ -0,0 +1,218 @@
+import atexit
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config.logger import get_logger
+
+logger = get_logger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    status: str = "OK"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional["Span"] = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def inherited(self, key: str) -> Any:
+        """Look an attribute up on this span or its closest ancestor."""
+        span = self
+        while span is not None:
+            if key in span.attributes:
+                return span.attributes[key]
+            span = span.parent
+        return None
+
+    def to_otlp(self) -> dict:
+        """Serialise using OpenTelemetry's OTLP/JSON span field names."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "status": {"code": 2 if self.status == "ERROR" else 1},
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+        }
+
+
+class DatabaseSpanExporter:
+    """
+    Store spans in the `trace_spans` table next to the job they belong to.
+
+    Traces are written in batches (TRACE_BATCH_SIZE spans or every
+    TRACE_FLUSH_INTERVAL_S seconds) so tracing does not add a commit per job.
+    """
+
+    def __init__(self):
+        self._batch_size = int(os.getenv("TRACE_BATCH_SIZE", "500"))
+        self._interval = float(os.getenv("TRACE_FLUSH_INTERVAL_S", "10"))
+        self._pending: List[Span] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._pending.extend(spans)
+            due = (
+                len(self._pending) >= self._batch_size
+                or time.monotonic() - self._last_flush >= self._interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            spans, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if not spans:
+            return
+        from src.db.model import SessionLocal, TraceSpan
+
+        with SessionLocal() as session:
+            session.add_all(
+                [
+                    TraceSpan(
+                        trace_id=span.trace_id,
+                        span_id=span.span_id,
+                        parent_span_id=span.parent_span_id,
+                        name=span.name,
+                        job_analysis_id=span.inherited("job_analysis_id"),
+                        installation_id=span.inherited("installation_id"),
+                        start_ns=span.start_ns,
+                        duration_ms=span.duration_ms,
+                        status=span.status,
+                        attributes=span.attributes,
+                    )
+                    for span in spans
+                ]
+            )
+            session.commit()
+
+
+class JsonLinesSpanExporter:
+    """Append spans as OTLP/JSON objects, one per line."""
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._lock = threading.Lock()
+
+    def flush(self):
+        pass
+
+    def export(self, spans: List[Span]):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(span.to_otlp()) + "\n" for span in spans)
+        with self._lock, self._path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class Tracer:
+    """
+    Collects finished spans per trace and hands the whole trace to the
+    exporter together when its root span ends.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self._pending: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+            parent=parent,
+        )
+
+    def finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        if self.exporter is None:
+            return
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent is not None:
+                return
+            del self._pending[span.trace_id]
+        try:
+            self.exporter.export(spans)
+        except Exception:
+            logger.exception("Failed to export trace spans")
+
+
+def _build_exporter():
+    exporter = os.getenv("TRACE_EXPORTER", "db").lower()
+    if exporter == "db":
+        return DatabaseSpanExporter()
+    if exporter == "file":
+        return JsonLinesSpanExporter(os.getenv("TRACES_FILE", "data/traces.jsonl"))
+    return None
+
+
+TRACER = Tracer(_build_exporter())
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """Record the enclosed block as a span, nested under the current one."""
+    current = TRACER.start(name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.attributes["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        TRACER.finish(current)
+
+
+def flush_traces():
+    """Write out spans the exporter is still holding."""
+    if TRACER.exporter is None:
+        return
+    try:
+        TRACER.exporter.flush()
+    except Exception:
+        logger.exception("Failed to export trace spans")
+
+
+atexit.register(flush_traces)
+
+
+def set_attribute(key: str, value: Any):
+    """Attach an attribute to the active span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
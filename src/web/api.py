@@ -1,14 +1,14 @@
 import atexit
 import os
 import signal
-from concurrent.futures import Future, ProcessPoolExecutor
-from typing import Dict
-from uuid import uuid4
+import threading
+import time
+from concurrent.futures import Future
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
+from sqlalchemy import func, or_
 
-from src.agents.lever import LeverAgent
 from src.config.logger import get_logger
 from src.db.model import (
     ApplicationActions,
@@ -16,30 +16,98 @@ from src.db.model import (
     JobGoogleSearchQuery,
     SessionLocal,
     InstalledExtensions,
+    init_db,
 )
-from src.jobs.lever import execute as trigger_jobs_processing
+from src.db.postings import get_or_create_postings
+from src.db.profiles import get_installation_profile
+from src.jobs.scheduler import FairScheduler
+from src.jobs.worker import create_worker_pool, refine_search_queries, terminate_workers
 from src.models.api import (
     Action,
     ExtensionRequest,
     InstallRequest,
+    LeverPostingsRequest,
     ListingsRequest,
     StatusRequest,
     UrlsRequest,
 )
+from src.models.processors import ResumeProfile
+from src.processors.lever_postings import ingest_postings
+from src.processors.search_queries import build_search_queries, save_search_queries
 from src.processors.utils import clean_url
+from src.telemetry.metrics import HTTP_REQUEST_SECONDS, REGISTRY
 from dotenv import load_dotenv
 
 load_dotenv('.env')
 
 logger = get_logger(__name__)
 
-EXECUTOR = ProcessPoolExecutor(max_workers=2)
-JOBS: Dict[str, Future] = {}
+# Add the LLM's search queries to the template ones after /api/install returns.
+SEARCH_QUERY_REFINEMENT = os.getenv("SEARCH_QUERY_REFINEMENT", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+WORKERS = 2
 
 app = Flask(__name__)
 CORS(app)
 
 
+_db_ready = False
+_db_lock = threading.Lock()
+
+
+@app.before_request
+def ensure_db():
+    """
+    Create missing tables and columns before the first request, however the
+    app is served (flask, gunicorn, the benchmarks), without doing it on import.
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            endpoint=endpoint,
+            status=str(response.status_code),
+        )
+    return response
+
+
+def _merge_worker_metrics(future: Future):
+    try:
+        REGISTRY.merge(future.result())
+    except Exception:
+        logger.exception("Could not merge worker metrics")
+
+
+# Installations take turns on the workers; see src/jobs/scheduler.py.
+SCHEDULER = FairScheduler(
+    create_worker_pool(max_workers=WORKERS),
+    max_in_flight=WORKERS,
+    on_result=_merge_worker_metrics,
+)
+
+
 @app.route("/", methods=["GET"])
 def index():
     return jsonify(
@@ -49,6 +117,20 @@ def index():
     )
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus text exposition of API and pipeline metrics.
+    Worker metrics are merged in when each processing run finishes.
+    Pass `?format=json` for a summary with p50/p95 per stage.
+    """
+    if request.args.get("format") == "json":
+        return jsonify(REGISTRY.summary())
+    return Response(
+        REGISTRY.render_prometheus(), mimetype="text/plain; version=0.0.4"
+    )
+
+
 @app.route("/api/install", methods=["POST"])
 def install():
     """
@@ -74,28 +156,40 @@ def install():
                 openai_key=installation_data.openai_key,
             )
             session.add(new_extension)
-            session.commit()
-
-    agent = LeverAgent()
-
-    search_data = agent.generate_google_searches(installation_data)
-
-    with SessionLocal() as session:
-        records = [
-            JobGoogleSearchQuery(
-                installation_id=installation_data.installation_id,
-                site=data.site,
-                role_focus=data.role_focus,
-                filters=data.filters,
-                query=data.query,
-                google_search_url=data.google_search_url,
-            )
-            for data in search_data
-        ]
-        session.add_all(records)
+        elif (
+            record.resume != installation_data.resume
+            or record.preferences != installation_data.preferences
+        ):
+            record.resume = installation_data.resume
+            record.preferences = installation_data.preferences
+        # Parse the resume and render the filler system prompt once here,
+        # rather than for every question the workers answer.
+        profile = get_installation_profile(
+            session,
+            installation_data.installation_id,
+            installation_data.resume,
+            installation_data.preferences,
+        )
+        queries = build_search_queries(
+            installation_data.resume,
+            installation_data.preferences,
+            ResumeProfile.model_validate(profile["profile"]),
+        )
+        save_search_queries(
+            session, installation_data.installation_id, queries, source="template"
+        )
         session.commit()
 
-        return jsonify({"urls": [record.google_search_url for record in records]})
+    if SEARCH_QUERY_REFINEMENT:
+        # The LLM's queries are added in the background; /api/status lists them.
+        SCHEDULER.submit(
+            installation_data.installation_id,
+            refine_search_queries,
+            installation_data.resume,
+            installation_data.preferences,
+        )
+
+    return jsonify({"urls": [query.google_search_url for query in queries]})
 
 
 @app.route("/api/listings", methods=["POST"])
@@ -103,6 +197,11 @@ def listings():
     """
     Receives installation_id and links extracted from a Google search page.
     Stores the links for processing.
+
+    Returns 503 with nothing stored when the backend is overloaded, and 429
+    when links went over the installation's queue quota; only the links
+    that fit were stored. Both carry Retry-After; resending the same links
+    later is safe.
     """
     data = ListingsRequest.model_validate(request.get_json())
     logger.info(
@@ -116,7 +215,7 @@ def listings():
         if link.endswith("/apply"):
             link = link[:-6]
         extracted_links.append(link)
-    logger.info(extracted_links)
+    logger.debug("Extracted lever links", extra={"links": extracted_links})
 
     with SessionLocal() as session:
         existing_links = [
@@ -128,87 +227,166 @@ def listings():
             )
             .all()
         ]
+        new_links = list(
+            dict.fromkeys(link for link in extracted_links if link not in existing_links)
+        )
+        admission = SCHEDULER.admit(data.installation_id, len(new_links))
+        if admission.overloaded:
+            response = jsonify(
+                {
+                    "status": "overloaded",
+                    "reason": admission.reason,
+                    "retry_after": admission.retry_after,
+                }
+            )
+            return response, 503, {"Retry-After": str(admission.retry_after)}
+        deferred = new_links[admission.accepted :]
+        new_links = new_links[: admission.accepted]
+        postings = get_or_create_postings(session, new_links)
         records = [
             JobAnalysis(
                 link=link,
+                posting_id=postings[link].id,
                 title="processing...",
                 expired=False,
                 installation_id=data.installation_id,
                 is_processing=True,
             )
-            for link in extracted_links
-            if link not in existing_links
+            for link in new_links
         ]
         logger.info(f"Found {len(records)} new lever analysis")
         session.add_all(records)
         session.commit()
 
-    job_id = str(uuid4())
-    future = EXECUTOR.submit(trigger_jobs_processing, data.installation_id)
-    JOBS[job_id] = future  # not really necessary
+    SCHEDULER.submit_run(data.installation_id)
 
+    if deferred:
+        logger.info(
+            f"Deferred {len(deferred)} links over the queue quota of installation: "
+            f"{data.installation_id}"
+        )
+        response = jsonify(
+            {
+                "status": "deferred",
+                "reason": admission.reason,
+                "links_received": len(data.links),
+                "links_accepted": len(new_links),
+                "links_deferred": len(deferred),
+                "retry_after": admission.retry_after,
+            }
+        )
+        return response, 429, {"Retry-After": str(admission.retry_after)}
     return jsonify({"status": "success", "links_received": len(data.links)})
 
 
+@app.route("/api/lever-postings", methods=["POST"])
+def lever_postings():
+    """
+    Pulls the open postings of the given Lever companies (by default those of
+    the installation's known links) from the postings API and queues the ones
+    matching the keywords and locations, with their job details filled in.
+    """
+    data = LeverPostingsRequest.model_validate(request.get_json())
+    logger.info(
+        f"Lever postings request from installation: {data.installation_id}",
+        extra={"companies": data.companies},
+    )
+    admission = SCHEDULER.admit(data.installation_id)
+    if admission.overloaded:
+        response = jsonify(
+            {
+                "status": "overloaded",
+                "reason": admission.reason,
+                "retry_after": admission.retry_after,
+            }
+        )
+        return response, 503, {"Retry-After": str(admission.retry_after)}
+    stats = ingest_postings(
+        data.installation_id,
+        data.companies,
+        data.keywords,
+        data.locations,
+        max_added=admission.accepted,
+    )
+
+    if stats["added"]:
+        SCHEDULER.submit_run(data.installation_id)
+
+    if stats["deferred"]:
+        SCHEDULER.record_deferred(admission, stats["deferred"])
+        response = jsonify(
+            {
+                "status": "deferred",
+                "reason": admission.reason,
+                "retry_after": admission.retry_after,
+                **stats,
+            }
+        )
+        return response, 429, {"Retry-After": str(admission.retry_after)}
+    return jsonify({"status": "success", **stats})
+
+
 @app.route("/api/status", methods=["POST"])
 def status():
     """
     Checks if jobs are ready for the given installation_id.
-    Returns 200 if jobs are ready, 202 if still processing.
+    Returns 200 with the number of jobs ready to apply as soon as there is
+    one, even while others are still processing, and 202 while none is.
     """
     data = StatusRequest.model_validate(request.get_json())
     logger.info(f"Status check from installation: {data.installation_id}")
 
     with SessionLocal() as session:
-        processing_jobs = (
-            session.query(JobAnalysis)
+        counts = dict(
+            session.query(JobAnalysis.is_processing, func.count(JobAnalysis.id))
             .filter(
                 JobAnalysis.installation_id == data.installation_id,
-                JobAnalysis.is_processing == True,
+                JobAnalysis.is_processed == False,
+                # Failed jobs that will be retried are still processing.
+                or_(JobAnalysis.is_processing == True, JobAnalysis.has_error == False),
+                JobAnalysis.is_parked.isnot(True),
             )
+            .group_by(JobAnalysis.is_processing)
             .all()
         )
-        if len(processing_jobs) == 0:
-            job_count = (
-                session.query(JobAnalysis)
-                .filter(
-                    JobAnalysis.installation_id == data.installation_id,
-                    JobAnalysis.is_processed == False,
-                    JobAnalysis.has_error == False,
-                )
-                .count()
+        job_count, processing = counts.get(False, 0), counts.get(True, 0)
+        if job_count:
+            logger.info(
+                f"{job_count} jobs ready, {processing} processing for installation: "
+                f"{data.installation_id}"
+            )
+            return (
+                jsonify(
+                    {"status": "ready", "job_count": job_count, "processing": processing}
+                ),
+                200,
             )
-            if job_count == 0:
-                # check google searches
-                google_data_records = (
-                    session.query(JobGoogleSearchQuery)
-                    .filter(
-                        JobGoogleSearchQuery.installation_id == data.installation_id
-                    )
-                    .all()
-                )
-                if len(google_data_records) == 0:
-                    return jsonify({"status": "none"}), 200
-                return jsonify(
-                    {
-                        "status": "google",
-                        "urls": [
-                            record.google_search_url for record in google_data_records
-                        ],
-                    }
-                )
-            logger.info(f"Jobs are ready for installation: {data.installation_id}")
-            return jsonify({"status": "ready", "job_count": job_count}), 200
-        else:
+        if processing:
             logger.info(f"Jobs not ready yet for installation: {data.installation_id}")
-            return jsonify({"status": "processing"}), 202
+            return jsonify({"status": "processing", "processing": processing}), 202
+
+        # check google searches
+        google_data_records = (
+            session.query(JobGoogleSearchQuery)
+            .filter(JobGoogleSearchQuery.installation_id == data.installation_id)
+            .all()
+        )
+        if len(google_data_records) == 0:
+            return jsonify({"status": "none"}), 200
+        return jsonify(
+            {
+                "status": "google",
+                "urls": [record.google_search_url for record in google_data_records],
+            }
+        )
 
 
 @app.route("/api/urls", methods=["POST"])
 def urls():
     """
     Returns a list of job application URLs for the given installation_id.
-    These are the URLs that the user should visit to apply for jobs.
+    These are the URLs that the user should visit to apply for jobs: the
+    finished ones, most relevant first, with the number still processing.
     """
     data = UrlsRequest.model_validate(request.get_json())
     logger.info(f"URLs request from installation: {data.installation_id}")
@@ -219,11 +397,23 @@ def urls():
             .filter(
                 JobAnalysis.installation_id == data.installation_id,
                 JobAnalysis.is_processed == False,
-                JobAnalysis.has_error == False,
+                # Failed jobs that will be retried are still processing.
+                or_(JobAnalysis.is_processing == True, JobAnalysis.has_error == False),
+                JobAnalysis.is_parked.isnot(True),
             )
             .all()
         )
-        job_urls = [record.link for record in records]
+        # Finished jobs only, most relevant first; the rest are still processing.
+        ready = sorted(
+            (record for record in records if not record.is_processing),
+            key=lambda record: (
+                record.relevance_score is None,
+                -(record.relevance_score or 0.0),
+                -record.id,
+            ),
+        )
+        processing = len(records) - len(ready)
+        job_urls = [record.link for record in ready]
         formatted_urls = []
         for url in job_urls:
             if not url.endswith("/apply"):
@@ -233,7 +423,7 @@ def urls():
         logger.info(
             f"Returning {len(job_urls)} URLs for installation: {data.installation_id}"
         )
-        return jsonify({"urls": formatted_urls})
+        return jsonify({"urls": formatted_urls, "processing": processing})
 
 
 @app.route("/api/filler", methods=["POST"])
@@ -294,9 +484,11 @@ def mark_job_as_processed():
 
 def shutdown_pool_immediately():
     # Try to cancel futures that haven't started, and stop accepting new tasks
-    # wait=False => return immediately; running tasks will be terminated by process exit
+    # wait=False => return immediately; workers get SIGTERM, write what their
+    # running jobs have done and exit, and those jobs resume on the next run
     try:
-        EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        terminate_workers(SCHEDULER.executor)
+        SCHEDULER.shutdown()
     except Exception:
         pass
 
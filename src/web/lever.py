@@ -1,16 +1,72 @@
+import asyncio
+import os
+import time
 import traceback
+from functools import partial
 from typing import List, Optional
 
 from bs4 import BeautifulSoup
 from pyppeteer import launch
 
 from src.config.logger import get_logger
+from src.telemetry.metrics import REGISTRY, timed
 
+FORM_FILL_SECONDS = REGISTRY.histogram(
+    "hermes_form_fill_seconds",
+    "Time to fill all answers of one application form.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, float("inf")),
+)
+FORM_FILL_FIELDS = REGISTRY.counter(
+    "hermes_form_fill_fields_total",
+    "Form fields filled in the page's batch script (evaluate) or with input events (cdp).",
+    ["method", "result"],
+)
 
-def _get_wrapper(snippet: str):
-    return f"""
-async def __snippet__(page):
-    {snippet}
+# Fills every field of a form in one round trip. Each field is
+# {action, selector, value}; each result is "ok", "missing" (no element),
+# "no_option" (no matching select option), "needs_input" (left for real
+# input events: autocompletes, rich text, file inputs) or an error message.
+_FILL_FORM_JS = """
+(fields) => {
+  const setValue = (el, value) => {
+    const proto = Object.getPrototypeOf(el);
+    const setter = Object.getOwnPropertyDescriptor(proto, "value");
+    if (setter && setter.set) setter.set.call(el, value);
+    else el.value = value;
+    el.dispatchEvent(new Event("input", { bubbles: true }));
+    el.dispatchEvent(new Event("change", { bubbles: true }));
+  };
+  const needsInput = (el) =>
+    el.isContentEditable ||
+    el.type === "file" ||
+    el.getAttribute("role") === "combobox" ||
+    el.hasAttribute("aria-autocomplete") ||
+    el.classList.contains("location-input");
+  return fields.map(({ action, selector, value }) => {
+    try {
+      const el = document.querySelector(selector);
+      if (!el) return "missing";
+      if (action !== "click" && needsInput(el)) return "needs_input";
+      if (action === "click") {
+        el.click();
+      } else if (el.tagName === "SELECT") {
+        const wanted = String(value ?? "");
+        const option = Array.from(el.options).find(
+          (o) => o.value === wanted || o.text.trim() === wanted.trim()
+        );
+        if (!option) return "no_option";
+        setValue(el, option.value);
+      } else {
+        el.focus();
+        setValue(el, String(value ?? ""));
+        el.blur();
+      }
+      return "ok";
+    } catch (e) {
+      return String(e && e.message ? e.message : e);
+    }
+  });
+}
 """
 
 
@@ -18,8 +74,9 @@ class LeverAutoBrowser:
     def __init__(self, show_browser: bool = True, debug: bool = False):
         self._headless_mode = not show_browser
         self._debug = debug
-        self._executable_path = (
-            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+        self._executable_path = os.getenv(
+            "CHROME_EXECUTABLE_PATH",
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
         )
         self._launch_args = [
             "--no-sandbox",
@@ -30,11 +87,12 @@ class LeverAutoBrowser:
         self._form_container = {"id": "application-form"}
 
     async def create_browser(self):
-        browser = await launch(
-            headless=self._headless_mode,
-            args=self._launch_args,
-            executablePath=self._executable_path,
-        )
+        with timed("browser_launch"):
+            browser = await launch(
+                headless=self._headless_mode,
+                args=self._launch_args,
+                executablePath=self._executable_path,
+            )
         self._browser = browser
 
     async def close_browser(self):
@@ -47,27 +105,19 @@ class LeverAutoBrowser:
             raise ValueError("Browser is not created")
         page = await self._browser.newPage()
         await self._page_setup(page)
-        await page.goto(link, waitUntil="networkidle2", timeout=120_000)
+        with timed("browser_navigation"):
+            await page.goto(link, waitUntil="networkidle2", timeout=120_000)
         return page
 
-    async def auto_apply(self, link: str, questions: List[dict]):
+    async def auto_apply(self, link: str, actions: List[dict]):
+        """Open the apply page and fill it with a job's stored actions."""
         try:
             page = await self.new_page(link)
             form_selector = self._build_selector_from_identifier(self._form_container)
-            await page.waitForSelector(form_selector, {"timeout": 60_000})
+            with timed("form_wait"):
+                await page.waitForSelector(form_selector, {"timeout": 60_000})
             self._logger.info(f"Filling form: [{link}]")
-            for question in questions:
-                question_text = question["question_text"]
-                answer_text = question["answer_text"]
-                code = question["answer_execution_code"]
-                try:
-                    await self._run_action_snippet(page, code)
-                except Exception as e:
-                    self._logger.info(
-                        f"Error filling form. Question: {question_text}\nAnswer: {answer_text}\n"
-                    )
-                    if self._debug:
-                        self._logger.exception(e)
+            await self.fill_form(page, actions)
             resume_input = await page.querySelector("#resume-upload-input")
             await resume_input.uploadFile("data/resume.pdf")
             self._logger.info(f"Done filling form: [{link}]")
@@ -113,12 +163,65 @@ class LeverAutoBrowser:
             }
         )
 
-    @staticmethod
-    async def _run_action_snippet(page, snippet):
-        wrapper = _get_wrapper(snippet)
-        ns = {}
-        exec(wrapper, ns, ns)
-        return await ns["__snippet__"](page)
+    async def fill_form(self, page, actions: List[dict]) -> List[str]:
+        """
+        Fill a form from stored actions (`action`, `query_selector` and
+        `value` or `answer_text`, as in ApplicationActions).
+
+        All fields are set by one script in the page. Only fields it leaves
+        for real input events, or fails on, are then typed, clicked or
+        selected through the DevTools protocol, one by one.
+
+        Returns:
+            One result per action, "ok" or why it was not filled
+        """
+        fields = [
+            {
+                "action": action["action"],
+                "selector": action["query_selector"],
+                "value": action.get("value", action.get("answer_text")),
+            }
+            for action in actions
+        ]
+        start = time.perf_counter()
+        with timed("form_fill"):
+            results = await page.evaluate(_FILL_FORM_JS, fields)
+            for index, (field, result) in enumerate(zip(fields, results)):
+                if result == "ok":
+                    FORM_FILL_FIELDS.inc(method="evaluate", result="ok")
+                    continue
+                if result in ("missing", "no_option"):
+                    FORM_FILL_FIELDS.inc(method="evaluate", result="failed")
+                else:
+                    results[index] = await self._fill_with_input_events(page, field)
+                    FORM_FILL_FIELDS.inc(
+                        method="cdp", result="ok" if results[index] == "ok" else "failed"
+                    )
+                if results[index] != "ok":
+                    self._logger.info(
+                        f"Could not fill {field['selector']}: {results[index]}",
+                        extra={"question_text": actions[index].get("question_text")},
+                    )
+        FORM_FILL_SECONDS.observe(time.perf_counter() - start)
+        return results
+
+    async def _fill_with_input_events(self, page, field: dict) -> str:
+        selector, value = field["selector"], field["value"]
+        try:
+            if field["action"] == "click":
+                await page.click(selector)
+            elif field["action"] == "select":
+                if not await page.select(selector, str(value or "")):
+                    return "no_option"
+            else:
+                # Select the current text so typing replaces it.
+                await page.click(selector, {"clickCount": 3})
+                await page.type(selector, str(value or ""))
+            return "ok"
+        except Exception as e:
+            if self._debug:
+                self._logger.exception(e)
+            return str(e)
 
     def _build_selector_from_identifier(self, identifier: dict) -> Optional[str]:
         """
@@ -142,9 +245,56 @@ class LeverAutoBrowser:
         return "".join(selector_parts) if selector_parts else None
 
 
+class BrowserPool:
+    """
+    Keeps one Chrome per worker process running between jobs, instead of
+    launching and closing one for every posting. Relaunches it if it dies.
+    """
+
+    def __init__(self, headless: bool = True):
+        self._launcher = LeverAutoBrowser(show_browser=not headless)
+        self._lock: Optional[asyncio.Lock] = None
+        self._connected = False
+
+    def _on_disconnected(self, browser):
+        # A browser replaced earlier can report its disconnect late.
+        if browser is self._launcher._browser:
+            self._connected = False
+
+    def _alive(self, browser) -> bool:
+        # Chrome exiting closes the DevTools connection, but the event only
+        # fires once the connection notices; a dead process is known at once.
+        process = browser.process
+        return self._connected and (process is None or process.poll() is None)
+
+    async def get(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            browser = self._launcher._browser
+            if browser is not None and not self._alive(browser):
+                self._launcher._browser = None
+            if self._launcher._browser is None:
+                await self._launcher.create_browser()
+                browser = self._launcher._browser
+                self._connected = True
+                browser.on("disconnected", partial(self._on_disconnected, browser))
+            return self._launcher._browser
+
+    async def close(self):
+        await self._launcher.close_browser()
+
+
 class LeverBrowser(LeverAutoBrowser):
-    def __init__(self, link: str, headless: bool = True, debug: bool = False):
+    def __init__(
+        self,
+        link: str,
+        headless: bool = True,
+        debug: bool = False,
+        browser_pool: Optional[BrowserPool] = None,
+    ):
         super().__init__(not headless, debug)
+        self._browser_pool = browser_pool
         self._logger = get_logger(__name__)
         self._link = link
         self._headless_mode = headless
@@ -163,17 +313,22 @@ class LeverBrowser(LeverAutoBrowser):
         Open the posting link with pyppeteer and return the innerHTML of the form container.
         """
         browser_created = False
+        if self._browser is None and self._browser_pool is not None:
+            self._browser = await self._browser_pool.get()
         if self._browser is None:
             await self.create_browser()
             browser_created = True
+        page = None
         try:
             page = await self._browser.newPage()
             await self._page_setup(page)
-            await page.goto(self._link, waitUntil="networkidle2", timeout=120_000)
+            with timed("browser_navigation"):
+                await page.goto(self._link, waitUntil="networkidle2", timeout=120_000)
 
             selector = self._build_selector_from_identifier(self._form_container)
-            self._logger.info(f"Waiting for form {selector}")
-            await page.waitForSelector(selector, {"timeout": 60_000})
+            self._logger.debug(f"Waiting for form {selector}")
+            with timed("form_wait"):
+                await page.waitForSelector(selector, {"timeout": 60_000})
             element = await page.querySelector(selector)
             if not element:
                 raise RuntimeError(
@@ -185,6 +340,9 @@ class LeverBrowser(LeverAutoBrowser):
         finally:
             if browser_created:
                 await self.close_browser()
+            elif page is not None:
+                # The pooled browser outlives this posting; only its tab is closed.
+                await page.close()
 
     def get_questions_html(self, form_html: str) -> List[str]:
         """Extract question HTML elements using BeautifulSoup."""
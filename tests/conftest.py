@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.common import prepare_environment
+from benchmarks.stub_server import start_stub_server
+
+# A throwaway database, created before any test imports the models. Nothing
+# here calls Ollama; the URL only has to be set.
+prepare_environment("http://127.0.0.1:9")
+
+
+@pytest.fixture(scope="session")
+def lever_stub():
+    """Base URL of a local stand-in for jobs.lever.co and the postings API."""
+    server, url = start_stub_server()
+    yield url
+    server.shutdown()
@@ -0,0 +1,29 @@
+from src.db.model import JobAnalysis, Posting, SessionLocal
+from src.processors import lever_postings
+from src.processors.search_queries import build_search_queries, save_search_queries
+
+
+def test_default_keywords_ignore_seniority(lever_stub, monkeypatch):
+    monkeypatch.setattr(lever_postings, "LEVER_API_URL", f"{lever_stub}/v0/postings")
+    installation_id = "default-keywords"
+    queries = build_search_queries(
+        "Backend Engineer at Initech, 9 years of Python and PostgreSQL.",
+        "Senior backend roles",
+    )
+    assert queries[0].role_focus == "Senior Backend Engineer"
+    with SessionLocal() as session:
+        save_search_queries(session, installation_id, queries, source="template")
+        session.commit()
+
+    stats = lever_postings.ingest_postings(installation_id, companies=["acme"])
+
+    # "Staff Software Engineer, Backend" has no "Senior" but is a backend role.
+    assert stats["matched"] == 2
+    with SessionLocal() as session:
+        titles = {
+            posting.title
+            for posting in session.query(Posting)
+            .join(JobAnalysis, JobAnalysis.posting_id == Posting.id)
+            .filter(JobAnalysis.installation_id == installation_id)
+        }
+    assert titles == {"Senior Backend Engineer", "Staff Software Engineer, Backend"}
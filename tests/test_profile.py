@@ -0,0 +1,39 @@
+from src.processors.form_templates import profile_action, question_key
+from src.processors.profile import parse_profile
+
+RESUME = """Senior Software Engineer
+jane.doe@example.com | +1 415 555 0100 | https://github.com/janedoe
+Skills: Python, PostgreSQL
+"""
+
+
+def _text_question(name: str) -> str:
+    return (
+        f'<div class="application-label">{name.title()}</div>'
+        f'<input type="text" name="{name}">'
+    )
+
+
+def test_headline_is_not_taken_for_the_name():
+    profile = parse_profile(RESUME)
+
+    assert profile.name is None
+    assert profile.email == "jane.doe@example.com"
+    assert parse_profile("Jane Q. Doe\n" + RESUME).name == "Jane Q. Doe"
+
+
+def test_only_reliable_contact_fields_are_filled_from_the_profile():
+    profile = parse_profile("Jane Doe\n" + RESUME).model_dump()
+    questions = {name: _text_question(name) for name in ("name", "email")}
+    selectors = {
+        question_key(html): {
+            "action": "type",
+            "query_selector": f"input[name={name}]",
+            "question_text": name.title(),
+        }
+        for name, html in questions.items()
+    }
+
+    assert profile_action(questions["name"], selectors, profile) is None
+    action = profile_action(questions["email"], selectors, profile)
+    assert action.value == "jane.doe@example.com"
@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.db.model import JobAnalysis, SessionLocal
+from src.jobs.scheduler import FairScheduler
+
+RUNS = []
+
+
+def _fail_once(installation_id: str, max_jobs: int):
+    """Fail each job on its first attempt, the way LeverProcessor marks a retryable one."""
+    RUNS.append(installation_id)
+    with SessionLocal() as session:
+        for job in session.query(JobAnalysis).filter(
+            JobAnalysis.installation_id == installation_id,
+            JobAnalysis.is_processing == True,
+        ):
+            if job.attempts:
+                job.is_processing, job.has_error = False, False
+            else:
+                job.has_error, job.attempts = True, 1
+        session.commit()
+
+
+def _add_job(installation_id: str, **fields) -> int:
+    with SessionLocal() as session:
+        job = JobAnalysis(
+            link=f"https://jobs.lever.co/acme/{installation_id}",
+            title="processing...",
+            expired=False,
+            installation_id=installation_id,
+            is_processing=True,
+            **fields,
+        )
+        session.add(job)
+        session.commit()
+        return job.id
+
+
+def test_failed_job_is_retried_without_a_new_request():
+    job_id = _add_job("retry")
+    scheduler = FairScheduler(
+        ThreadPoolExecutor(max_workers=1), max_in_flight=1, run_task=_fail_once
+    )
+    scheduler.submit_run("retry")
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        with SessionLocal() as session:
+            job = session.get(JobAnalysis, job_id)
+            if not job.is_processing:
+                break
+        time.sleep(0.05)
+    scheduler.shutdown()
+
+    assert RUNS == ["retry", "retry"]
+    assert (job.is_processing, job.has_error, job.attempts) == (False, False, 1)
+
+
+def test_status_counts_jobs_waiting_for_a_retry():
+    from src.web import api
+
+    _add_job("status-retry", has_error=True, attempts=1)
+    response = api.app.test_client().post(
+        "/api/status", json={"installation_id": "status-retry"}
+    )
+
+    assert response.status_code == 202
+    assert response.json == {"status": "processing", "processing": 1}